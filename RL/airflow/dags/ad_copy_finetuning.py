@@ -1,3 +1,4 @@
+from datetime import timedelta
 import logging
 import os
 
@@ -6,16 +7,19 @@ from airflow.operators.bash import BashOperator
 from airflow.operators.dummy import DummyOperator
 from airflow.operators.python import BranchPythonOperator, PythonOperator
 from airflow.utils.dates import days_ago
+from airflow.utils.trigger_rule import TriggerRule
 from config import ACCESS_KEY, CLOVA_API_KEY, SECRET_KEY
 from modules import (
+    ArtifactStore,
     CompletionExecutor,
     calculate_ad_scores,
     create_finetuning_task,
+    default_store_path,
     generate_ads_comparison,
     generate_qa_data_with_comparison,
+    get_average_score,
     upload_file_to_s3,
 )
-import pandas as pd
 
 
 # ✅ 절대 경로 설정
@@ -24,7 +28,13 @@ CSV_FILE_PATH = os.path.join(BASE_DIR, "generated_ad_copies_with_likes,views,com
 
 
 SCORES_CSV = os.path.join(BASE_DIR, "generated_ad_copies_with_scores.csv")
+SCORES_DB_PATH = default_store_path(SCORES_CSV)  # 광고 문구별 점수와 누적 집계 저장소
 OUTPUT_CSV_PATH = os.path.join(BASE_DIR, "hyperclovax_ab_feedback_dataset.csv")
+PAIR_STRATEGY = "median"  # 비교 쌍 생성 방식: median, gap, stratified, topk
+
+# Task 사이의 데이터는 실행(run_id)별 Parquet 파일로 저장하고 XCom에는 참조만 전달
+ARTIFACT_ROOT = os.path.join(BASE_DIR, "artifacts")
+ARTIFACTS = ArtifactStore(ARTIFACT_ROOT, keep_runs=7)
 
 # ✅ 로그 설정
 logging.basicConfig(level=logging.INFO)
@@ -48,7 +58,8 @@ check_file = BashOperator(
 
 # ✅ 1. 점수 계산 Task
 def calculate_score_task(**kwargs):
-    score = calculate_ad_scores(CSV_FILE_PATH, SCORES_CSV)
+    # 입력 CSV에서 추가·변경된 행만 점수 저장소에 반영
+    score = calculate_ad_scores(CSV_FILE_PATH, SCORES_CSV, store_path=SCORES_DB_PATH)
     kwargs["ti"].xcom_push(key="ad_score", value=score)
     logging.info(f"📊 광고 점수 계산 완료: {score}")
     return score
@@ -64,7 +75,8 @@ calculate_score = PythonOperator(
 
 # ✅ 2. 점수 조건 확인 Task (BranchPythonOperator)
 def check_score_task(**kwargs):
-    score = kwargs["ti"].xcom_pull(task_ids="calculate_score", key="ad_score")
+    # 평균 점수는 저장소의 누적 집계에서 바로 읽음 (CSV를 다시 읽지 않음)
+    score = get_average_score(SCORES_DB_PATH)
     if score <= 9000:
         logging.info(f"📉 점수 {score}가 9000 이하 → 파이프라인 실행")
         return "generate_ad_comparison"
@@ -82,31 +94,36 @@ check_score = BranchPythonOperator(
 
 
 # ✅ 3. 광고 문구 비교 Task
-def generate_ad_comparison_task():
+def generate_ad_comparison_task(**kwargs):
     logging.info(f"📌 광고 문구 비교 데이터 생성 시작, 파일 경로: {SCORES_CSV}")
 
     if not os.path.exists(SCORES_CSV):
         raise FileNotFoundError(f"❌ 파일이 존재하지 않습니다: {SCORES_CSV}")
 
-    ads_comparison = generate_ads_comparison(SCORES_CSV)
+    ads_comparison = generate_ads_comparison(SCORES_CSV, strategy=PAIR_STRATEGY)
     logging.info(f"✅ 광고 문구 비교 데이터 생성 완료: {len(ads_comparison)}개")
 
     if len(ads_comparison) == 0:
         raise ValueError("❌ 광고 문구 비교 데이터가 비어 있습니다.")
 
-    return ads_comparison
+    # 비교 쌍은 Parquet 파일로 저장하고 XCom에는 경로·해시만 담은 참조를 반환
+    return ARTIFACTS.write_frame(
+        kwargs["run_id"], "ads_comparison", ads_comparison, task_id="generate_ad_comparison", inputs=[SCORES_CSV]
+    )
 
 
 generate_ad_comparison = PythonOperator(
     task_id="generate_ad_comparison",
     python_callable=generate_ad_comparison_task,
+    provide_context=True,
     dag=dag,
 )
 
 
 # ✅ 4. QA 데이터 생성 Task
 def generate_qa_data_task(**kwargs):
-    ads_comparison = kwargs["ti"].xcom_pull(task_ids="generate_ad_comparison")
+    comparison_ref = kwargs["ti"].xcom_pull(task_ids="generate_ad_comparison")
+    ads_comparison = ARTIFACTS.read_frame(comparison_ref)
 
     completion_executor = CompletionExecutor(
         host="https://clovastudio.stream.ntruss.com",
@@ -114,11 +131,12 @@ def generate_qa_data_task(**kwargs):
         request_id="YOUR_REQUEST_ID",
     )
 
-    qa_data = generate_qa_data_with_comparison(ads_comparison, completion_executor)
-
-    qa_df = pd.DataFrame(qa_data)
-    qa_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding="utf-8")
-    logging.info(f"✅ QA 데이터 CSV 저장 완료: {OUTPUT_CSV_PATH}")
+    # 완료된 행은 C_ID 순서대로 바로 CSV에 기록되며, Task 재시도 시 응답을 받지 못한 쌍만 다시 요청
+    qa_data = generate_qa_data_with_comparison(ads_comparison, completion_executor, output_path=OUTPUT_CSV_PATH)
+    logging.info(f"✅ QA 데이터 CSV 저장 완료: {OUTPUT_CSV_PATH} ({len(qa_data)}개)")
+    ARTIFACTS.register_file(
+        kwargs["run_id"], "qa_dataset", OUTPUT_CSV_PATH, task_id="generate_qa_data", inputs=[comparison_ref]
+    )
 
     return OUTPUT_CSV_PATH
 
@@ -127,6 +145,8 @@ generate_qa_data = PythonOperator(
     task_id="generate_qa_data",
     python_callable=generate_qa_data_task,
     provide_context=True,
+    retries=2,
+    retry_delay=timedelta(minutes=1),
     dag=dag,
 )
 
@@ -190,6 +210,22 @@ skip_pipeline = DummyOperator(
     dag=dag,
 )
 
+
+# ✅ 8. 오래된 실행 데이터 정리 Task (파이프라인 실행·스킵·실패와 관계없이 실행)
+def cleanup_artifacts_task(**kwargs):
+    removed = ARTIFACTS.cleanup(exclude=[kwargs["run_id"]])
+    logging.info(f"🧹 실행 데이터 정리 완료: {len(removed)}개 삭제, 저장 경로: {ARTIFACT_ROOT}")
+
+
+cleanup_artifacts = PythonOperator(
+    task_id="cleanup_artifacts",
+    python_callable=cleanup_artifacts_task,
+    provide_context=True,
+    trigger_rule=TriggerRule.ALL_DONE,
+    dag=dag,
+)
+
 # ✅ DAG 구조 설정
 check_file >> calculate_score >> check_score >> [generate_ad_comparison, skip_pipeline]
 generate_ad_comparison >> generate_qa_data >> upload_to_s3 >> finetuning
+[finetuning, skip_pipeline] >> cleanup_artifacts
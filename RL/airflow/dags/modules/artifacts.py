@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+
+import pandas as pd
+
+
+ARTIFACT_FORMAT = "parquet"
+LINEAGE_FILE = "lineage.jsonl"
+DEFAULT_KEEP_RUNS = 7
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """파일 내용의 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(value):
+    """run_id(예: scheduled__2024-01-01T00:00:00+00:00)를 디렉토리 이름으로 쓸 수 있게 바꿉니다."""
+    return re.sub(r"[^0-9A-Za-z._-]", "_", str(value))
+
+
+class ArtifactStore:
+    """
+    DAG 실행(run_id)별 디렉토리에 Task 사이에서 주고받을 데이터를 저장하는 저장소.
+    데이터 자체는 Parquet 파일로 저장하고, XCom에는 경로·해시·행 수만 담은 작은 참조(dict)만 전달합니다.
+    각 실행 디렉토리의 lineage.jsonl에 어떤 Task가 어떤 입력으로 데이터를 만들었는지 기록합니다.
+    :param root: 저장 경로 (로컬 경로 또는 모든 워커가 공유하는 마운트 경로)
+    :param keep_runs: cleanup 시 남겨둘 최근 실행 수
+    """
+
+    def __init__(self, root, keep_runs=DEFAULT_KEEP_RUNS):
+        self.root = root
+        self.keep_runs = keep_runs
+
+    def run_dir(self, run_id):
+        return os.path.join(self.root, _safe_name(run_id))
+
+    def write_frame(self, run_id, name, df, task_id=None, inputs=()):
+        """
+        DataFrame을 Parquet 파일로 저장하고 계보(lineage)를 기록합니다.
+        :param inputs: 이 데이터를 만드는 데 사용한 참조(write_frame/register_file의 반환값) 또는 파일 경로
+        :return: XCom으로 전달할 참조 {"run_id", "name", "path", "format", "rows", "sha256"}
+        """
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        path = os.path.join(run_dir, f"{_safe_name(name)}.{ARTIFACT_FORMAT}")
+
+        # Task 재시도 중 중단되어도 불완전한 파일이 남지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+        ref = self._reference(run_id, name, path, ARTIFACT_FORMAT, rows=len(df))
+        self._record_lineage(ref, task_id, inputs)
+        logging.info(f"📦 데이터 저장 완료: {name} ({len(df)}행) → {path}")
+        return ref
+
+    def register_file(self, run_id, name, path, task_id=None, inputs=()):
+        """
+        Task가 직접 만든 파일(CSV 등)을 계보에 기록하고 참조를 반환합니다. (파일은 복사하지 않음)
+        """
+        ref = self._reference(run_id, name, path, os.path.splitext(path)[1].lstrip(".") or None)
+        self._record_lineage(ref, task_id, inputs)
+        return ref
+
+    def read_frame(self, ref):
+        """참조가 가리키는 Parquet 파일을 읽습니다. 파일이 없거나 저장 후 바뀌었으면 오류를 냅니다."""
+        path = ref["path"]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ 데이터 파일이 없습니다 (이미 정리되었을 수 있음): {path}")
+        if file_sha256(path) != ref["sha256"]:
+            raise ValueError(f"❌ 데이터 파일이 저장된 뒤 변경되었습니다: {path}")
+        return pd.read_parquet(path)
+
+    def lineage(self, run_id):
+        """실행의 계보 기록을 기록 순서대로 반환합니다."""
+        path = os.path.join(self.run_dir(run_id), LINEAGE_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def cleanup(self, keep_runs=None, exclude=()):
+        """
+        최근 keep_runs개 실행만 남기고 오래된 실행 디렉토리를 삭제합니다.
+        :param exclude: 오래되었더라도 삭제하지 않을 run_id (예: 현재 실행)
+        :return: 삭제한 디렉토리 경로 리스트
+        """
+        keep_runs = self.keep_runs if keep_runs is None else keep_runs
+        if not os.path.isdir(self.root):
+            return []
+
+        excluded = {_safe_name(run_id) for run_id in exclude}
+        with os.scandir(self.root) as entries:
+            runs = sorted(
+                (entry for entry in entries if entry.is_dir() and entry.name not in excluded),
+                key=lambda entry: entry.stat().st_mtime,
+                reverse=True,
+            )
+
+        removed = []
+        for entry in runs[keep_runs:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+        if removed:
+            logging.info(f"🧹 오래된 실행 데이터 {len(removed)}개 삭제: {self.root}")
+        return removed
+
+    @staticmethod
+    def _reference(run_id, name, path, file_format, rows=None):
+        return {
+            "run_id": str(run_id),
+            "name": name,
+            "path": os.path.abspath(path),
+            "format": file_format,
+            "rows": rows,
+            "sha256": file_sha256(path),
+        }
+
+    def _record_lineage(self, ref, task_id, inputs):
+        inputs = [
+            {"name": item["name"], "path": item["path"], "sha256": item["sha256"]}
+            if isinstance(item, dict)
+            else {"name": os.path.basename(item), "path": os.path.abspath(item), "sha256": file_sha256(item)}
+            for item in inputs
+        ]
+        record = {
+            **ref,
+            "task_id": task_id,
+            "inputs": inputs,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(os.path.join(self.run_dir(ref["run_id"]), LINEAGE_FILE), "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -1,34 +1,136 @@
+import numpy as np
 import pandas as pd
 
 
-def generate_ads_comparison(csv_file):
-    """광고 문구 데이터를 중간값 기준으로 비교 쌍을 생성하는 함수"""
-    df = pd.read_csv(csv_file, encoding="utf-8")
+COMPARISON_COLUMNS = ["ad1_text", "ad1_scores", "ad2_text", "ad2_scores"]
+DEFAULT_STRATEGY = "median"
+DEFAULT_GROUP_COLUMN = "novel_id"
+DEFAULT_TOP_K = 100
+
+
+def _round_robin(high, low):
+    """두 인덱스 배열을 큰 쪽 길이만큼 순환하며 짝지어, 모든 데이터를 한 번 이상 사용합니다."""
+    if len(high) == 0 or len(low) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    positions = np.arange(max(len(high), len(low)))
+    return high[positions % len(high)], low[positions % len(low)]
+
+
+def median_split_pairs(df, scores):
+    """중간값 이상(높은 점수)과 미만(낮은 점수) 그룹을 순환하며 짝짓습니다."""
+    threshold = np.median(scores)
+    return _round_robin(np.flatnonzero(scores >= threshold), np.flatnonzero(scores < threshold))
+
+
+def score_gap_pairs(df, scores, min_gap=0.0, seed=0):
+    """
+    각 광고를 점수가 min_gap 이상 낮은 광고 중 하나(무작위)와 짝짓습니다.
+    짝지을 광고가 없는(하위 점수) 광고는 ad1로 사용하지 않습니다.
+    """
+    order = np.argsort(scores, kind="stable")
+    sorted_scores = scores[order]
+    # 정렬된 배열에서 짝지을 수 있는 광고의 개수 (같은 점수끼리는 비교하지 않으므로 항상 엄격히 낮은 점수만 사용)
+    if min_gap > 0:
+        candidates = np.searchsorted(sorted_scores, sorted_scores - min_gap, side="right")
+    else:
+        candidates = np.searchsorted(sorted_scores, sorted_scores, side="left")
+    has_partner = candidates > 0
+    partner = (np.random.default_rng(seed).random(int(has_partner.sum())) * candidates[has_partner]).astype(np.int64)
+    return order[has_partner], order[partner]
+
+
+def stratified_pairs(df, scores, group_column=DEFAULT_GROUP_COLUMN):
+    """같은 그룹(예: 소설) 안에서 그룹별 중간값으로 나눈 두 그룹을 순환하며 짝짓습니다."""
+    if group_column not in df.columns:
+        raise ValueError(f"그룹 컬럼이 없습니다: {group_column}")
+
+    groups = pd.factorize(df[group_column])[0]
+    is_high = scores >= pd.Series(scores).groupby(groups).transform("median").to_numpy()
 
-    # 중간값(median) 계산
-    threshold = df["scores"].median()
+    # (그룹, 높은/낮은 점수) 순으로 정렬해 그룹·구분별로 연속된 구간을 만듦
+    order = np.lexsort((~is_high, groups))
+    num_groups = groups.max() + 1 if len(groups) else 0
+    high_counts = np.bincount(groups[is_high], minlength=num_groups)
+    low_counts = np.bincount(groups[~is_high], minlength=num_groups)
+    group_starts = np.concatenate(([0], np.cumsum(high_counts + low_counts)[:-1])).astype(np.int64)
 
-    # 점수 기준으로 두 그룹으로 나누기
-    high_score_ads = df[df["scores"] >= threshold].reset_index(drop=True)
-    low_score_ads = df[df["scores"] < threshold].reset_index(drop=True)
+    valid = (high_counts > 0) & (low_counts > 0)
+    pair_counts = np.maximum(high_counts, low_counts) * valid
+    pair_groups = np.repeat(np.arange(num_groups), pair_counts)
+    positions = np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
 
-    ads_comparison = []
+    high_positions = group_starts[pair_groups] + positions % np.maximum(high_counts, 1)[pair_groups]
+    low_positions = (
+        group_starts[pair_groups] + high_counts[pair_groups] + positions % np.maximum(low_counts, 1)[pair_groups]
+    )
+    return order[high_positions], order[low_positions]
 
-    # 모든 데이터를 사용하기 위해 작은 그룹 기준으로 순환
-    max_len = max(len(high_score_ads), len(low_score_ads))
 
-    for i in range(max_len):
-        ad1 = high_score_ads.iloc[i % len(high_score_ads)]  # 높은 점수 그룹
-        ad2 = low_score_ads.iloc[i % len(low_score_ads)]  # 낮은 점수 그룹
+def top_bottom_k_pairs(df, scores, k=DEFAULT_TOP_K):
+    """점수 상위 k개와 하위 k개를 순위대로(1위-꼴찌, 2위-뒤에서 2위, ...) 짝짓습니다."""
+    k = min(k, len(scores) // 2)
+    order = np.argsort(-scores, kind="stable")
+    return order[:k], order[::-1][:k]
 
-        ads_comparison.append(
-            {
-                "ad1": {"text": ad1["copy"], "scores": ad1["scores"]},
-                "ad2": {"text": ad2["copy"], "scores": ad2["scores"]},
-            }
-        )
 
-    return ads_comparison
+PAIR_STRATEGIES = {
+    "median": median_split_pairs,
+    "gap": score_gap_pairs,
+    "stratified": stratified_pairs,
+    "topk": top_bottom_k_pairs,
+}
+
+
+def build_ads_comparison(df, strategy=DEFAULT_STRATEGY, **params):
+    """
+    광고 문구 DataFrame(copy, scores)으로 비교 쌍을 만듭니다.
+    :param strategy: "median", "gap"(min_gap, seed), "stratified"(group_column), "topk"(k)
+    :return: ad1_text, ad1_scores, ad2_text, ad2_scores 컬럼의 DataFrame (ad1이 점수가 높은 문구)
+    """
+    if strategy not in PAIR_STRATEGIES:
+        raise ValueError(f"지원하지 않는 비교 쌍 생성 방식입니다: {strategy} (가능: {list(PAIR_STRATEGIES)})")
+
+    scores = df["scores"].to_numpy()
+    ad1_index, ad2_index = PAIR_STRATEGIES[strategy](df, scores, **params)
+
+    texts = df["copy"].to_numpy()
+    comparison = pd.DataFrame(
+        {
+            "ad1_text": texts[ad1_index],
+            "ad1_scores": scores[ad1_index],
+            "ad2_text": texts[ad2_index],
+            "ad2_scores": scores[ad2_index],
+        }
+    )
+    if strategy == "stratified":
+        group_column = params.get("group_column", DEFAULT_GROUP_COLUMN)
+        comparison[group_column] = df[group_column].to_numpy()[ad1_index]
+    return comparison
+
+
+def to_comparison_frame(ads_comparison):
+    """
+    비교 쌍을 컬럼형 DataFrame으로 변환합니다.
+    DataFrame, 컬럼별 리스트 딕셔너리(XCom 등), 이전 형식인 {"ad1": {...}, "ad2": {...}} 리스트를 받을 수 있습니다.
+    """
+    if isinstance(ads_comparison, pd.DataFrame):
+        return ads_comparison
+    if isinstance(ads_comparison, dict):
+        return pd.DataFrame(ads_comparison)
+    return pd.DataFrame(
+        {
+            f"{ad}_{field}": [comparison[ad][field] for comparison in ads_comparison]
+            for ad in ("ad1", "ad2")
+            for field in ("text", "scores")
+        },
+        columns=COMPARISON_COLUMNS,
+    )
+
+
+def generate_ads_comparison(csv_file, strategy=DEFAULT_STRATEGY, **params):
+    """광고 문구 데이터로 비교 쌍을 생성하는 함수 (기본: 중간값 기준)"""
+    df = pd.read_csv(csv_file, encoding="utf-8")
+    return build_ads_comparison(df, strategy=strategy, **params)
 
 
 # 테스트 실행 예시
@@ -1,28 +1,238 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
 import pandas as pd
 
 
-def calculate_ad_scores(input_csv, output_csv):
-    """광고 문구의 점수를 계산하여 새로운 CSV 파일로 저장하고 평균 점수를 반환하는 함수"""
-    df = pd.read_csv(input_csv, encoding="utf-8")
+NOVEL_COLUMN = "novel_id"  # 있으면 소설별 통계를 함께 유지
+ENGAGEMENT_COLUMNS = ["likes", "comments"]
+# 점수 계산식이 바뀌면 저장된 점수를 모두 다시 계산하도록 저장소에 함께 기록
+SCORE_FORMULA = "likes + comments * 10"
+
+
+def compute_scores(df):
+    """점수 계산: (likes) + (comments * 10)"""
+    return (df["likes"]) + (df["comments"] * 10)
+
+
+def default_store_path(output_csv):
+    """점수 CSV 옆에 두는 점수 저장소 경로 (예: ad_copy_scores.csv -> ad_copy_scores.sqlite3)"""
+    return f"{os.path.splitext(output_csv)[0]}.sqlite3"
+
+
+class ScoreStore:
+    """
+    광고 문구(문구 해시)별 점수와 누적 집계(개수·합계, 소설별 개수·합계)를 저장하는 SQLite 저장소.
+    입력 CSV가 바뀐 경우에만 다시 읽고, 행 해시가 달라진(추가·수정·삭제된) 행만 반영해 집계를 증분 갱신합니다.
+    평균 점수는 집계 테이블에서 바로 읽으므로 전체 데이터를 다시 계산하지 않습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key INTEGER PRIMARY KEY, novel_id TEXT, row_hash INTEGER NOT NULL, score REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS novel_stats ("
+            "novel_id TEXT PRIMARY KEY, count INTEGER NOT NULL, sum REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        if self._get_meta("formula") != SCORE_FORMULA:
+            self._reset()
+
+    def _get_meta(self, name, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, values):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    def _reset(self):
+        """점수 계산식이 바뀌었거나 새 저장소이면 저장된 점수와 집계를 비웁니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM scores")
+            self._conn.execute("DELETE FROM novel_stats")
+            self._conn.execute("DELETE FROM meta")
+            self._set_meta({"formula": SCORE_FORMULA, "count": 0, "sum": 0.0})
+            self._conn.commit()
+
+    def is_current(self, input_csv):
+        """입력 CSV가 마지막으로 반영한 뒤 바뀌지 않았는지 (크기·수정 시각 기준) 확인합니다."""
+        stat = os.stat(input_csv)
+        with self._lock:
+            return self._get_meta("source") == f"{os.path.abspath(input_csv)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def _prepare(df):
+        """행 키(문구 해시, 같은 문구가 여러 번 나오면 순번 포함), 점수, 행 해시를 계산합니다."""
+        # SQLite INTEGER는 부호 있는 64비트이므로 해시를 int64로 재해석
+        copy_hash = pd.util.hash_array(df["copy"].astype(str).to_numpy())
+        occurrence = pd.Series(copy_hash).groupby(copy_hash).cumcount().to_numpy()
+        keys = pd.util.hash_pandas_object(pd.DataFrame({"copy": copy_hash, "n": occurrence}), index=False)
+
+        rows = pd.DataFrame(index=pd.Index(keys.to_numpy().view(np.int64), name="key"))
+        rows["novel_id"] = df[NOVEL_COLUMN].astype(str).to_numpy() if NOVEL_COLUMN in df.columns else None
+        rows["score"] = compute_scores(df).astype(float).to_numpy()
+        hashed = pd.DataFrame({c: df[c].astype(float).to_numpy() for c in ENGAGEMENT_COLUMNS if c in df.columns})
+        hashed["novel_id"] = rows["novel_id"].to_numpy()
+        rows["row_hash"] = pd.util.hash_pandas_object(hashed, index=False).to_numpy().view(np.int64)
+        return rows
+
+    def ingest(self, df, source=None):
+        """
+        점수 데이터를 저장소와 비교해 달라진 행만 반영합니다.
+        :param df: copy와 참여 지표 컬럼(likes, comments 등)을 가진 DataFrame
+        :param source: 반영한 입력 CSV 경로 (is_current 확인용, 선택)
+        :return: (점수 컬럼이 추가된 DataFrame, {"added", "updated", "removed", "unchanged"} 개수)
+        """
+        rows = self._prepare(df)
+        with self._lock:
+            # 변경 여부 비교에는 (키, 행 해시)만 읽고, 이전 점수는 달라진 행만 조회
+            stored = np.fromiter(
+                self._conn.execute("SELECT key, row_hash FROM scores"), dtype=[("key", "i8"), ("row_hash", "i8")]
+            )
+            positions = pd.Index(stored["key"]).get_indexer(rows.index)
+            is_new = positions < 0
+            is_changed = np.zeros(len(rows), dtype=bool)
+            is_changed[~is_new] = stored["row_hash"][positions[~is_new]] != rows["row_hash"].to_numpy()[~is_new]
+            upserts = rows[is_new | is_changed].sort_index()  # 키 순서로 넣어야 B-tree 삽입이 빠름
+            removed = np.setdiff1d(stored["key"], rows.index.to_numpy())
+
+            # 집계에서 이전 값을 빼고 새 값을 더함 (점수가 없는 행은 평균에서 제외)
+            old = self._fetch_rows(np.concatenate([rows.index.to_numpy()[is_changed], removed]))
+            self._apply_delta(old, sign=-1)
+            self._apply_delta(upserts, sign=1)
+
+            self._conn.executemany("DELETE FROM scores WHERE key = ?", ((key,) for key in removed.tolist()))
+            scores = upserts["score"].astype(object).where(upserts["score"].notna(), None)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, novel_id, row_hash, score) VALUES (?, ?, ?, ?)",
+                zip(
+                    upserts.index.tolist(), upserts["novel_id"].tolist(), upserts["row_hash"].tolist(), scores.tolist()
+                ),
+            )
+            if source is not None:
+                stat = os.stat(source)
+                self._set_meta({"source": f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"})
+            self._conn.commit()
+
+        changes = {
+            "added": int(is_new.sum()),
+            "updated": int(is_changed.sum()),
+            "removed": len(removed),
+            "unchanged": int(len(rows) - is_new.sum() - is_changed.sum()),
+        }
+        return df.assign(scores=rows["score"].to_numpy()), changes
+
+    def _fetch_rows(self, keys, chunk_size=500):
+        """저장된 키들의 novel_id, score를 DataFrame으로 읽습니다. (lock을 잡은 상태에서 호출)"""
+        records = []
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start : start + chunk_size].tolist()
+            records += self._conn.execute(
+                f"SELECT novel_id, score FROM scores WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+        return pd.DataFrame.from_records(records, columns=["novel_id", "score"]).astype({"score": float})
+
+    def _apply_delta(self, rows, sign):
+        """rows의 점수를 전체·소설별 집계에 더하거나(sign=1) 뺍니다(sign=-1). (lock을 잡은 상태에서 호출)"""
+        scored = rows[rows["score"].notna()]
+        if scored.empty:
+            return
+        count = int(self._get_meta("count", 0)) + sign * len(scored)
+        total = float(self._get_meta("sum", 0.0)) + sign * float(scored["score"].sum())
+        self._set_meta({"count": count, "sum": total})
+
+        by_novel = scored[scored["novel_id"].notna()].groupby("novel_id")["score"].agg(["count", "sum"])
+        self._conn.executemany(
+            "INSERT INTO novel_stats (novel_id, count, sum) VALUES (?, ?, ?) "
+            "ON CONFLICT(novel_id) DO UPDATE SET count = count + excluded.count, sum = sum + excluded.sum",
+            [(novel_id, sign * int(c), sign * float(s)) for novel_id, c, s in by_novel.itertuples()],
+        )
+        self._conn.execute("DELETE FROM novel_stats WHERE count <= 0")
+
+    def count(self):
+        with self._lock:
+            return int(self._get_meta("count", 0))
+
+    def average(self):
+        """전체 광고 문구의 평균 점수 (누적 집계에서 바로 계산). 점수가 없으면 NaN"""
+        with self._lock:
+            count = int(self._get_meta("count", 0))
+            return float(self._get_meta("sum", 0.0)) / count if count else float("nan")
+
+    def median(self):
+        """전체 광고 문구의 중간값 점수. 점수가 없으면 NaN"""
+        with self._lock:
+            scores = np.array(
+                [row[0] for row in self._conn.execute("SELECT score FROM scores WHERE score IS NOT NULL")], dtype=float
+            )
+        return float(np.median(scores)) if len(scores) else float("nan")
+
+    def novel_stats(self):
+        """소설별 광고 문구 개수와 평균 점수 DataFrame"""
+        with self._lock:
+            stats = pd.read_sql_query("SELECT novel_id, count, sum FROM novel_stats", self._conn, index_col="novel_id")
+        stats["average"] = stats.pop("sum") / stats["count"]
+        return stats
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def get_average_score(store_path):
+    """점수 저장소에 누적된 평균 점수를 반환합니다. (CSV를 다시 읽지 않음)"""
+    with ScoreStore(store_path) as store:
+        return store.average()
+
 
-    # 점수 계산: (likes) + (comments * 10)
-    df["scores"] = (df["likes"]) + (df["comments"] * 10)
+def calculate_ad_scores(input_csv, output_csv, store_path=None):
+    """
+    광고 문구의 점수를 계산하여 새로운 CSV 파일로 저장하고 평균 점수를 반환하는 함수
+    입력 CSV가 이전 실행과 같으면 다시 읽지 않고, 바뀐 경우에도 달라진 행만 점수 저장소에 반영합니다.
+    :param store_path: 점수 저장소(SQLite) 경로 (기본: output_csv 옆의 .sqlite3 파일)
+    """
+    with ScoreStore(store_path or default_store_path(output_csv)) as store:
+        if store.is_current(input_csv) and os.path.exists(output_csv):
+            average_score = store.average()
+            print(f"⏩ 입력 데이터가 이전과 같아 점수 계산을 건너뜁니다: {input_csv}")
+            print(f"📊 전체 광고 문구의 평균 점수: {average_score}")
+            return average_score
 
-    # 필요한 컬럼만 남기고 새로운 CSV로 저장
-    df[["copy", "scores"]].to_csv(output_csv, index=False, encoding="utf-8")
+        df = pd.read_csv(input_csv, encoding="utf-8")
+        df, changes = store.ingest(df, source=input_csv)
+        if changes["added"] or changes["updated"] or changes["removed"] or not os.path.exists(output_csv):
+            # 필요한 컬럼만 남기고 새로운 CSV로 저장
+            df[["copy", "scores"]].to_csv(output_csv, index=False, encoding="utf-8")
 
-    # 평균 점수 계산
-    average_score = df["scores"].mean()
+        # 평균 점수 계산
+        average_score = store.average()
 
-    print(f"✅ 점수 계산 완료! 저장된 파일: {output_csv}")
+    print(f"✅ 점수 계산 완료! 저장된 파일: {output_csv} (변경: {changes})")
     print(f"📊 전체 광고 문구의 평균 점수: {average_score}")
 
     return average_score  # 평균 점수 반환
 
 
-# 실행 예시
-input_csv = "./generated_ad_copies_with_likes,views,comments.csv"  # 기존 CSV
-output_csv = "ad_copy_scores.csv"  # 점수가 포함된 새로운 CSV
-average_score = calculate_ad_scores(input_csv, output_csv)
+if __name__ == "__main__":
+    # 실행 예시
+    input_csv = "./generated_ad_copies_with_likes,views,comments.csv"  # 기존 CSV
+    output_csv = "ad_copy_scores.csv"  # 점수가 포함된 새로운 CSV
+    average_score = calculate_ad_scores(input_csv, output_csv)
 
-print(f"📢 평균 점수: {average_score}")  # 출력
+    print(f"📢 평균 점수: {average_score}")  # 출력
@@ -1,7 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
+import csv
 import logging
+import os
+import random
+import time
 
 import pandas as pd
 
+from .generate_ads import to_comparison_frame
+
 
 # 로그 설정
 logging.basicConfig(
@@ -14,9 +21,18 @@ logging.basicConfig(
 )
 
 
-def get_feedback_from_model(completion_executor, ad1_text, ad2_text, ad1_scores, ad2_scores):
-    """모델 피드백을 요청하여 광고 문구 비교"""
-    logging.info(f"🔍 모델 피드백 요청: ad1='{ad1_text}', ad2='{ad2_text}'")
+QA_DATASET_CSV = "hyperclovax_ab_feedback_dataset.csv"
+QA_COLUMNS = ["C_ID", "T_ID", "Text", "Completion"]
+FEEDBACK_UNAVAILABLE = "모델 응답을 받을 수 없습니다."
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+PROGRESS_LOG_INTERVAL = 50
+
+
+def _request_feedback(completion_executor, ad1_text, ad2_text, ad1_scores, ad2_scores):
+    """모델 피드백을 한 번 요청합니다. 응답이 없거나 요청 중 오류가 나면 None을 반환합니다."""
 
     preset_text = [
         {
@@ -46,52 +62,163 @@ def get_feedback_from_model(completion_executor, ad1_text, ad2_text, ad1_scores,
         "seed": 0,
     }
 
-    response = completion_executor.execute(request_data)
-
-    if response:
-        logging.info(f"✅ 모델 응답: {response}")
-    else:
-        logging.warning(f"⚠️ 모델 응답 없음: ad1='{ad1_text}', ad2='{ad2_text}'")
-        response = "모델 응답을 받을 수 없습니다."
-
-    return response
-
-
-def generate_qa_data_with_comparison(ads_comparison, completion_executor):
-    """QA 데이터셋 생성"""
-    qa_dataset = []
-    logging.info(f"📌 {len(ads_comparison)}개의 광고 문구 비교 시작...")
-
-    for c_id, comparison in enumerate(ads_comparison):
-        ad1 = comparison["ad1"]
-        ad2 = comparison["ad2"]
-
-        question = (
-            f"다음은 같은 소설에 대한 두 가지 홍보 문구입니다.\n"
-            f"1번: \"{ad1['text']}\" (점수: {ad1['scores']}점)\n"
-            f"2번: \"{ad2['text']}\" (점수: {ad2['scores']}점)\n"
-            f"어떤 문구가 사용자에게 더 효과적인 홍보 효과를 보였을까요?"
+    try:
+        response = completion_executor.execute(request_data)
+    except Exception as e:
+        logging.warning(f"⚠️ 모델 피드백 요청 실패: {e}")
+        return None
+
+    logging.debug(f"✅ 모델 응답: {response}")
+    return response or None
+
+
+def get_feedback_from_model(
+    completion_executor, ad1_text, ad2_text, ad1_scores, ad2_scores, max_retries=DEFAULT_MAX_RETRIES
+):
+    """모델 피드백을 요청하여 광고 문구 비교 (실패하면 지수 백오프 후 최대 max_retries번 재시도)"""
+    logging.debug(f"🔍 모델 피드백 요청: ad1='{ad1_text}', ad2='{ad2_text}'")
+
+    for attempt in range(max_retries + 1):
+        response = _request_feedback(completion_executor, ad1_text, ad2_text, ad1_scores, ad2_scores)
+        if response:
+            return response
+        if attempt < max_retries:
+            time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)))  # 풀 지터 백오프
+
+    logging.warning(f"⚠️ 모델 응답 없음: ad1='{ad1_text}', ad2='{ad2_text}'")
+    return FEEDBACK_UNAVAILABLE
+
+
+def build_question(ad1_text, ad1_scores, ad2_text, ad2_scores):
+    """두 광고 문구의 비교 질문을 만듭니다."""
+    return (
+        f"다음은 같은 소설에 대한 두 가지 홍보 문구입니다.\n"
+        f'1번: "{ad1_text}" (점수: {ad1_scores}점)\n'
+        f'2번: "{ad2_text}" (점수: {ad2_scores}점)\n'
+        f"어떤 문구가 사용자에게 더 효과적인 홍보 효과를 보였을까요?"
+    )
+
+
+def build_answer(ad1_scores, ad2_scores, feedback):
+    """점수가 높은 문구를 정답으로 하고 모델 피드백을 이유로 붙입니다."""
+    if ad2_scores > ad1_scores:
+        return f"2번 문구가 더 효과적이었습니다. 이유: {feedback}"
+    return f"1번 문구가 더 효과적이었습니다. 이유: {feedback}"
+
+
+def partial_paths(output_path):
+    """
+    중단된 실행의 결과 파일 경로 (.partial, .attempt)
+    .partial은 이전 시도들에서 완료된 행을 모아 둔 파일이고, .attempt는 현재 시도가 행을 기록하는 파일입니다.
+    """
+    return f"{output_path}.partial", f"{output_path}.attempt"
+
+
+def load_completed_rows(output_path):
+    """
+    이전 실행에서 저장된 행(중단된 실행의 .partial, .attempt 포함) 중 피드백을 받은 행을 {C_ID: 행}으로 읽습니다.
+    피드백을 받지 못한 행은 포함하지 않아 다음 실행에서 해당 쌍만 다시 요청합니다.
+    """
+    completed = {}
+    for path in (output_path, *partial_paths(output_path)):  # 중단된 실행의 결과가 더 최신이므로 나중에 덮어씀
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path, encoding="utf-8")
+        df = df[~df["Completion"].astype(str).str.endswith(FEEDBACK_UNAVAILABLE)]
+        completed.update((int(row["C_ID"]), row) for row in df[QA_COLUMNS].to_dict("records"))
+    return completed
+
+
+def save_completed_rows(output_path, completed):
+    """
+    불러온 완료 행을 .partial에 원자적으로 저장합니다. 완료 행이 없으면 이전 .partial을 지웁니다.
+    이번 시도가 .attempt를 새로 쓰다가 다시 중단되어도 이전 시도들의 결과는 .partial에 남습니다.
+    """
+    partial_path, _ = partial_paths(output_path)
+    if not completed:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return
+    tmp_path = f"{partial_path}.tmp"
+    rows = [completed[c_id] for c_id in sorted(completed)]
+    pd.DataFrame(rows, columns=QA_COLUMNS).to_csv(tmp_path, index=False, encoding="utf-8")
+    os.replace(tmp_path, partial_path)
+
+
+def generate_qa_data_with_comparison(
+    ads_comparison,
+    completion_executor,
+    output_path=QA_DATASET_CSV,
+    max_workers=DEFAULT_MAX_WORKERS,
+    max_retries=DEFAULT_MAX_RETRIES,
+    resume=True,
+):
+    """
+    QA 데이터셋 생성
+    광고 쌍별 모델 피드백을 최대 max_workers개까지 동시에 요청하고, 완료된 행을 C_ID 순서대로 바로 CSV에 기록합니다.
+    resume=True이면 기존 CSV에서 같은 질문에 대해 피드백을 받은 행은 재사용하고, 실패했던 쌍만 다시 요청합니다.
+    :param ads_comparison: ad1_text, ad1_scores, ad2_text, ad2_scores 컬럼의 비교 쌍 (DataFrame 또는 컬럼별 리스트)
+    :return: C_ID 순서의 QA 행 리스트
+    """
+    comparison = to_comparison_frame(ads_comparison)
+    # 행 단위 접근 대신 컬럼 배열을 한 번만 꺼내 사용
+    ad1_texts = comparison["ad1_text"].tolist()
+    ad1_scores = comparison["ad1_scores"].tolist()
+    ad2_texts = comparison["ad2_text"].tolist()
+    ad2_scores = comparison["ad2_scores"].tolist()
+    total = len(comparison)
+    logging.info(f"📌 {total}개의 광고 문구 비교 시작...")
+
+    questions = [build_question(*ads) for ads in zip(ad1_texts, ad1_scores, ad2_texts, ad2_scores)]
+    completed = load_completed_rows(output_path) if resume else {}
+    partial_path, attempt_path = partial_paths(output_path)
+    save_completed_rows(output_path, completed)
+    reused = {c_id for c_id, row in completed.items() if c_id < total and row["Text"] == questions[c_id]}
+    if reused:
+        logging.info(f"♻️ 이전 실행에서 완료된 {len(reused)}개 비교를 재사용합니다.")
+
+    def build_row(c_id):
+        if c_id in reused:
+            return completed[c_id]
+        feedback = get_feedback_from_model(
+            completion_executor,
+            ad1_texts[c_id],
+            ad2_texts[c_id],
+            ad1_scores[c_id],
+            ad2_scores[c_id],
+            max_retries=max_retries,
         )
-        logging.info(f"📌 {c_id + 1}/{len(ads_comparison)} 비교 질문 생성 완료\n {question}")
-
-        # 모델 피드백 요청
-        feedback = get_feedback_from_model(completion_executor, ad1["text"], ad2["text"], ad1["scores"], ad2["scores"])
-
-        # 피드백을 기반으로 답변 생성
-        if ad2["scores"] > ad1["scores"]:
-            answer = f"2번 문구가 더 효과적이었습니다. 이유: {feedback}"
-        else:
-            answer = f"1번 문구가 더 효과적이었습니다. 이유: {feedback}"
-
-        logging.info(f"✅ {c_id + 1}/{len(ads_comparison)} 비교 완료 - 정답 생성")
-
-        qa_dataset.append({"C_ID": c_id, "T_ID": 0, "Text": question, "Completion": answer})
+        completion = build_answer(ad1_scores[c_id], ad2_scores[c_id], feedback)
+        return {"C_ID": c_id, "T_ID": 0, "Text": questions[c_id], "Completion": completion}
 
+    qa_dataset = []
+    # 이전 시도의 .attempt 내용은 위에서 .partial에 합쳐 두었으므로 이번 시도는 새 파일에 기록
+    with open(attempt_path, "w", newline="", encoding="utf-8") as file, ThreadPoolExecutor(max(1, max_workers)) as pool:
+        writer = csv.DictWriter(file, fieldnames=QA_COLUMNS)
+        writer.writeheader()
+
+        # 동시에 진행 중인 요청을 max_workers의 2배로 제한해 앞선 행부터 순서대로 기록
+        window = max(1, max_workers) * 2
+        futures = {c_id: pool.submit(build_row, c_id) for c_id in range(min(window, total))}
+        for c_id in range(total):
+            row = futures.pop(c_id).result()
+            if c_id + window < total:
+                futures[c_id + window] = pool.submit(build_row, c_id + window)
+
+            writer.writerow(row)
+            file.flush()
+            qa_dataset.append(row)
+            if (c_id + 1) % PROGRESS_LOG_INTERVAL == 0 or c_id + 1 == total:
+                logging.info(f"✅ {c_id + 1}/{total} 비교 완료")
+
+    os.replace(attempt_path, output_path)
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    failed = sum(row["Completion"].endswith(FEEDBACK_UNAVAILABLE) for row in qa_dataset)
+    if failed:
+        logging.warning(f"⚠️ {failed}개 비교는 모델 응답을 받지 못했습니다. 다시 실행하면 해당 쌍만 재요청합니다.")
     logging.info("🎯 QA 데이터셋 생성 완료!")
-
-    # CSV 저장 확인
-    df = pd.DataFrame(qa_dataset)
-    df.to_csv("hyperclovax_ab_feedback_dataset.csv", index=False, encoding="utf-8")
-    logging.info("✅ 데이터셋 CSV 저장 완료: hyperclovax_ab_feedback_dataset.csv")
+    logging.info(f"✅ 데이터셋 CSV 저장 완료: {output_path}")
 
     return qa_dataset
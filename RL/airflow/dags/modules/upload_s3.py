@@ -1,101 +1,321 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
 import hashlib
 import hmac
 import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import quote
+import xml.etree.ElementTree as ET
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
-def upload_file_to_s3(file_path, bucket_name, object_name, access_key, secret_key):
-    """네이버 클라우드 Object Storage에 파일 업로드 (AWS Signature v4 적용)"""
+logger = logging.getLogger(__name__)
 
-    # 로깅 설정
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-    logger = logging.getLogger(__name__)
+# 네이버 클라우드 Object Storage 정보
+NCP_ENDPOINT = "https://kr.object.ncloudstorage.com"
+NCP_REGION = "kr-standard"
+SERVICE = "s3"
 
-    logger.info(f"📤 파일 업로드 시작: {file_path} -> {bucket_name}/{object_name}")
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+SIGNED_HEADERS = "host;x-amz-content-sha256;x-amz-date"
+CONTENT_TYPE = "text/plain"
 
-    # 네이버 클라우드 Object Storage 정보
-    endpoint = "https://kr.object.ncloudstorage.com"
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # 멀티파트 업로드의 파트 크기 (S3 최소 5MB). 이보다 작은 파일은 한 번에 업로드
+DEFAULT_MAX_WORKERS = 4  # 동시에 업로드할 파트 수 (메모리 사용량 ≈ 파트 크기 × 워커 수)
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
 
-    # 날짜 및 서명 생성
-    now = datetime.datetime.utcnow()
-    timestamp = now.strftime("%Y%m%dT%H%M%SZ")
-    datestamp = now.strftime("%Y%m%d")
 
-    # 요청 헤더 생성
-    headers = {
-        "x-amz-date": timestamp,
-        "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
-        "Host": f"{bucket_name}.{endpoint.replace('https://', '')}",
-        "Content-Type": "text/plain",
-    }
+class ObjectStorageError(Exception):
+    """Object Storage 요청이 실패했을 때 발생하는 예외"""
 
-    # 요청 URL (Virtual Host 스타일)
-    url = f"{endpoint}/{bucket_name}/{object_name}"
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
 
-    # 파일 읽기
-    try:
-        with open(file_path, "rb") as file:
-            file_data = file.read()
-        logger.info(f"📂 파일 읽기 성공: {file_path}")
-    except IOError as e:
-        logger.error(f"❌ 파일 읽기 실패: {e}")
-        return False, f"❌ 파일 읽기 실패: {e}"
 
-    # AWS Signature Version 4를 사용한 서명 생성
-    def sign(key, msg):
-        return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+def _sign(key, msg):
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+@functools.lru_cache(maxsize=32)
+def _signing_key(secret_key, date_stamp, region, service):
+    """AWS Signature v4 서명 키. 날짜가 바뀔 때만 다시 만들도록 캐시합니다."""
+    k_date = _sign(("AWS4" + secret_key).encode("utf-8"), date_stamp)
+    k_region = _sign(k_date, region)
+    k_service = _sign(k_region, service)
+    return _sign(k_service, "aws4_request")
+
+
+def _md5_base64(data):
+    return base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+
+
+def _read_part(file_path, offset, length):
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        return file.read(length)
+
+
+def local_etag(file_path, part_size=DEFAULT_PART_SIZE):
+    """
+    파일을 part_size로 나눠 업로드했을 때 Object Storage가 돌려줄 ETag를 계산합니다.
+    한 번에 업로드하면 파일의 MD5, 멀티파트이면 파트별 MD5를 이어 붙인 값의 MD5에 "-파트 수"를 붙인 값입니다.
+    """
+    whole = hashlib.md5()
+    part_digests = []
+    with open(file_path, "rb") as file:
+        for part in iter(lambda: file.read(part_size), b""):
+            whole.update(part)
+            part_digests.append(hashlib.md5(part).digest())
+
+    if len(part_digests) <= 1:
+        return whole.hexdigest()
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def _xml_text(content, tag):
+    """XML 응답에서 (네임스페이스와 무관하게) 처음 나오는 tag의 값을 반환합니다."""
+    return next((element.text for element in ET.fromstring(content).iter() if element.tag.endswith(tag)), None)
+
+
+class ObjectStorageClient:
+    """
+    네이버 클라우드 Object Storage(S3 호환) 업로드 클라이언트.
+    커넥션 풀을 가진 세션을 재사용하고, 큰 파일은 파트 단위로 읽어 병렬 멀티파트 업로드합니다.
+    각 요청은 Content-MD5로 무결성을 검사하며, 실패하면 지수 백오프 후 재시도합니다.
+    """
+
+    def __init__(
+        self,
+        access_key,
+        secret_key,
+        endpoint=NCP_ENDPOINT,
+        region=NCP_REGION,
+        part_size=DEFAULT_PART_SIZE,
+        max_workers=DEFAULT_MAX_WORKERS,
+        max_retries=DEFAULT_MAX_RETRIES,
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.endpoint = endpoint.rstrip("/")
+        self.region = region
+        self.part_size = part_size
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+
+        self._session = requests.Session()  # keep-alive 커넥션 재사용
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
-    def get_signature_key(key, date_stamp, region, service):
-        k_date = sign(("AWS4" + key).encode("utf-8"), date_stamp)
-        k_region = sign(k_date, region)
-        k_service = sign(k_region, service)
-        k_signing = sign(k_service, "aws4_request")
-        return k_signing
+    def _host(self, bucket_name):
+        # 기존 업로드와 같은 위치(버킷 내 "<버킷>/<객체>" 키)에 저장되도록
+        # Host는 Virtual Host 스타일, 경로는 /<버킷>/<객체>를 그대로 사용
+        return f"{bucket_name}.{self.endpoint.split('://', 1)[-1]}"
 
-    region = "kr-standard"
-    service = "s3"
+    def _signed_headers(self, method, bucket_name, path, query):
+        now = datetime.datetime.utcnow()
+        timestamp = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        host = self._host(bucket_name)
 
-    credential_scope = f"{datestamp}/{region}/{service}/aws4_request"
+        canonical_request = (
+            f"{method}\n{path}\n{query}\n"
+            f"host:{host}\n"
+            f"x-amz-content-sha256:{UNSIGNED_PAYLOAD}\n"
+            f"x-amz-date:{timestamp}\n\n"
+            f"{SIGNED_HEADERS}\n{UNSIGNED_PAYLOAD}"
+        )
+        credential_scope = f"{datestamp}/{self.region}/{SERVICE}/aws4_request"
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{timestamp}\n{credential_scope}\n"
+            f"{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
+        )
+        signing_key = _signing_key(self.secret_key, datestamp, self.region, SERVICE)
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
 
-    canonical_request = (
-        f"PUT\n/{bucket_name}/{object_name}\n\n"
-        f"host:{bucket_name}.{endpoint.replace('https://', '')}\n"
-        f"x-amz-content-sha256:UNSIGNED-PAYLOAD\n"
-        f"x-amz-date:{timestamp}\n\n"
-        f"host;x-amz-content-sha256;x-amz-date\nUNSIGNED-PAYLOAD"
-    )
+        return {
+            "x-amz-date": timestamp,
+            "x-amz-content-sha256": UNSIGNED_PAYLOAD,
+            "Host": host,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key}/{credential_scope}, "
+                f"SignedHeaders={SIGNED_HEADERS}, Signature={signature}"
+            ),
+        }
 
-    hashed_canonical_request = hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    def _request(self, method, bucket_name, object_name, params=None, data=None, headers=None, ok=(200,)):
+        """
+        서명한 요청을 보내고, 연결 오류·429·5xx 응답이면 지수 백오프 후 최대 max_retries번 재시도합니다.
+        :param params: 쿼리 파라미터 딕셔너리 (값이 ""이면 ?uploads 처럼 이름만 전달)
+        """
+        path = f"/{bucket_name}/{quote(object_name, safe='/-_.~')}"
+        query = "&".join(
+            f"{quote(str(key), safe='-_.~')}={quote(str(value), safe='-_.~')}"
+            for key, value in sorted((params or {}).items())
+        )
+        url = f"{self.endpoint}{path}" + (f"?{query}" if query else "")
 
-    string_to_sign = f"AWS4-HMAC-SHA256\n{timestamp}\n{credential_scope}\n{hashed_canonical_request}"
+        for attempt in range(self.max_retries + 1):
+            request_headers = {**(headers or {}), **self._signed_headers(method, bucket_name, path, query)}
+            try:
+                response = self._session.request(method, url, data=data, headers=request_headers)
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"⚠️ 요청 실패, 재시도 {attempt + 1}/{self.max_retries}: {method} {path} - {e}")
+            else:
+                if response.status_code in ok:
+                    return response
+                if (response.status_code != 429 and response.status_code < 500) or attempt == self.max_retries:
+                    raise ObjectStorageError(
+                        f"{method} {path} 실패: {response.status_code} - {response.text}", response.status_code
+                    )
+                logger.warning(
+                    f"⚠️ 요청 실패, 재시도 {attempt + 1}/{self.max_retries}: {method} {path} - {response.status_code}"
+                )
+            time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)))  # 풀 지터 백오프
 
-    signing_key = get_signature_key(secret_key, datestamp, region, service)
-    signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    def head_object(self, bucket_name, object_name):
+        """객체의 헤더(ETag, Content-Length 등)를 반환합니다. 객체가 없으면 None"""
+        try:
+            response = self._request("HEAD", bucket_name, object_name, ok=(200, 404))
+        except ObjectStorageError as e:
+            if e.status_code == 403:  # 권한에 따라 없는 객체가 403으로 응답되기도 함
+                return None
+            raise
+        return response.headers if response.status_code == 200 else None
 
-    authorization_header = (
-        f"AWS4-HMAC-SHA256 Credential={access_key}/{credential_scope}, "
-        f"SignedHeaders=host;x-amz-content-sha256;x-amz-date, "
-        f"Signature={signature}"
-    )
+    def _put(self, bucket_name, object_name, data, params=None, headers=None):
+        """데이터를 Content-MD5와 함께 업로드하고, 응답 ETag가 데이터의 MD5와 같은지 확인합니다."""
+        response = self._request(
+            "PUT",
+            bucket_name,
+            object_name,
+            params=params,
+            data=data,
+            headers={**(headers or {}), "Content-MD5": _md5_base64(data)},
+        )
+        etag = response.headers.get("ETag", "").strip('"')
+        if etag and etag != hashlib.md5(data).hexdigest():
+            raise ObjectStorageError(f"업로드한 데이터의 ETag가 일치하지 않습니다: {object_name} ({etag})")
+        return etag
 
-    headers["Authorization"] = authorization_header
+    def _upload_multipart(self, file_path, bucket_name, object_name, size):
+        response = self._request(
+            "POST", bucket_name, object_name, params={"uploads": ""}, headers={"Content-Type": CONTENT_TYPE}
+        )
+        upload_id = _xml_text(response.content, "UploadId")
+        if not upload_id:
+            raise ObjectStorageError(f"멀티파트 업로드를 시작하지 못했습니다: {response.text}")
 
-    logger.info("🔑 인증 헤더 생성 완료")
+        offsets = range(0, size, self.part_size)
+        uploaded = [0]
+        progress_lock = threading.Lock()
 
-    # 파일 업로드 요청
+        def upload_part(part_number, offset):
+            # 파트는 워커가 실행될 때 읽으므로 메모리에는 최대 max_workers개의 파트만 존재
+            data = _read_part(file_path, offset, self.part_size)
+            etag = self._put(bucket_name, object_name, data, params={"partNumber": part_number, "uploadId": upload_id})
+            with progress_lock:
+                uploaded[0] += len(data)
+                logger.info(f"📦 파트 {part_number}/{len(offsets)} 업로드 완료 ({uploaded[0]}/{size} bytes)")
+            return part_number, etag
+
+        try:
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                parts = list(pool.map(upload_part, range(1, len(offsets) + 1), offsets))
+
+            body = "".join(
+                f'<Part><PartNumber>{part_number}</PartNumber><ETag>"{etag}"</ETag></Part>'
+                for part_number, etag in parts
+            )
+            response = self._request(
+                "POST",
+                bucket_name,
+                object_name,
+                params={"uploadId": upload_id},
+                data=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode("utf-8"),
+                headers={"Content-Type": "application/xml"},
+            )
+            # 완료 요청은 200 응답 본문에 오류가 담겨 올 수 있음
+            if b"<Error>" in response.content:
+                raise ObjectStorageError(f"멀티파트 업로드를 완료하지 못했습니다: {response.text}")
+        except Exception:
+            try:
+                self._request("DELETE", bucket_name, object_name, params={"uploadId": upload_id}, ok=(200, 204))
+            except (requests.exceptions.RequestException, ObjectStorageError) as e:
+                logger.warning(f"⚠️ 멀티파트 업로드 취소 실패 (upload_id={upload_id}): {e}")
+            raise
+
+        return (response.headers.get("ETag") or _xml_text(response.content, "ETag") or "").strip('"')
+
+    def upload_file(self, file_path, bucket_name, object_name, skip_unchanged=True):
+        """
+        파일을 업로드합니다. part_size보다 크면 멀티파트로 나눠 병렬 업로드합니다.
+        :param skip_unchanged: True이면 원격 객체의 ETag가 로컬 파일과 같을 때 업로드를 건너뜀
+        :return: (업로드 여부, ETag)
+        """
+        size = os.path.getsize(file_path)
+
+        if skip_unchanged:
+            remote = self.head_object(bucket_name, object_name)
+            # 크기가 같을 때만 로컬 ETag를 계산해 비교
+            if remote and int(remote.get("Content-Length", -1)) == size:
+                if remote.get("ETag", "").strip('"') == local_etag(file_path, self.part_size):
+                    logger.info(f"⏩ 원격 객체가 로컬 파일과 같아 업로드를 건너뜁니다: {bucket_name}/{object_name}")
+                    return False, remote["ETag"].strip('"')
+
+        if size <= self.part_size:
+            data = _read_part(file_path, 0, size)
+            return True, self._put(bucket_name, object_name, data, headers={"Content-Type": CONTENT_TYPE})
+        return True, self._upload_multipart(file_path, bucket_name, object_name, size)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_object_storage_client(access_key, secret_key, endpoint=NCP_ENDPOINT):
+    """같은 인증 정보의 클라이언트(세션·커넥션 풀)를 프로세스에서 재사용합니다."""
+    with _clients_lock:
+        key = (access_key, secret_key, endpoint)
+        if key not in _clients:
+            _clients[key] = ObjectStorageClient(access_key, secret_key, endpoint=endpoint)
+        return _clients[key]
+
+
+def upload_file_to_s3(file_path, bucket_name, object_name, access_key, secret_key):
+    """네이버 클라우드 Object Storage에 파일 업로드 (AWS Signature v4 적용)"""
+
+    # 로깅 설정
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    logger.info(f"📤 파일 업로드 시작: {file_path} -> {bucket_name}/{object_name}")
+
+    client = get_object_storage_client(access_key, secret_key)
     try:
-        response = requests.put(url, data=file_data, headers=headers)
-        logger.info(f"📡 업로드 요청 완료: 상태 코드 {response.status_code}")
-    except requests.exceptions.RequestException as e:
+        uploaded, etag = client.upload_file(file_path, bucket_name, object_name)
+    except requests.exceptions.RequestException as e:  # IOError의 하위 클래스이므로 먼저 처리
         logger.error(f"❌ 업로드 요청 실패: {e}")
         return False, f"❌ 업로드 요청 실패: {e}"
+    except IOError as e:
+        logger.error(f"❌ 파일 읽기 실패: {e}")
+        return False, f"❌ 파일 읽기 실패: {e}"
+    except ObjectStorageError as e:
+        logger.error(f"❌ 업로드 실패: {e}")
+        return False, f"❌ 업로드 실패: {e}"
 
-    # 결과 반환
-    if response.status_code == 200:
-        logger.info("✅ 파일 업로드 성공!")
-        return True, "✅ 파일 업로드 성공!"
-    else:
-        logger.error(f"❌ 업로드 실패: {response.status_code} - {response.text}")
-        return False, f"❌ 업로드 실패: {response.status_code} - {response.text}"
+    if not uploaded:
+        return True, f"✅ 변경 사항이 없어 업로드를 건너뛰었습니다. (ETag: {etag})"
+    logger.info("✅ 파일 업로드 성공!")
+    return True, "✅ 파일 업로드 성공!"
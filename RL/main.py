@@ -7,7 +7,6 @@ from modules import (
     generate_qa_data_with_comparison,
     upload_file_to_s3,
 )
-import pandas as pd
 
 
 # 평가 데이터 생성
@@ -30,13 +29,9 @@ if score <= 9000:
         request_id="YOUR_REQUEST_ID",
     )
 
-    # QA 데이터 생성
+    # QA 데이터 생성 (완료된 행을 hyperclovax_ab_feedback_dataset.csv에 순서대로 기록)
     qa_data = generate_qa_data_with_comparison(ads_comparison, completion_executor)
 
-    # 저장
-    qa_df = pd.DataFrame(qa_data)
-    qa_df.to_csv("hyperclovax_ab_feedback_dataset.csv", index=False, encoding="utf-8")
-
     # S3 업로드
     upload_file_to_s3(
         "./hyperclovax_ab_feedback_dataset.csv",
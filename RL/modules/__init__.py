@@ -1,6 +1,6 @@
 from .completion_executor import CompletionExecutor
-from .generate_ads import generate_ads_comparison
-from .metric import calculate_ad_scores
+from .generate_ads import PAIR_STRATEGIES, build_ads_comparison, generate_ads_comparison
+from .metric import ScoreStore, calculate_ad_scores, default_store_path, get_average_score
 from .qa_generator import generate_qa_data_with_comparison
 from .tuning_api import create_finetuning_task
 from .upload_s3 import upload_file_to_s3
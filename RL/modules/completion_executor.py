@@ -10,6 +10,7 @@ class CompletionExecutor:
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
+        self._session = requests.Session()  # keep-alive 커넥션 재사용
 
     def execute(self, completion_request):
         headers = {
@@ -20,7 +21,7 @@ class CompletionExecutor:
         }
 
         final_content = ""
-        with requests.post(
+        with self._session.post(
             self._host + "/serviceapp/v1/chat-completions/HCX-003",
             headers=headers,
             json=completion_request,
@@ -0,0 +1,169 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from extractors import ElementNotFound, available_backends, get_extractor
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_novel_metadata(html):
+    """기존 MoonpiaCrawler.get_novel_metadata와 같은 방식 (detail-box의 outerHTML을 html.parser로 파싱)"""
+    elements = BeautifulSoup(html, "html.parser").select(".detail-box")
+    if not elements:
+        return None
+    soup = BeautifulSoup(str(elements[0]), "html.parser")
+
+    title = soup.select_one("div.title-wrap a").get_text(strip=True).replace("독점", "")
+    author = soup.select_one("dl.meta-author.meta a.member-trigger strong").get_text(strip=True)
+
+    meta_etc = soup.select("dl.meta-etc.meta")
+    dates = meta_etc[0].find_all("dd")
+    counts = meta_etc[1].find_all("dd")
+
+    return {
+        "title": title,
+        "author": author,
+        "작품등록일": dates[0].get_text(strip=True),
+        "최근연재일": dates[1].get_text(strip=True),
+        "연재수": int(counts[0].get_text().replace(" 회", "")),
+        "조회수": int(counts[1].get_text().replace(",", "")),
+        "추천수": int(counts[2].get_text().replace(",", "")),
+        "글자수": int(counts[3].get_text().replace(",", "")),
+    }
+
+
+def legacy_novel_content(html):
+    """기존 MoonpiaCrawler.get_novel_content와 같은 방식 (ENTRY-CONTENT의 outerHTML을 html.parser로 파싱)"""
+    entry_content = BeautifulSoup(html, "html.parser").find(id="ENTRY-CONTENT")
+    if entry_content is None:
+        return None
+    soup = BeautifulSoup(str(entry_content), "html.parser")
+
+    subinfo = soup.find("div", {"class": "subinfo"})
+    subinfo_text = subinfo.get_text(strip=True) if subinfo else ""
+
+    tcontent = soup.find("div", {"class": "tcontent"})
+    tcontent_text = tcontent.get_text(strip=True) if tcontent else ""
+
+    return {"subinfo": subinfo_text, "tcontent": tcontent_text}
+
+
+def backend_parsers(name):
+    extractor = get_extractor(name, fallback=False)
+
+    def run(extract):
+        def parse(html):
+            try:
+                return extract(html)
+            except ElementNotFound:
+                return None
+
+        return parse
+
+    return {"metadata": run(extractor.extract_metadata), "content": run(extractor.extract_content)}
+
+
+def check_missing_pages(backend, fixtures):
+    """
+    missing_* 페이지는 삭제된 작품 페이지로, 나머지 페이지는 그렇지 않은 것으로 판별하는지 확인합니다.
+    (HTTP 수집에서 삭제된 작품 페이지를 브라우저로 다시 열지 않기 위한 회귀 검사)
+    :return: 판별이 틀린 파일 이름 리스트
+    """
+    extractor = get_extractor(backend, fallback=False)
+    names = {name: html for name, _, html in fixtures}
+    return [name for name, html in names.items() if extractor.is_missing_page(html) != name.startswith("missing_")]
+
+
+LEGACY = {"metadata": legacy_novel_metadata, "content": legacy_novel_content}
+
+
+def load_fixtures(fixtures_dir):
+    """
+    저장해 둔 HTML 파일을 읽습니다. 파일 이름이 detail_*이면 메타데이터, chapter_*이면 본문,
+    그 외(missing_* 등)는 두 파서 모두로 검사합니다.
+    """
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        name = os.path.basename(path)
+        with open(path, "r", encoding="utf-8") as file:
+            html = file.read()
+        if name.startswith("detail_"):
+            kinds = ["metadata"]
+        elif name.startswith("chapter_"):
+            kinds = ["content"]
+        else:
+            kinds = ["metadata", "content"]
+        fixtures.extend((name, kind, html) for kind in kinds)
+    return fixtures
+
+
+def to_bytes(result):
+    return json.dumps(result, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def time_per_page(parse, html, repeat):
+    """repeat번 파싱한 시간의 중앙값 (ms)"""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        parse(html)
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 파싱 백엔드별 페이지당 파싱 시간과 기존 결과와의 일치 여부 비교")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="저장된 HTML 파일 디렉토리")
+    parser.add_argument("-n", "--repeat", type=int, default=50, help="페이지당 반복 횟수")
+    parser.add_argument("--backends", nargs="+", default=None, help="비교할 백엔드 (기본: 설치된 전체)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"HTML 파일이 없습니다: {args.fixtures}")
+        sys.exit(1)
+
+    backends = args.backends or available_backends()
+    totals = {"legacy": {"metadata": 0.0, "content": 0.0}}
+    mismatches = []
+
+    for backend in backends:
+        parsers = backend_parsers(backend)
+        totals[backend] = {"metadata": 0.0, "content": 0.0}
+        mismatches.extend((backend, name, "missing-page") for name in check_missing_pages(backend, fixtures))
+        for name, kind, html in fixtures:
+            expected = to_bytes(LEGACY[kind](html))
+            if to_bytes(parsers[kind](html)) != expected:
+                mismatches.append((backend, name, kind))
+            totals[backend][kind] += time_per_page(parsers[kind], html, args.repeat)
+
+    for _, kind, html in fixtures:
+        totals["legacy"][kind] += time_per_page(LEGACY[kind], html, args.repeat)
+
+    counts = {
+        kind: sum(1 for _, fixture_kind, _ in fixtures if fixture_kind == kind) for kind in ("metadata", "content")
+    }
+    print(f"{'backend':<14}{'metadata ms/page':>18}{'content ms/page':>18}{'speedup':>10}")
+    legacy_total = sum(totals["legacy"].values())
+    for backend, kinds in totals.items():
+        per_page = {kind: kinds[kind] / counts[kind] if counts[kind] else 0.0 for kind in kinds}
+        speedup = legacy_total / sum(kinds.values()) if sum(kinds.values()) else 0.0
+        print(f"{backend:<14}{per_page['metadata']:>18.3f}{per_page['content']:>18.3f}{speedup:>9.1f}x")
+
+    if mismatches:
+        print("\n❌ 기존 결과와 다른 출력 (missing-page: 삭제된 작품 페이지 판별 오류):")
+        for backend, name, kind in mismatches:
+            print(f"  - {backend}: {name} ({kind})")
+        sys.exit(1)
+    print(f"\n✅ {len(backends)}개 백엔드 모두 {len(fixtures)}개 페이지에서 기존 결과와 동일한 출력")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_STATE_PATH = "crawl_state.sqlite3"
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"  # 404 또는 삭제 안내(error-box) 페이지인 (삭제/비공개) 작품
+STATUS_ERROR = "error"
+
+
+def content_hash(content):
+    """회차 정보와 본문을 합친 SHA-256 해시"""
+    return hashlib.sha256(f"{content['subinfo']}\0{content['tcontent']}".encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """
+    소설 id별 수집 상태(상태, 마지막 수집 시각, 최근연재일)와 회차별 본문 해시를 저장하는 SQLite 저장소.
+    여러 워커 스레드에서 공유할 수 있습니다.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS novels ("
+            "id INTEGER PRIMARY KEY, status TEXT NOT NULL, fetched_at REAL NOT NULL, latest_update TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chapters ("
+            "id INTEGER NOT NULL, chapter INTEGER NOT NULL, url TEXT, content_hash TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, PRIMARY KEY (id, chapter))"
+        )
+        self._conn.commit()
+
+    def get(self, novel_id):
+        """저장된 상태를 {"status", "fetched_at", "latest_update"} 딕셔너리로 반환합니다. 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, fetched_at, latest_update FROM novels WHERE id = ?", (novel_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "fetched_at": row[1], "latest_update": row[2]}
+
+    def set_status(self, novel_id, status, latest_update=None):
+        """
+        id의 상태와 수집 시각을 갱신합니다.
+        latest_update(최근연재일)가 None이면 이전 값을 유지해, 일시적인 오류 뒤에도 변경 여부를 비교할 수 있게 합니다.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO novels (id, status, fetched_at, latest_update) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, fetched_at = excluded.fetched_at, "
+                "latest_update = COALESCE(excluded.latest_update, novels.latest_update)",
+                (novel_id, status, time.time(), latest_update),
+            )
+            self._conn.commit()
+
+    def last_chapter(self, novel_id):
+        """마지막으로 저장한 회차의 (회차 번호, 페이지 URL)을 반환합니다. 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chapter, url FROM chapters WHERE id = ? ORDER BY chapter DESC LIMIT 1", (novel_id,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def record_chapter(self, novel_id, chapter, url, content):
+        """
+        회차 본문의 해시를 저장합니다.
+        :return: 새 회차이거나 내용이 바뀌었으면 True, 이전과 같으면 False
+        """
+        digest = content_hash(content)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM chapters WHERE id = ? AND chapter = ?", (novel_id, chapter)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chapters (id, chapter, url, content_hash, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (novel_id, chapter, url, digest, time.time()),
+            )
+            self._conn.commit()
+        return row is None or row[0] != digest
+
+    def summary(self):
+        """상태별 id 개수"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM novels GROUP BY status").fetchall())
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,20 +1,53 @@
-import time
+import threading
 
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
 
+DEFAULT_PAGE_LOAD_TIMEOUT = 30
+DEFAULT_WAIT_TIMEOUT = 3
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """ChromeDriver는 프로세스에서 한 번만 설치하고, 이후에는 같은 경로를 재사용합니다."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
 class Crawler:
-    def __init__(self):
+    def __init__(self, page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT, wait_timeout=DEFAULT_WAIT_TIMEOUT):
         options = webdriver.ChromeOptions()
         options.add_argument("--headless=new")
 
-        self.driver = webdriver.Chrome(options=options, service=Service(ChromeDriverManager().install()))
+        self.wait_timeout = wait_timeout
+        self.driver = webdriver.Chrome(options=options, service=Service(get_driver_path()))
+        self.driver.set_page_load_timeout(page_load_timeout)
 
-    def open_url(self, url):
+    def open_url(self, url, wait_for=None):
+        """
+        페이지를 열고 고정 시간 대기 대신 DOM이 준비될 때까지 기다립니다.
+        :param wait_for: 추가로 나타날 때까지 기다릴 요소의 (By, value) 튜플 (선택)
+        :return: 대기 조건이 wait_timeout 안에 충족되면 True
+        """
         self.driver.get(url)
-        time.sleep(3)
+        try:
+            wait = WebDriverWait(self.driver, self.wait_timeout)
+            wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+            if wait_for is not None:
+                wait.until(EC.presence_of_element_located(wait_for))
+            return True
+        except TimeoutException:
+            return False
 
     def find_element(self, by, value):
         return self.driver.find_element(by, value)
@@ -0,0 +1,256 @@
+import threading
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+
+DEFAULT_BACKEND = "lxml"
+
+# 모든 백엔드가 공유하는 CSS 선택자
+SELECTORS = {
+    "detail_box": ".detail-box",
+    "error_box": ".error-box",
+    "title": "div.title-wrap a",
+    "author": "dl.meta-author.meta a.member-trigger strong",
+    "meta_etc": "dl.meta-etc.meta",
+    "dd": "dd",
+    "entry_content": "#ENTRY-CONTENT",
+    "subinfo": "div.subinfo",
+    "tcontent": "div.tcontent",
+    "next_page": "#MOVEPAGE a.next",
+}
+
+# BeautifulSoup의 get_text()는 이 태그들 안의 문자열(Script, Stylesheet 등)을 본문에서 제외함
+NON_TEXT_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+class ElementNotFound(Exception):
+    """HTML에 파싱할 대상 요소(detail-box, ENTRY-CONTENT)가 없을 때 발생"""
+
+
+class Extractor:
+    """
+    문피아 상세/회차 페이지에서 필요한 값만 뽑아내는 파싱 백엔드의 공통 로직.
+    하위 클래스는 parse, select_one, select, strings만 구현하며, 추출 결과는 백엔드와 무관하게 동일해야 합니다.
+    """
+
+    name = None
+
+    def parse(self, html):
+        raise NotImplementedError
+
+    def select_one(self, node, key):
+        raise NotImplementedError
+
+    def select(self, node, key):
+        raise NotImplementedError
+
+    def strings(self, node):
+        """node 아래의 텍스트 조각을 문서 순서대로 반환합니다 (BeautifulSoup._all_strings와 같은 기준)."""
+        raise NotImplementedError
+
+    def get_text(self, node, strip=False):
+        """BeautifulSoup의 get_text(strip=...)와 같은 결과를 반환합니다."""
+        if strip:
+            return "".join(text.strip() for text in self.strings(node) if text.strip())
+        return "".join(self.strings(node))
+
+    def extract_metadata(self, html):
+        """
+        detail-box 요소가 포함된 HTML(페이지 전체 또는 요소의 outerHTML)에서 작품 메타데이터를 추출합니다.
+        :raises ElementNotFound: detail-box 요소가 없는 경우
+        """
+        detail_box = self.select_one(self.parse(html), "detail_box")
+        if detail_box is None:
+            raise ElementNotFound("detail-box")
+
+        title = self.get_text(self.select_one(detail_box, "title"), strip=True).replace("독점", "")
+        author = self.get_text(self.select_one(detail_box, "author"), strip=True)
+
+        meta_etc = self.select(detail_box, "meta_etc")
+        dates = self.select(meta_etc[0], "dd")
+        counts = self.select(meta_etc[1], "dd")
+
+        return {
+            "title": title,
+            "author": author,
+            "작품등록일": self.get_text(dates[0], strip=True),
+            "최근연재일": self.get_text(dates[1], strip=True),
+            "연재수": int(self.get_text(counts[0]).replace(" 회", "")),
+            "조회수": int(self.get_text(counts[1]).replace(",", "")),
+            "추천수": int(self.get_text(counts[2]).replace(",", "")),
+            "글자수": int(self.get_text(counts[3]).replace(",", "")),
+        }
+
+    def extract_content(self, html):
+        """
+        ENTRY-CONTENT 요소가 포함된 HTML에서 회차 정보(subinfo)와 본문(tcontent)을 추출합니다.
+        :raises ElementNotFound: ENTRY-CONTENT 요소가 없는 경우
+        """
+        entry_content = self.select_one(self.parse(html), "entry_content")
+        if entry_content is None:
+            raise ElementNotFound("ENTRY-CONTENT")
+
+        subinfo = self.select_one(entry_content, "subinfo")
+        tcontent = self.select_one(entry_content, "tcontent")
+        return {
+            "subinfo": self.get_text(subinfo, strip=True) if subinfo is not None else "",
+            "tcontent": self.get_text(tcontent, strip=True) if tcontent is not None else "",
+        }
+
+    def is_missing_page(self, html):
+        """존재하지 않거나 삭제된 작품 페이지(detail-box 없이 error-box만 있는 페이지)인지 확인합니다."""
+        root = self.parse(html)
+        return self.select_one(root, "detail_box") is None and self.select_one(root, "error_box") is not None
+
+    def extract_next_href(self, html):
+        """다음 화 링크(#MOVEPAGE a.next)의 href를 반환합니다. 없으면 None"""
+        next_button = self.select_one(self.parse(html), "next_page")
+        if next_button is None:
+            return None
+        return self.get_attribute(next_button, "href") or None
+
+    def get_attribute(self, node, name):
+        return node.get(name)
+
+
+class SoupExtractor(Extractor):
+    """BeautifulSoup 백엔드 (parser: "html.parser" 또는 "lxml"), 선택자는 soupsieve로 미리 컴파일"""
+
+    def __init__(self, parser="html.parser"):
+        if parser == "lxml":
+            import lxml  # noqa: F401  (설치 여부 확인)
+
+        self.name = parser
+        self.parser = parser
+        self._selectors = {key: soupsieve.compile(selector) for key, selector in SELECTORS.items()}
+
+    def parse(self, html):
+        return BeautifulSoup(html, self.parser)
+
+    def select_one(self, node, key):
+        return self._selectors[key].select_one(node)
+
+    def select(self, node, key):
+        return self._selectors[key].select(node)
+
+    def strings(self, node):
+        return node.strings
+
+    def get_text(self, node, strip=False):
+        return node.get_text(strip=strip)
+
+
+class LxmlExtractor(Extractor):
+    """lxml.html 백엔드, 선택자는 cssselect로 XPath에 미리 컴파일"""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import html as lxml_html
+        from lxml.cssselect import CSSSelector
+
+        self._lxml_html = lxml_html
+        self._selectors = {key: CSSSelector(selector) for key, selector in SELECTORS.items()}
+
+    def parse(self, html):
+        # 빈 문서는 lxml이 파싱 오류를 내므로 빈 html 문서로 대체
+        return self._lxml_html.document_fromstring(html if html.strip() else "<html></html>")
+
+    def select_one(self, node, key):
+        matches = self._selectors[key](node)
+        return matches[0] if matches else None
+
+    def select(self, node, key):
+        return self._selectors[key](node)
+
+    def strings(self, node):
+        if node.text:
+            yield node.text
+        for child in node:
+            # 주석/처리 명령의 tag는 문자열이 아니며, 내용은 제외하고 뒤따르는 tail 텍스트만 포함
+            if isinstance(child.tag, str) and child.tag not in NON_TEXT_CONTAINERS:
+                yield from self.strings(child)
+            if child.tail:
+                yield child.tail
+
+
+class SelectolaxExtractor(Extractor):
+    """selectolax(lexbor) 백엔드"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_cls = LexborHTMLParser
+
+    def parse(self, html):
+        return self._parser_cls(html)
+
+    def select_one(self, node, key):
+        return node.css_first(SELECTORS[key])
+
+    def select(self, node, key):
+        return node.css(SELECTORS[key])
+
+    def strings(self, node):
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                yield child.text_content
+            elif not child.tag.startswith("-") and child.tag not in NON_TEXT_CONTAINERS:
+                yield from self.strings(child)
+
+    def get_attribute(self, node, name):
+        return node.attributes.get(name)
+
+
+BACKENDS = {
+    "html.parser": lambda: SoupExtractor("html.parser"),
+    "bs4-lxml": lambda: SoupExtractor("lxml"),
+    "lxml": LxmlExtractor,
+    "selectolax": SelectolaxExtractor,
+}
+
+_local = threading.local()
+_default_backend = DEFAULT_BACKEND
+
+
+def available_backends():
+    """현재 환경에 라이브러리가 설치되어 있는 백엔드 이름 목록"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_extractor(name, fallback=False)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_default_backend(name):
+    global _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 파싱 백엔드입니다: {name}")
+    _default_backend = name
+
+
+def get_extractor(name=None, fallback=True):
+    """
+    이름에 해당하는 파싱 백엔드를 반환합니다.
+    컴파일된 선택자를 스레드 간에 공유하지 않도록 스레드마다 백엔드별로 하나씩 생성합니다.
+    fallback=True이면 라이브러리가 설치되어 있지 않은 경우 html.parser 백엔드를 대신 사용합니다.
+    """
+    name = name or _default_backend
+    if not hasattr(_local, "extractors"):
+        _local.extractors = {}
+    _extractors = _local.extractors
+    if name not in _extractors:
+        try:
+            _extractors[name] = BACKENDS[name]()
+        except ImportError:
+            if not fallback:
+                raise
+            print(f"{name} 파싱 백엔드를 사용할 수 없어 html.parser로 대체합니다.")
+            return get_extractor("html.parser")
+    return _extractors[name]
@@ -0,0 +1,35 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 10
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+class HttpCrawler:
+    """브라우저 없이 keep-alive 세션으로 정적 HTML을 가져오는 크롤러 (쿠키와 커넥션을 요청 간에 재사용)"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def open_url(self, url):
+        """
+        페이지를 요청합니다. 리다이렉트는 따라갑니다.
+        :return: (최종 URL, 상태 코드, HTML 문자열)
+        """
+        r = self.session.get(url, timeout=self.timeout)
+        # charset이 없는 text/html 응답은 requests가 ISO-8859-1로 가정하므로 본문에서 인코딩을 추정
+        if r.encoding is None or r.encoding.lower() == "iso-8859-1":
+            r.encoding = r.apparent_encoding
+        return r.url, r.status_code, r.text
+
+    def close(self):
+        self.session.close()
@@ -1,59 +1,84 @@
+import argparse
+import csv
 import os
-import time
+import queue
+import sys
+import threading
+from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
+from crawl_state import DEFAULT_STATE_PATH, STATUS_ERROR, STATUS_MISSING, STATUS_OK, CrawlState
 from crawler import Crawler
-import pandas as pd
+from extractors import BACKENDS, DEFAULT_BACKEND, ElementNotFound, get_extractor, set_default_backend
+from http_crawler import HttpCrawler
+from requests import HTTPError
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules_common.result_sink import ResultSink
+
+
+DEFAULT_NUM_WORKERS = 4
+MAX_CHAPTERS = 3  # 소설마다 수집할 회차 수
+DETAIL_BOX = (By.CLASS_NAME, "detail-box")
+ENTRY_CONTENT = (By.ID, "ENTRY-CONTENT")
+
+
+def parse_novel_metadata(html):
+    """
+    detail-box 요소가 포함된 HTML(페이지 전체 또는 요소의 outerHTML)에서 작품 메타데이터를 추출합니다.
+    :raises ElementNotFound: detail-box 요소가 없는 경우
+    """
+    return get_extractor().extract_metadata(html)
+
+
+def parse_novel_content(html):
+    """
+    ENTRY-CONTENT 요소가 포함된 HTML에서 회차 정보(subinfo)와 본문(tcontent)을 추출합니다.
+    :raises ElementNotFound: ENTRY-CONTENT 요소가 없는 경우
+    """
+    return get_extractor().extract_content(html)
+
+
+def is_missing_novel_page(html):
+    """문피아의 "존재하지 않거나 삭제된 작품입니다" 페이지(error-box만 있고 detail-box가 없음)인지 확인합니다."""
+    return get_extractor().is_missing_page(html)
+
+
+def find_next_page_url(html, base_url):
+    """다음 화 링크(#MOVEPAGE a.next)의 절대 URL을 반환합니다. 없으면 None"""
+    href = get_extractor().extract_next_href(html)
+    return urljoin(base_url, href) if href else None
+
+
 class MoonpiaCrawler(Crawler):
     def __init__(self, id=454596):
         super().__init__()
+        self.set_novel_id(id)
+
+    def set_novel_id(self, id):
+        """같은 브라우저를 재사용해 다른 소설을 수집할 수 있도록 대상 id를 바꿉니다."""
         self.url = f"https://novel.munpia.com/{id}"
 
     def get_novel_metadata(self):
-        try:
-            # detail-box 요소 찾기
-            element = self.find_elements(By.CLASS_NAME, "detail-box")[0]
-            html_content = element.get_attribute("outerHTML")
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            title = soup.select_one("div.title-wrap a").get_text(strip=True).replace("독점", "")
-            author = soup.select_one("dl.meta-author.meta a.member-trigger strong").get_text(strip=True)
-
-            meta_etc = soup.select("dl.meta-etc.meta")
-            dates = meta_etc[0].find_all("dd")
-            counts = meta_etc[1].find_all("dd")
-
-            return {
-                "title": title,
-                "author": author,
-                "작품등록일": dates[0].get_text(strip=True),
-                "최근연재일": dates[1].get_text(strip=True),
-                "연재수": int(counts[0].get_text().replace(" 회", "")),
-                "조회수": int(counts[1].get_text().replace(",", "")),
-                "추천수": int(counts[2].get_text().replace(",", "")),
-                "글자수": int(counts[3].get_text().replace(",", "")),
-            }
-        except Exception as e:
-            print(f"메타데이터 추출 중 오류 발생: {e}")
-            return None
+        """
+        현재 페이지의 detail-box에서 메타데이터를 추출합니다.
+        :return: 메타데이터 딕셔너리, 존재하지 않거나 삭제된 작품 안내 페이지이면 None
+        :raises ElementNotFound: 안내 페이지가 아닌데 detail-box가 없는 경우 (로딩 실패 등)
+        """
+        elements = self.find_elements(By.CLASS_NAME, "detail-box")
+        if not elements:
+            if is_missing_novel_page(self.driver.page_source):
+                return None
+            raise ElementNotFound("detail-box")
+        return parse_novel_metadata(elements[0].get_attribute("outerHTML"))
 
     def get_novel_content(self):
         try:
-            # ENTRY-CONTENT 요소 찾기
             entry_content = self.find_element(By.ID, "ENTRY-CONTENT")
-            html_content = entry_content.get_attribute("outerHTML")
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            subinfo = soup.find("div", {"class": "subinfo"})
-            subinfo_text = subinfo.get_text(strip=True) if subinfo else ""
-
-            tcontent = soup.find("div", {"class": "tcontent"})
-            tcontent_text = tcontent.get_text(strip=True) if tcontent else ""
-
-            return {"subinfo": subinfo_text, "tcontent": tcontent_text}
+            return parse_novel_content(entry_content.get_attribute("outerHTML"))
         except Exception as e:
             print(f"본문 추출 중 오류 발생: {e}")
             return None
@@ -62,94 +87,343 @@ class MoonpiaCrawler(Crawler):
         try:
             next_button = self.find_element(By.CSS_SELECTOR, "#MOVEPAGE a.next")
             next_url = next_button.get_attribute("href")
-            self.open_url(next_url)
+            self.open_url(next_url, wait_for=ENTRY_CONTENT)
             return True
         except Exception as e:
             print(f"다음 페이지 이동 중 오류 발생: {e}")
             return False
 
-    def crawl(self):
-        try:
-            results = []
-            # 메인 페이지 열기
-            self.open_url(self.url)
-            novel_info = self.get_novel_metadata()
-            results.append(novel_info)
-
+    def crawl_metadata(self, novel_id=None):
+        """상세 페이지를 열어 메타데이터를 수집합니다. 존재하지 않는 소설이면 None"""
+        if novel_id is not None:
+            self.set_novel_id(novel_id)
+
+        # 메인 페이지 열기
+        self.open_url(self.url, wait_for=DETAIL_BOX)
+        return self.get_novel_metadata()
+
+    def crawl_contents(self, novel_id=None, resume_from=None):
+        """
+        MAX_CHAPTERS화까지 본문을 수집합니다.
+        :param resume_from: 이미 저장한 마지막 회차의 (회차 번호, 페이지 URL). 주어지면 그 다음 화부터 수집
+        :return: {"chapter", "url", "subinfo", "tcontent"} 딕셔너리 리스트
+        """
+        if novel_id is not None:
+            self.set_novel_id(novel_id)
+
+        if resume_from is None:
             # 첫 화 페이지로 이동
-            entry_url = f"{self.url}/nvAct/entryFirstView"
-            self.open_url(entry_url)
-
-            # 3페이지까지 내용 수집
-            contents = []
-            for i in range(3):
-                time.sleep(0.1)
-                content = self.get_novel_content()
-                if content:
-                    contents.append(content)
-
-                # 마지막 페이지가 아니면 다음 페이지로 이동
-                if i < 2 and not self.move_to_next_page():
-                    break
+            chapter = 1
+            self.open_url(f"{self.url}/nvAct/entryFirstView", wait_for=ENTRY_CONTENT)
+        else:
+            last_chapter, last_url = resume_from
+            if last_chapter >= MAX_CHAPTERS:
+                return []
+            self.open_url(last_url, wait_for=ENTRY_CONTENT)
+            if not self.move_to_next_page():
+                return []
+            chapter = last_chapter + 1
+
+        contents = []
+        while True:
+            content = self.get_novel_content()
+            if content:
+                contents.append({"chapter": chapter, "url": self.driver.current_url, **content})
+
+            # 마지막 페이지가 아니면 다음 페이지로 이동
+            if chapter >= MAX_CHAPTERS or not self.move_to_next_page():
+                break
+            chapter += 1
+        return contents
+
+    def crawl(self, novel_id=None):
+        """
+        소설 메타데이터와 1~3화 본문을 수집합니다. 브라우저는 닫지 않으므로 여러 id에 재사용할 수 있습니다.
+        :return: [메타데이터, 본문 리스트], 존재하지 않는 소설이면 [None, []]
+        """
+        novel_info = self.crawl_metadata(novel_id)
+        # 메타데이터가 없는 id(삭제/비공개 작품)는 본문 페이지를 열지 않음
+        if novel_info is None:
+            return [None, []]
+        return [novel_info, self.crawl_contents()]
+
+
+class MoonpiaHttpCrawler(HttpCrawler):
+    """
+    상세 페이지와 회차 페이지를 브라우저 없이 HTTP로 가져와 같은 파서로 처리합니다.
+    정적 HTML에 detail-box나 ENTRY-CONTENT가 없으면 해당 단계만 브라우저(MoonpiaCrawler)로 다시 수집합니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._browser = None
+
+    def _get_browser(self, novel_id, reason):
+        print(f"ID {novel_id}: 정적 HTML에 {reason} 요소가 없어 브라우저로 수집합니다.")
+        if self._browser is None:
+            self._browser = MoonpiaCrawler()
+        return self._browser
+
+    def crawl_metadata(self, novel_id):
+        """
+        상세 페이지를 HTTP로 가져와 메타데이터를 수집합니다.
+        :return: 메타데이터 딕셔너리, 존재하지 않는 소설(404 또는 삭제 안내 페이지)이면 None
+        :raises HTTPError: 404가 아닌 오류 응답인 경우
+        """
+        url = f"https://novel.munpia.com/{novel_id}"
+        _, status_code, html = self.open_url(url)
+        if status_code == 404:
+            return None
+        if status_code >= 400:
+            # 일시적인 서버 오류는 없는 작품으로 기록하지 않고 예외로 올려 다음 실행에서 다시 수집되도록 함
+            raise HTTPError(f"{status_code} Error for url: {url}")
 
-            results.append(contents)
-            return results
-        finally:
-            self.close()
+        try:
+            return parse_novel_metadata(html)
+        except ElementNotFound as e:
+            # 삭제/비공개 작품 안내 페이지는 정상 응답(200)으로 오므로 브라우저로 다시 열지 않음
+            if is_missing_novel_page(html):
+                return None
+            return self._get_browser(novel_id, e).crawl_metadata(novel_id)
+
+    def crawl_contents(self, novel_id, resume_from=None):
+        """
+        MAX_CHAPTERS화까지 본문을 HTTP로 수집합니다.
+        :param resume_from: 이미 저장한 마지막 회차의 (회차 번호, 페이지 URL). 주어지면 그 다음 화부터 수집
+        :return: {"chapter", "url", "subinfo", "tcontent"} 딕셔너리 리스트
+        """
+        if resume_from is None:
+            # 첫 화 페이지로 이동
+            chapter = 1
+            page_url, _, html = self.open_url(f"https://novel.munpia.com/{novel_id}/nvAct/entryFirstView")
+        else:
+            last_chapter, last_url = resume_from
+            if last_chapter >= MAX_CHAPTERS:
+                return []
+            _, _, html = self.open_url(last_url)
+            next_url = find_next_page_url(html, last_url)
+            if next_url is None:
+                return []
+            chapter = last_chapter + 1
+            page_url, _, html = self.open_url(next_url)
+
+        contents = []
+        while True:
+            try:
+                contents.append({"chapter": chapter, "url": page_url, **parse_novel_content(html)})
+            except ElementNotFound as e:
+                return self._get_browser(novel_id, e).crawl_contents(novel_id, resume_from)
+            except Exception as e:
+                print(f"본문 추출 중 오류 발생: {e}")
+
+            # 마지막 페이지가 아니면 다음 페이지로 이동
+            if chapter >= MAX_CHAPTERS:
+                break
+            next_url = find_next_page_url(html, page_url)
+            if next_url is None:
+                print("다음 페이지 이동 중 오류 발생: 다음 화 링크가 없습니다.")
+                break
+            chapter += 1
+            page_url, _, html = self.open_url(next_url)
+        return contents
+
+    def crawl(self, novel_id):
+        """
+        소설 메타데이터와 1~3화 본문을 수집합니다.
+        :return: [메타데이터, 본문 리스트], 존재하지 않는 소설이면 [None, []]
+        """
+        novel_info = self.crawl_metadata(novel_id)
+        if novel_info is None:
+            return [None, []]
+        return [novel_info, self.crawl_contents(novel_id)]
+
+    def close(self):
+        super().close()
+        if self._browser is not None:
+            self._browser.close()
+
+
+CRAWLERS = {"http": MoonpiaHttpCrawler, "browser": MoonpiaCrawler}
+
+
+def crawl_novel(crawler, novel_id, metadata_sink, content_sink, state, incremental=False):
+    """
+    소설 하나를 수집해 저장하고 수집 상태를 갱신합니다.
+    incremental=True이면 존재하지 않는 것으로 확인된 id는 건너뛰고, 최근연재일이 바뀐 소설만
+    마지막으로 저장한 회차 다음부터 수집하며, 내용이 바뀐 회차만 기록합니다.
+    다시 수집된 소설의 메타데이터와 회차는 새 행으로 추가되므로, 수집이 끝나면 compact_csv로 마지막 행만 남깁니다.
+    """
+    known = state.get(novel_id)
+    if incremental and known is not None and known["status"] == STATUS_MISSING:
+        return
+
+    metadata = crawler.crawl_metadata(novel_id)
+    if metadata is None:
+        state.set_status(novel_id, STATUS_MISSING)
+        return
+
+    resume_from = None
+    if incremental and known is not None and known["latest_update"] is not None:
+        if known["latest_update"] == metadata["최근연재일"]:
+            # 최근연재일이 같으면 변경 없음: 본문 페이지를 열지 않음
+            state.set_status(novel_id, STATUS_OK)
+            return
+        resume_from = state.last_chapter(novel_id)
+
+    contents = crawler.crawl_contents(novel_id, resume_from)
+
+    # 메타데이터 처리
+    metadata["id"] = novel_id
+    metadata_sink.write(metadata)
+
+    # 컨텐츠 데이터 처리 (incremental 모드에서는 새 회차 또는 내용이 바뀐 회차만 기록)
+    rows = []
+    for content in contents:
+        changed = state.record_chapter(novel_id, content["chapter"], content["url"], content)
+        if changed or not incremental:
+            rows.append(
+                {
+                    "id": novel_id,
+                    "chapter": content["chapter"],
+                    "subinfo": content["subinfo"],
+                    "tcontent": content["tcontent"],
+                }
+            )
+    if rows:
+        content_sink.write_many(rows)
+
+    # 본문까지 저장한 뒤에 최근연재일을 갱신해, 중간에 실패하면 다음 실행에서 다시 수집되도록 함
+    state.set_status(novel_id, STATUS_OK, latest_update=metadata["최근연재일"])
+
+
+def crawl_worker(id_queue, metadata_sink, content_sink, state, crawler_cls=MoonpiaHttpCrawler, incremental=False):
+    """
+    크롤러 하나(세션 또는 브라우저)를 띄워 두고 큐에서 id를 꺼내 차례로 수집합니다.
+    드라이버가 비정상 종료되면 새 크롤러로 교체한 뒤 다음 id부터 이어갑니다.
+    """
+    crawler = crawler_cls()
+    try:
+        while True:
+            try:
+                novel_id = id_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                crawl_novel(crawler, novel_id, metadata_sink, content_sink, state, incremental=incremental)
+            except WebDriverException as e:
+                print(f"ID {novel_id} 처리 중 브라우저 오류 발생, 브라우저를 재시작합니다: {e}")
+                state.set_status(novel_id, STATUS_ERROR)
+                try:
+                    crawler.close()
+                except WebDriverException:
+                    pass
+                crawler = crawler_cls()
+            except Exception as e:
+                print(f"ID {novel_id} 처리 중 오류 발생: {e}")
+                state.set_status(novel_id, STATUS_ERROR)
+    finally:
+        crawler.close()
+
+
+def crawl_ids(
+    ids, metadata_sink, content_sink, state, num_workers=DEFAULT_NUM_WORKERS, fetcher="http", incremental=False
+):
+    """
+    num_workers개의 워커가 공유 큐에서 id를 가져가며 병렬로 수집합니다.
+    fetcher가 "http"이면 정적 HTML을 우선 사용하고, "browser"이면 모든 페이지를 브라우저로 렌더링합니다.
+    저장 순서는 id 순서와 다를 수 있습니다.
+    """
+    id_queue = queue.Queue()
+    for novel_id in ids:
+        id_queue.put(novel_id)
+
+    workers = [
+        threading.Thread(
+            target=crawl_worker,
+            args=(id_queue, metadata_sink, content_sink, state, CRAWLERS[fetcher], incremental),
+            daemon=True,
+        )
+        for _ in range(max(1, min(num_workers, id_queue.qsize())))
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def compact_csv(path, key_fields, encoding="utf-8-sig"):
+    """
+    append-only로 쌓인 CSV에서 같은 키(key_fields)의 행은 마지막 행만 남깁니다.
+    incremental 수집은 최근연재일이 바뀐 소설의 메타데이터와 내용이 바뀐 회차를 다시 추가하므로 수집 후 정리합니다.
+    :return: 지운 행 수
+    """
+    if not os.path.exists(path):
+        return 0
+
+    # 첫 번째 읽기에서 키별 마지막 행 번호만 기억하고, 두 번째 읽기에서 그 행만 기록
+    with open(path, "r", encoding=encoding, newline="") as file:
+        last_rows = {tuple(row[field] for field in key_fields): i for i, row in enumerate(csv.DictReader(file))}
+
+    tmp_path = f"{path}.tmp"
+    removed = 0
+    with open(path, "r", encoding=encoding, newline="") as src, open(
+        tmp_path, "w", encoding=encoding, newline=""
+    ) as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for i, row in enumerate(reader):
+            if last_rows[tuple(row[field] for field in key_fields)] == i:
+                writer.writerow(row)
+            else:
+                removed += 1
+    os.replace(tmp_path, path)
+    return removed
 
 
 if __name__ == "__main__":
-    crawler = MoonpiaCrawler()
-    metadata_file = "novel_metadata.csv"
-    content_file = "novel_content.csv"
-
+    parser = argparse.ArgumentParser(description="문피아 소설 메타데이터/본문 수집")
     # 400000 ~ 402227
-    ids = range(450000, 455500)
-    for novel_id in ids:
-        try:
-            time.sleep(0.1)
-            crawler = MoonpiaCrawler(id=novel_id)
-            data = crawler.crawl()
-
-            if not data or len(data) != 2:
-                continue
-
-            # 메타데이터 처리
-            metadata = data[0]
-            if metadata:
-                metadata["id"] = novel_id
-                metadata_df = pd.DataFrame([metadata])
-
-                if os.path.exists(metadata_file):
-                    existing_metadata = pd.read_csv(metadata_file)
-                    metadata_df = pd.concat([existing_metadata, metadata_df], ignore_index=True)
-
-                metadata_df.to_csv(metadata_file, index=False, encoding="utf-8-sig")
-
-            # 컨텐츠 데이터 처리
-            contents = data[1]
-            if contents:
-                content_rows = []
-                for idx, content in enumerate(contents, 1):
-                    content_row = {
-                        "id": novel_id,
-                        "chapter": idx,
-                        "subinfo": content["subinfo"],
-                        "tcontent": content["tcontent"],
-                    }
-                    content_rows.append(content_row)
-
-                content_df = pd.DataFrame(content_rows)
-
-                if os.path.exists(content_file):
-                    existing_content = pd.read_csv(content_file)
-                    content_df = pd.concat([existing_content, content_df], ignore_index=True)
-
-                content_df.to_csv(content_file, index=False, encoding="utf-8-sig")
+    parser.add_argument("--start", type=int, default=450000, help="수집 시작 id")
+    parser.add_argument("--end", type=int, default=455500, help="수집 종료 id (미포함)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_NUM_WORKERS, help="동시에 실행할 워커 수")
+    parser.add_argument("--fetcher", choices=list(CRAWLERS), default="http", help="페이지 수집 방식")
+    parser.add_argument("--parser", choices=list(BACKENDS), default=DEFAULT_BACKEND, help="HTML 파싱 백엔드")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="수집 상태 저장소(SQLite) 경로")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="없는 id는 건너뛰고, 최근연재일이 바뀐 소설의 새 회차만 수집",
+    )
+    args = parser.parse_args()
+    set_default_backend(args.parser)
 
-        except Exception as e:
-            print(f"ID {novel_id} 처리 중 오류 발생: {e}")
-            continue
+    metadata_file = "novel_metadata.csv"
+    content_file = "novel_content.csv"
+    metadata_fields = ["title", "author", "작품등록일", "최근연재일", "연재수", "조회수", "추천수", "글자수", "id"]
+    content_fields = ["id", "chapter", "subinfo", "tcontent"]
+
+    ids = range(args.start, args.end)
+    with ResultSink(metadata_file, fieldnames=metadata_fields, encoding="utf-8-sig") as metadata_sink, ResultSink(
+        content_file, fieldnames=content_fields, encoding="utf-8-sig"
+    ) as content_sink, CrawlState(args.state) as state:
+        crawl_ids(
+            ids,
+            metadata_sink,
+            content_sink,
+            state,
+            num_workers=args.workers,
+            fetcher=args.fetcher,
+            incremental=args.incremental,
+        )
+        print(f"수집 상태: {state.summary()}")
+
+    # 다시 수집된 소설/회차의 이전 행을 지워 id(메타데이터), (id, 회차)(본문)마다 최신 행 하나만 남김
+    for path, key_fields in ((metadata_file, ["id"]), (content_file, ["id", "chapter"])):
+        removed = compact_csv(path, key_fields)
+        if removed:
+            print(f"{path}: 다시 수집되어 이전 행 {removed}개를 정리했습니다.")
 
 
 """
@@ -1,4 +1,6 @@
-import json
+import os
+import re
+import sys
 import time
 
 from loguru import logger
@@ -6,6 +8,12 @@ import requests
 import yaml
 
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules_common.rate_limiter import get_rate_limiter, retry_delay
+from modules_common.sse_parser import parse_sse_stream
+
+
 def load_config(file_path):
     with open(file_path, "r") as file:
         config = yaml.safe_load(file)
@@ -15,6 +23,10 @@ def load_config(file_path):
 config_api = load_config("../config/config_api.yaml")
 config_eval_input_text = load_config("../config/config_eval_input_text.yaml")
 
+# "5. 종합 평가: 8점", "종합 평가 - 8/10" 등에서 점수 추출
+OVERALL_SCORE_PATTERN = re.compile(r"종합\s*평가[^0-9\n]{0,20}(\d+(?:\.\d+)?)")
+ITEM_SCORE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:점|/\s*10)")
+
 API_KEY = config_api["API"]["API_KEY"]
 REQUEST_ID = config_api["API"]["REQUEST_ID"]
 COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
@@ -25,6 +37,7 @@ class CompletionExecutor:
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
+        self._rate_limiter = get_rate_limiter(api_key, "HCX-003")
 
     def execute(self, completion_request):
         headers = {
@@ -34,34 +47,27 @@ class CompletionExecutor:
             "Accept": "text/event-stream",
         }
 
-        with requests.post(
-            self._host + "/serviceapp/v1/chat-completions/HCX-003",
-            headers=headers,
-            json=completion_request,
-            stream=True,
-        ) as r:
-            if r.status_code != 200:
-                logger.warning(f"API 요청 실패: 상태 코드 {r.status_code}")
-                return None, r.status_code
-                # return None
-
-            lines = [line.decode("utf-8") for line in r.iter_lines() if line]
-            for line in lines[-4:]:
-                try:
-                    # "data:"로 시작하는 부분 제거
-                    if line.startswith("data:"):
-                        line = line[len("data:") :]
-
-                    # JSON 파싱
-                    data = json.loads(line)
-
-                    # JSON에서 "content" 추출
-                    content = data.get("message", {}).get("content", None)
-                    if content:
-                        return content, r.status_code
-
-                except json.JSONDecodeError:  # JSON 문자열이 아닌 요소들은 무시
-                    continue
+        started_at = self._rate_limiter.acquire()
+        status_code = None
+        try:
+            with requests.post(
+                self._host + "/serviceapp/v1/chat-completions/HCX-003",
+                headers=headers,
+                json=completion_request,
+                stream=True,
+            ) as r:
+                status_code = r.status_code
+                if r.status_code != 200:
+                    logger.warning(f"API 요청 실패: 상태 코드 {r.status_code}")
+                    return None, r.status_code
+                    # return None
+
+                # result 이벤트만 파싱하고 받는 즉시 스트림 종료
+                content = parse_sse_stream(r.iter_lines())
+                if content:
+                    return content, r.status_code
+        finally:
+            self._rate_limiter.release(started_at, throttled=status_code == 429)
 
         return None, 200
 
@@ -72,6 +78,10 @@ completion_executor = CompletionExecutor(
 
 
 def Eval_Input_Text(tcontent, input_text):
+    """
+    생성된 Input_text가 소설 텍스트를 얼마나 잘 반영하는지 LLM으로 평가합니다.
+    :return: 평가 결과 텍스트, 실패 시 None
+    """
     logger.info("생성된 Input_text 평가 중..")
     preset_text = [
         {
@@ -111,13 +121,31 @@ def Eval_Input_Text(tcontent, input_text):
             else:
                 warning_message = f"평가 실패 (상태 코드: {status_code}), 재시도 중..."
                 logger.warning(f"{warning_message} ({retry_count+1}/{max_retries})\n")
-                time.sleep(3)  # 약간 텀을 두고 다시 텍스트 생성을 시도해보면 생성하지 못했던것도 잘 생성하기도 함.
+                # 약간 텀을 두고 다시 텍스트 생성을 시도해보면 생성하지 못했던것도 잘 생성하기도 함.
+                time.sleep(retry_delay(retry_count, base=3))
 
         except Exception as e:
             logger.error(f"텍스트 생성 중 오류 발생: {str(e)}\n")
 
         retry_count += 1
 
-        if not generated_content:
-            logger.error(f"Input_text 평가 실패 (최종 상태 코드: {last_status_code})")
-            continue  # Translation 과정 건너뛰기용
+    if not generated_content:
+        logger.error(f"Input_text 평가 실패 (최종 상태 코드: {last_status_code})")
+        return None
+    return generated_content
+
+
+def parse_eval_score(eval_text):
+    """
+    평가 결과에서 '종합 평가' 점수(0~10)를 추출합니다.
+    종합 평가 점수가 없으면 항목별 점수의 평균을, 점수를 찾지 못하면 None을 반환합니다.
+    """
+    if not eval_text:
+        return None
+
+    overall = OVERALL_SCORE_PATTERN.search(eval_text)
+    if overall:
+        return float(overall.group(1))
+
+    scores = [float(score) for score in ITEM_SCORE_PATTERN.findall(eval_text) if float(score) <= 10]
+    return sum(scores) / len(scores) if scores else None
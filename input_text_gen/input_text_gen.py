@@ -1,15 +1,26 @@
 # -*- coding: utf-8 -*-
-import json
+import argparse
+import os
+import sys
 import time
 
-from eval_input_text import Eval_Input_Text
-from kr2us_translator import Translator
+from eval_input_text import Eval_Input_Text, parse_eval_score
+from kr2us_translator import TRANSLATION_FAILED, Translator
 from loguru import logger
-import pandas as pd
 import requests
 import yaml
 
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules_common.dataset import read_dataset
+from modules_common.pipeline import Stage, run_pipeline
+from modules_common.rate_limiter import get_rate_limiter, retry_delay
+from modules_common.result_sink import ResultSink, keep_rows
+from modules_common.run_journal import RunJournal, default_journal_path
+from modules_common.sse_parser import parse_sse_stream
+
+
 def load_config(file_path):
     with open(file_path, "r") as file:
         config = yaml.safe_load(file)
@@ -23,7 +34,7 @@ API_KEY = config_api["API"]["API_KEY"]
 REQUEST_ID = config_api["API"]["REQUEST_ID"]
 COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
 
-fiction_df = pd.read_csv(config_input_text_gen["Origin_fiction_dir"])
+fiction_df = read_dataset(config_input_text_gen["Origin_fiction_dir"], columns=["id", "tcontent"])
 fiction_content = fiction_df["tcontent"]
 input_text_df = fiction_df[["id"]]
 
@@ -33,6 +44,7 @@ class CompletionExecutor:
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
+        self._rate_limiter = get_rate_limiter(api_key, "HCX-003")
 
     def execute(self, completion_request):
         headers = {
@@ -42,105 +54,238 @@ class CompletionExecutor:
             "Accept": "text/event-stream",
         }
 
-        with requests.post(
-            self._host + "/serviceapp/v1/chat-completions/HCX-003",
-            headers=headers,
-            json=completion_request,
-            stream=True,
-        ) as r:
-            if r.status_code != 200:
-                logger.warning(f"API 요청 실패: 상태 코드 {r.status_code}")
-                return None, r.status_code
-                # return None
-
-            lines = [line.decode("utf-8") for line in r.iter_lines() if line]
-            for line in lines[-4:]:
-                try:
-                    # "data:"로 시작하는 부분 제거
-                    if line.startswith("data:"):
-                        line = line[len("data:") :]
-
-                    # JSON 파싱
-                    data = json.loads(line)
-
-                    # JSON에서 "content" 추출
-                    content = data.get("message", {}).get("content", None)
-                    if content:
-                        return content, r.status_code
-
-                except json.JSONDecodeError:  # JSON 문자열이 아닌 요소들은 무시
-                    continue
+        started_at = self._rate_limiter.acquire()
+        status_code = None
+        try:
+            with requests.post(
+                self._host + "/serviceapp/v1/chat-completions/HCX-003",
+                headers=headers,
+                json=completion_request,
+                stream=True,
+            ) as r:
+                status_code = r.status_code
+                if r.status_code != 200:
+                    logger.warning(f"API 요청 실패: 상태 코드 {r.status_code}")
+                    return None, r.status_code
+                    # return None
+
+                # result 이벤트만 파싱하고 받는 즉시 스트림 종료
+                content = parse_sse_stream(r.iter_lines())
+                if content:
+                    return content, r.status_code
+        finally:
+            self._rate_limiter.release(started_at, throttled=status_code == 429)
 
         return None, 200
 
 
-if __name__ == "__main__":
+def build_request_data(tcontent):
+    preset_text = [
+        {
+            "role": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["system"]["role"],
+            "content": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["system"]["content"],
+        },
+        {
+            "role": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["user"]["role"],
+            "content": f"{tcontent}",
+        },
+    ]
+
+    return {
+        "messages": preset_text,
+        "topP": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["topP"],
+        "topK": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["topK"],
+        "maxTokens": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["maxTokens"],
+        "temperature": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["temperature"],
+        "repeatPenalty": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["repeatPenalty"],
+        "stopBefore": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["stopBefore"],
+        "includeAiFilters": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["includeAiFilters"],
+        "seed": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["seed"],
+    }
+
+
+def row_id(i):
+    """i번째 행의 입력 id (작업 일지와 출력 파일은 행 번호가 아닌 이 id로 행을 구분)"""
+    return input_text_df["id"][i]
+
+
+def generate_input_text(completion_executor, i):
+    """
+    i번째 소설 텍스트로 Input_text를 생성합니다. 생성 실패 시 최대 3번까지 재시도합니다.
+    :return: 생성된 텍스트, 최종 실패 시 None
+    """
+    logger.info(f"{i+1}/{len(fiction_content)} Input_text 생성 중..")
+    request_data = build_request_data(fiction_content[i])
+
+    # 텍스트 생성 실패 시 재생성 시도
+    retry_count = 0
+    max_retries = 3
+    last_status_code = None
+
+    while retry_count < max_retries:
+        try:
+            generated_content, status_code = completion_executor.execute(request_data)
+            last_status_code = status_code
+            if generated_content:
+                logger.info(f"텍스트 생성 성공:\n {generated_content[:50]}...\n")
+                return generated_content
+            else:
+                warning_message = f"[{i+1}] 생성된 텍스트가 비어 있음 (상태 코드: {status_code}), 재시도 중..."
+                logger.warning(f"{warning_message} ({retry_count+1}/{max_retries})\n")
+                # 약간 텀을 두고 다시 텍스트 생성을 시도해보면 생성하지 못했던것도 잘 생성하기도 함.
+                time.sleep(retry_delay(retry_count, base=3))
+
+        except Exception as e:
+            logger.error(f"[{i+1}] 텍스트 생성 중 오류 발생: {str(e)}\n")
+
+        retry_count += 1
+
+    logger.error(f"[{i+1}] 텍스트 생성 최종 실패 (최종 상태 코드: {last_status_code})")
+    return None
+
+
+# 출력 파일에 행을 기록한 결과 (작업 일지의 "emitted" 단계에 기록)
+EMIT_TRANSLATED = "translated"
+EMIT_EXCLUDED = "excluded"  # 평가 점수 기준 미달로 제외
+EMIT_FAILED = "failed"  # 생성 또는 번역 실패 (이어서 실행하면 다시 시도)
+FINISHED_EMITS = (EMIT_TRANSLATED, EMIT_EXCLUDED)
+
+
+def eval_result_path(output_path):
+    """평가 결과를 저장할 경로 (출력 파일 옆의 *_eval.csv)"""
+    return f"{os.path.splitext(output_path)[0]}_eval.csv"
+
+
+class InputTextPipeline:
+    """
+    생성 → 평가 → 번역 단계를 크기가 제한된 대기열로 연결해,
+    다음 소설의 생성과 이전 소설의 평가/번역이 겹치도록 실행합니다.
+    결과 행은 번역(또는 실패/제외)이 끝나는 즉시 출력 파일에 기록됩니다.
+    """
+
+    def __init__(self, completion_executor, journal, output_sink, eval_sink, min_eval_score=None):
+        self.completion_executor = completion_executor
+        self.journal = journal
+        self.output_sink = output_sink
+        self.eval_sink = eval_sink
+        self.min_eval_score = min_eval_score
+
+    def emit(self, i, musicgen_input_text, status):
+        """출력 행을 기록하고, 기록했다는 사실(status)을 작업 일지의 "emitted" 단계에 남깁니다."""
+        self.output_sink.write({"id": row_id(i), "musicgen_input_text": musicgen_input_text})
+        self.journal.record(row_id(i), "emitted", status)
+
+    def generate(self, i):
+        # 작업 일지는 입력 id를 키로 사용 (이어서 실행할 때 입력 행 순서가 바뀌어도 같은 소설의 결과를 재사용)
+        generated_content = self.journal.get(row_id(i), "generate")
+        if generated_content is None:
+            generated_content = generate_input_text(self.completion_executor, i)
+            if not generated_content:
+                self.emit(i, None, EMIT_FAILED)  # Translation 과정 건너뛰기용
+                return None
+            self.journal.record(row_id(i), "generate", generated_content)
+        return i, generated_content
+
+    def evaluate(self, item):
+        i, generated_content = item
+        eval_text = self.journal.get(row_id(i), "evaluate")
+        if eval_text is None:
+            eval_text = Eval_Input_Text(fiction_content[i], generated_content)
+            if eval_text is not None:
+                self.journal.record(row_id(i), "evaluate", eval_text)
+                self.eval_sink.write(
+                    {"id": row_id(i), "eval_score": parse_eval_score(eval_text), "eval_text": eval_text}
+                )
+
+        eval_score = parse_eval_score(eval_text)
+        if self.min_eval_score is not None and eval_score is not None and eval_score < self.min_eval_score:
+            logger.warning(
+                f"[{i+1}] 종합 평가 점수({eval_score}점)가 기준({self.min_eval_score}점)보다 낮아 제외합니다."
+            )
+            self.emit(i, None, EMIT_EXCLUDED)
+            return None
+        return item
+
+    def translate(self, item):
+        i, generated_content = item
+        translated_content = self.journal.get(row_id(i), "translate")
+        if translated_content is None:
+            logger.info(f"[{i+1}] KR→US 번역 작업 수행 중..\n")
+            translated_content = Translator.Translate(generated_content)
+            if translated_content == TRANSLATION_FAILED:
+                self.emit(i, translated_content, EMIT_FAILED)
+                return
+            self.journal.record(row_id(i), "translate", translated_content)
+        self.emit(i, translated_content, EMIT_TRANSLATED)
+
+    def run(self, rows, gen_workers=2, eval_workers=2, translate_workers=4, queue_size=8):
+        run_pipeline(
+            rows,
+            [
+                Stage("generate", self.generate, workers=gen_workers, queue_size=queue_size),
+                Stage("evaluate", self.evaluate, workers=eval_workers, queue_size=queue_size),
+                Stage("translate", self.translate, workers=translate_workers, queue_size=queue_size),
+            ],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="소설 텍스트로부터 MusicGen Input_text를 생성합니다.")
+    parser.add_argument("--resume", action="store_true", help="작업 일지에 기록된 완료 행은 다시 요청하지 않음")
+    parser.add_argument("--gen-workers", type=int, default=2, help="Input_text 생성 동시 요청 수")
+    parser.add_argument("--eval-workers", type=int, default=2, help="Input_text 평가 동시 요청 수")
+    parser.add_argument("--translate-workers", type=int, default=4, help="번역 동시 요청 수")
+    parser.add_argument("--queue-size", type=int, default=8, help="단계 사이 대기열의 최대 길이")
+    parser.add_argument(
+        "--min-eval-score",
+        type=float,
+        default=None,
+        help="종합 평가 점수가 이 값보다 낮은 Input_text는 번역하지 않고 비워 둠 (기본: 사용하지 않음)",
+    )
+    args = parser.parse_args()
+
     completion_executor = CompletionExecutor(
         host=f"{COMPLETION_HOST_URL}", api_key=f"{API_KEY}", request_id=f"{REQUEST_ID}"
     )
-    content_list = []
-    translator = Translator()
-
-    # for i in range(1):
-    for i in range(len(fiction_content)):
-        logger.info(f"{i+1}/{len(fiction_content)} Input_text 생성 중..")
-        preset_text = [
-            {
-                "role": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["system"]["role"],
-                "content": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["system"]["content"],
-            },
-            {
-                "role": config_input_text_gen["Input_text_gen_LLM"]["preset_text"]["user"]["role"],
-                "content": f"{fiction_content[i]}",
-            },
-        ]
-
-        request_data = {
-            "messages": preset_text,
-            "topP": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["topP"],
-            "topK": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["topK"],
-            "maxTokens": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["maxTokens"],
-            "temperature": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["temperature"],
-            "repeatPenalty": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["repeatPenalty"],
-            "stopBefore": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["stopBefore"],
-            "includeAiFilters": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["includeAiFilters"],
-            "seed": config_input_text_gen["Input_text_gen_LLM"]["request_params"]["seed"],
-        }
+    output_path = config_input_text_gen["Generated_input_text"]
+    eval_path = eval_result_path(output_path)
+    if not args.resume:
+        # 처음부터 다시 실행하면 이전 결과 파일을 덮어씀
+        for path in (output_path, eval_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    journal = RunJournal(default_journal_path(output_path), resume=args.resume)
 
-        # 텍스트 생성 실패 시 재생성 시도
-        retry_count = 0
-        max_retries = 3
-        generated_content = None
-        last_status_code = None
-
-        while retry_count < max_retries:
-            try:
-                generated_content, status_code = completion_executor.execute(request_data)
-                last_status_code = status_code
-                if generated_content:
-                    logger.info(f"텍스트 생성 성공:\n {generated_content[:50]}...\n")
-                    Eval_Input_Text(fiction_content[i], generated_content)
-                    break
-                else:
-                    warning_message = f"[{i+1}] 생성된 텍스트가 비어 있음 (상태 코드: {status_code}), 재시도 중..."
-                    logger.warning(f"{warning_message} ({retry_count+1}/{max_retries})\n")
-                    time.sleep(3)  # 약간 텀을 두고 다시 텍스트 생성을 시도해보면 생성하지 못했던것도 잘 생성하기도 함.
-
-            except Exception as e:
-                logger.error(f"[{i+1}] 텍스트 생성 중 오류 발생: {str(e)}\n")
-
-            retry_count += 1
-
-        if not generated_content:
-            logger.error(f"[{i+1}] 텍스트 생성 최종 실패 (최종 상태 코드: {last_status_code})")
-            content_list.append(None)
-            continue  # Translation 과정 건너뛰기용
-
-        logger.info(f"[{i+1}] KR→US 번역 작업 수행 중..\n")
-        translated_content = Translator.Translate(generated_content)
-        content_list.append(translated_content)
+    # 번역 완료 또는 평가 제외로 출력 파일에 기록된 행은 건너뛰고, 나머지 행의 이전 출력은 지운 뒤 다시 처리
+    # (작업 일지와 출력 파일 모두 입력 id로 행을 구분하므로 입력 행 순서가 바뀌어도 같은 행을 건너뜀)
+    finished = [journal.get(row_id(i), "emitted") in FINISHED_EMITS for i in range(len(fiction_content))]
+    pending_rows = [i for i, done in enumerate(finished) if not done]
+    if args.resume:
+        keep_ids = {str(row_id(i)) for i, done in enumerate(finished) if done}
+        removed = keep_rows(output_path, keep_ids)
+        if removed:
+            logger.info(f"다시 처리할 행의 이전 출력 {removed}개를 지웠습니다: {output_path}")
+    logger.info(f"{len(pending_rows)}/{len(fiction_content)}개 행 처리 시작 (생성 → 평가 → 번역)")
 
+    output_sink = ResultSink(output_path, fieldnames=["id", "musicgen_input_text"])
+    eval_sink = ResultSink(eval_path, fieldnames=["id", "eval_score", "eval_text"])
+
+    pipeline = InputTextPipeline(completion_executor, journal, output_sink, eval_sink, args.min_eval_score)
+    try:
+        pipeline.run(
+            pending_rows,
+            gen_workers=args.gen_workers,
+            eval_workers=args.eval_workers,
+            translate_workers=args.translate_workers,
+            queue_size=args.queue_size,
+        )
+    finally:
+        output_sink.close()
+        eval_sink.close()
+        journal.close()
     logger.info("모든 Input_text 생성 완료.")
-    fiction_prompt_df = pd.DataFrame({"musicgen_input_text": content_list})
-    new_fiction_df = pd.concat([input_text_df, fiction_prompt_df], axis=1)
-    new_fiction_df.to_csv(config_input_text_gen["Generated_input_text"], index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
-import json
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import re
+import sys
+import time
 
 from loguru import logger
+import requests
 import yaml
 
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules_common.completion_executor import get_session
+from modules_common.rate_limiter import RETRYABLE_STATUS_CODES, get_rate_limiter, retry_delay
+from modules_common.response_cache import get_response_cache
+
+
 def load_config(file_path):
     with open(file_path, "r") as file:
         config = yaml.safe_load(file)
@@ -17,38 +29,138 @@ client_id = config_api["TRANSLATOR"]["CLIENT_ID"]
 client_secret = config_api["TRANSLATOR"]["CLIENT_SECRET"]
 url = config_api["TRANSLATOR"]["URL"]
 
+TRANSLATION_FAILED = "번역 실패"
+PAPAGO_MAX_CHARS = 5000  # Papago 번역 API의 요청당 최대 글자 수
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_CONCURRENCY = 4
+REQUEST_TIMEOUT = 30
+TRANSLATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "papago", "translations.sqlite3")
+
+# 문장 부호나 줄바꿈 바로 뒤에서 자름 (구분자는 앞 조각에 남김)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。\n])")
+
+
+def translation_key(text, source="ko", target="en"):
+    """원문과 언어 쌍의 SHA-256 해시를 번역 캐시 키로 사용합니다."""
+    return hashlib.sha256(f"{source}\0{target}\0{text}".encode("utf-8")).hexdigest()
+
+
+def split_text(text, max_chars=PAPAGO_MAX_CHARS):
+    """
+    API 글자 수 제한을 넘는 텍스트를 문장 경계에서 max_chars 이하의 조각으로 나눕니다.
+    한 문장이 max_chars보다 길면 글자 수로 자릅니다. 조각을 이어 붙이면 원문과 같습니다.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for piece in SENTENCE_BOUNDARY.split(text):
+        while len(piece) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(piece[:max_chars])
+            piece = piece[max_chars:]
+        if len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _request_translation(text):
+    """
+    Papago API에 한 조각을 번역 요청합니다. 429/5xx와 연결 오류는 재시도합니다.
+    :return: 번역문, 실패 시 None
+    """
+    rate_limiter = get_rate_limiter(client_id, "papago")
+    headers = {"X-NCP-APIGW-API-KEY-ID": client_id, "X-NCP-APIGW-API-KEY": client_secret}
+
+    for attempt in range(DEFAULT_MAX_RETRIES + 1):
+        retry_after = None
+        status_code = None
+        started_at = rate_limiter.acquire()
+        try:
+            response = get_session().post(
+                url,
+                headers=headers,
+                data={"source": "ko", "target": "en", "text": text},
+                timeout=REQUEST_TIMEOUT,
+            )
+            status_code = response.status_code
+            if status_code == 200:
+                return response.json().get("message", {}).get("result", {}).get("translatedText")
+            if status_code not in RETRYABLE_STATUS_CODES:
+                logger.error(f"번역 실패: API 상태 코드 {status_code}")
+                return None
+            logger.warning(f"번역 요청 제한 또는 서버 오류 (상태 코드 {status_code}), 재시도 중...")
+            retry_after = response.headers.get("Retry-After")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning(f"번역 요청 연결 실패: {e}")
+        finally:
+            rate_limiter.release(started_at, throttled=status_code == 429)
+
+        if attempt < DEFAULT_MAX_RETRIES:
+            time.sleep(retry_delay(attempt, retry_after))
+
+    logger.error(f"번역 실패: {DEFAULT_MAX_RETRIES}번 재시도 후에도 응답을 받지 못했습니다.")
+    return None
+
 
 class Translator:
     @staticmethod
     def Translate(kr_content: str) -> str:  # KR -> US 문장
         if not kr_content or not isinstance(kr_content, str):  # 번역할 문장이 비어있지 않을 경우 수행
             logger.warning("번역할 문장이 비어있거나, 잘못된 Type입니다.")
-            return "번역 실패"
-
-        encText = urllib.parse.quote(kr_content)
+            return TRANSLATION_FAILED
 
-        data = f"source=ko&target=en&text={encText}"
-        request = urllib.request.Request(url)
-        request.add_header("X-NCP-APIGW-API-KEY-ID", client_id)
-        request.add_header("X-NCP-APIGW-API-KEY", client_secret)
+        # 같은 원문은 이전 실행의 번역 결과를 재사용
+        cache = get_response_cache(TRANSLATION_CACHE_PATH)
+        key = translation_key(kr_content)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
         try:
-            response = urllib.request.urlopen(request, data=data.encode("utf-8"))
-            rescode = response.getcode()
-
-            if rescode == 200:
-                response_body = response.read()
-                response_json = json.loads(response_body.decode("utf-8"))
-
-                translated_text = response_json.get("message", {}).get("result", {}).get("translatedText", "번역 실패")
-
-                logger.info(f"번역 성공:\n{translated_text[:100]}...")
-                return translated_text
-
-            else:
-                logger.error(f"번역 실패: API 상태 코드 {rescode}")
-                return "번역 실패"
+            chunks = split_text(kr_content)
+            translated_chunks = []
+            for chunk in chunks:
+                translated_chunk = _request_translation(chunk)
+                if translated_chunk is None:
+                    return TRANSLATION_FAILED
+                # 줄바꿈에서 나눈 조각은 줄바꿈으로, 나머지는 공백으로 이어 붙임
+                separator = "\n" if chunk.endswith("\n") else " "
+                translated_chunks.append(translated_chunk.strip() + separator)
+            translated_text = "".join(translated_chunks).strip()
 
         except Exception as e:
             logger.exception(f"번역 요청 중 오류 발생: {str(e)}")
-            return "번역 실패"
+            return TRANSLATION_FAILED
+
+        if len(chunks) > 1:
+            logger.info(f"긴 원문({len(kr_content)}자)을 {len(chunks)}개 조각으로 나누어 번역했습니다.")
+        logger.info(f"번역 성공:\n{translated_text[:100]}...")
+        cache.set(key, translated_text)
+        return translated_text
+
+    @staticmethod
+    def translate_many(kr_contents, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        여러 문장을 공유 커넥션 풀 위에서 최대 max_concurrency개까지 동시에 번역합니다.
+        같은 원문은 한 번만 요청합니다.
+        :return: 입력 순서와 동일한 순서의 번역문 리스트 (실패한 항목은 "번역 실패")
+        """
+        kr_contents = list(kr_contents)
+        unique_contents = list(dict.fromkeys(content for content in kr_contents if isinstance(content, str)))
+        if not unique_contents:
+            return [Translator.Translate(content) for content in kr_contents]
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            translations = dict(zip(unique_contents, pool.map(Translator.Translate, unique_contents)))
+        return [
+            translations[content] if isinstance(content, str) else Translator.Translate(content)
+            for content in kr_contents
+        ]
@@ -1,2 +1,9 @@
 from .completion_executor import CompletionExecutor
+from .dataset import convert_csv_to_dataset, read_dataset, write_dataset
 from .load_config import load_config
+from .pipeline import Stage, run_pipeline
+from .rate_limiter import RateLimiter, configure_rate_limit, get_rate_limiter, retry_delay
+from .response_cache import ResponseCache, get_response_cache
+from .result_sink import ResultSink
+from .run_journal import RunJournal, default_journal_path
+from .sse_parser import parse_sse_stream
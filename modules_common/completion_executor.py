@@ -1,18 +1,64 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 
 from loguru import logger
 import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import RETRYABLE_STATUS_CODES, get_rate_limiter, retry_delay
+from .response_cache import is_deterministic, request_key
+from .sse_parser import parse_sse_stream
+
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_MODEL = "HCX-003"
+DEFAULT_MAX_RETRIES = 5
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 keep-alive 커넥션 풀 세션을 반환합니다."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
 
 
 class CompletionExecutor:
     """모델 피드백을 요청하는 클래스"""
 
-    def __init__(self, host, api_key, request_id):
+    def __init__(
+        self,
+        host,
+        api_key,
+        request_id,
+        model=DEFAULT_MODEL,
+        max_retries=DEFAULT_MAX_RETRIES,
+        cache=None,
+    ):
         self._host = host
         self._api_key = api_key
         self._request_id = request_id
+        self._model = model
+        self._max_retries = max_retries
+        self._session = get_session()
+        self._rate_limiter = get_rate_limiter(api_key, model)
+        self._cache = cache
 
-    def execute(self, completion_request):
+    def _post(self, completion_request, on_token):
+        """
+        요청을 한 번 전송합니다.
+        :return: (응답 content, 상태 코드, Retry-After 헤더 값)
+        """
         headers = {
             "Authorization": self._api_key,
             "X-NCP-CLOVASTUDIO-REQUEST-ID": self._request_id,
@@ -20,27 +66,75 @@ class CompletionExecutor:
             "Accept": "text/event-stream",
         }
 
-        final_content = ""
-        try:
-            with requests.post(
-                self._host + "/serviceapp/v1/chat-completions/HCX-003",
-                headers=headers,
-                json=completion_request,
-                stream=True,
-            ) as r:
-                r.raise_for_status()
-                for line in r.iter_lines():
-                    if line:
-                        decoded_line = line.decode("utf-8")
-                        # print("Received Line:", decoded_line)  # 디버깅용 출력
-                        if decoded_line.startswith("data:"):
-                            try:
-                                data = json.loads(decoded_line[5:])
-                                if "message" in data and "content" in data["message"]:
-                                    final_content = data["message"]["content"]
-                            except json.JSONDecodeError:
-                                continue
-        except requests.RequestException as e:
-            logger.error(f"Request failed: {e}")
-            return None
-        return final_content
+        with self._session.post(
+            f"{self._host}/serviceapp/v1/chat-completions/{self._model}",
+            headers=headers,
+            json=completion_request,
+            stream=True,
+        ) as r:
+            if r.status_code in RETRYABLE_STATUS_CODES:
+                logger.warning(f"Request throttled or failed with status {r.status_code}")
+                return None, r.status_code, r.headers.get("Retry-After")
+            r.raise_for_status()
+            # result 이벤트를 받으면 나머지 스트림은 읽지 않고 연결을 닫음
+            return parse_sse_stream(r.iter_lines(), on_token=on_token) or "", r.status_code, None
+
+    def execute(self, completion_request, on_token=None, use_cache=True):
+        """
+        채팅 완성 요청을 보내고 최종 응답 content를 반환합니다.
+        cache가 설정되어 있고 seed가 고정된 요청이면 캐시된 응답을 먼저 확인합니다.
+        :param completion_request: 요청 데이터
+        :param on_token: 토큰 단위 스트리밍 content를 받을 콜백 (선택, 캐시 적중 시 호출되지 않음)
+        :param use_cache: False이면 캐시를 우회하고 항상 API를 호출
+        :return: 최종 응답 content, 요청 실패 시 None
+        """
+        if not (use_cache and self._cache is not None and is_deterministic(completion_request)):
+            return self._request(completion_request, on_token)
+
+        key = request_key(self._model, completion_request)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        content = self._request(completion_request, on_token)
+        if content:
+            self._cache.set(key, content)
+        return content
+
+    def _request(self, completion_request, on_token):
+        """429/5xx 응답과 연결 오류는 Retry-After를 따르는 지수 백오프로 최대 max_retries번 재시도합니다."""
+        for attempt in range(self._max_retries + 1):
+            retry_after = None
+            status_code = None
+            started_at = self._rate_limiter.acquire()
+            try:
+                content, status_code, retry_after = self._post(completion_request, on_token)
+                if content is not None:
+                    return content
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logger.warning(f"Request failed: {e}")
+            except requests.RequestException as e:
+                logger.error(f"Request failed: {e}")
+                return None
+            finally:
+                self._rate_limiter.release(started_at, throttled=status_code == 429)
+
+            if attempt < self._max_retries:
+                time.sleep(retry_delay(attempt, retry_after))
+
+        logger.error(f"Request failed after {self._max_retries} retries")
+        return None
+
+    def execute_many(self, completion_requests, max_concurrency=4):
+        """
+        여러 요청을 공유 커넥션 풀 위에서 최대 max_concurrency개까지 동시에 수행합니다.
+        :param completion_requests: execute에 전달할 요청 데이터 리스트
+        :param max_concurrency: 동시에 진행할 최대 요청 수
+        :return: 입력 순서와 동일한 순서의 응답 리스트 (실패한 요청은 None)
+        """
+        completion_requests = list(completion_requests)
+        if not completion_requests:
+            return []
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            return list(pool.map(self.execute, completion_requests))
@@ -0,0 +1,149 @@
+import argparse
+import os
+import uuid
+
+from loguru import logger
+import pandas as pd
+
+
+ID_COLUMN = "id"
+BUCKET_COLUMN = "id_bucket"
+DEFAULT_BUCKET_SIZE = 1000
+DEFAULT_BLOCK_SIZE = 16 << 20  # CSV 변환 시 한 번에 읽을 바이트 수 (스키마 추론에도 사용)
+BUCKET_SIZE_METADATA_KEY = b"id_bucket_size"
+
+
+def _is_csv(path):
+    return os.path.isfile(path) and path.lower().endswith(".csv")
+
+
+def _with_bucket(batch, id_column, bucket_size):
+    """id // bucket_size 값을 id_bucket 파티션 컬럼으로 추가합니다."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    bucket = pc.divide(batch.column(id_column), pa.scalar(bucket_size, batch.schema.field(id_column).type))
+    return pa.RecordBatch.from_arrays(
+        [*batch.columns, pc.cast(bucket, pa.int64())], names=[*batch.schema.names, BUCKET_COLUMN]
+    )
+
+
+def write_dataset(
+    data,
+    path,
+    id_column=ID_COLUMN,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    dictionary_columns=None,
+    append=False,
+):
+    """
+    DataFrame, pyarrow Table 또는 RecordBatchReader를
+    id 구간(id // bucket_size)별로 파티션된 Parquet 데이터셋으로 저장합니다.
+    id 컬럼은 Parquet 딕셔너리 인코딩으로 저장되며, 텍스트 컬럼은 zstd로 압축합니다.
+    :param dictionary_columns: 딕셔너리 인코딩할 컬럼 (기본: id 컬럼만)
+    :param append: True이면 기존 파일을 유지하고 새 파일을 추가, False이면 기록하는 파티션을 덮어씀
+    :return: 저장한 행 수
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if isinstance(data, pd.DataFrame):
+        data = pa.Table.from_pandas(data, preserve_index=False)
+    reader = data.to_reader() if isinstance(data, pa.Table) else data
+
+    schema = reader.schema.append(pa.field(BUCKET_COLUMN, pa.int64()))
+    schema = schema.with_metadata({**(schema.metadata or {}), BUCKET_SIZE_METADATA_KEY: str(bucket_size).encode()})
+    rows_written = 0
+
+    def batches():
+        nonlocal rows_written
+        for batch in reader:
+            rows_written += batch.num_rows
+            yield _with_bucket(batch, id_column, bucket_size)
+
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(schema, batches()),
+        path,
+        format=file_format,
+        partitioning=ds.partitioning(pa.schema([(BUCKET_COLUMN, pa.int64())]), flavor="hive"),
+        file_options=file_format.make_write_options(
+            use_dictionary=list(dictionary_columns or [id_column]), compression="zstd"
+        ),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore" if append else "delete_matching",
+    )
+    logger.info(f"✅ Parquet 데이터셋에 {rows_written}개 행 저장 완료: {path}")
+    return rows_written
+
+
+def read_dataset(path, columns=None, ids=None, filter=None, id_column=ID_COLUMN):
+    """
+    Parquet 데이터셋(또는 단일 Parquet 파일)에서 필요한 컬럼과 행만 읽어 DataFrame으로 반환합니다.
+    ids가 주어지면 id 구간 파티션을 먼저 걸러낸 뒤 파일 안에서도 조건을 적용(predicate pushdown)합니다.
+    CSV 경로도 받을 수 있으며, 이 경우 필요한 컬럼만 읽습니다.
+    :param columns: 읽을 컬럼 목록 (None이면 전체, 파티션 컬럼 제외)
+    :param ids: 읽을 id 목록 (None이면 전체)
+    :param filter: 추가 조건 (pyarrow.dataset 표현식, 예: ds.field("chapter") == 1)
+    """
+    if _is_csv(path):
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys([*columns, id_column] if ids is not None else columns))
+        df = pd.read_csv(path, usecols=usecols)
+        if ids is not None:
+            df = df[df[id_column].isin(list(ids))].reset_index(drop=True)
+        return df if columns is None else df[list(columns)]
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    expression = filter
+    if ids is not None:
+        ids = list(ids)
+        id_expression = ds.field(id_column).isin(ids)
+        bucket_size = (dataset.schema.metadata or {}).get(BUCKET_SIZE_METADATA_KEY)
+        if bucket_size is not None and BUCKET_COLUMN in dataset.schema.names:
+            buckets = sorted({int(i) // int(bucket_size) for i in ids})
+            id_expression = ds.field(BUCKET_COLUMN).isin(buckets) & id_expression
+        expression = id_expression if expression is None else expression & id_expression
+
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != BUCKET_COLUMN]
+    return dataset.to_table(columns=list(columns), filter=expression).to_pandas()
+
+
+def convert_csv_to_dataset(
+    csv_path,
+    path,
+    id_column=ID_COLUMN,
+    bucket_size=DEFAULT_BUCKET_SIZE,
+    column_types=None,
+    block_size=DEFAULT_BLOCK_SIZE,
+):
+    """
+    기존 CSV(utf-8-sig 포함)를 전체를 메모리에 올리지 않고 블록 단위로 읽어 Parquet 데이터셋으로 변환합니다.
+    :param column_types: 컬럼별 pyarrow 타입 지정 (첫 블록의 타입 추론이 틀릴 때 사용)
+    :return: 변환한 행 수
+    """
+    import pyarrow.csv as pa_csv
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        # 소설 본문에는 따옴표 안의 줄바꿈이 있으므로 허용
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    )
+    return write_dataset(reader, path, id_column=id_column, bucket_size=bucket_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV 파일을 id 구간별로 파티션된 Parquet 데이터셋으로 변환")
+    parser.add_argument("csv_path", help="변환할 CSV 파일 (예: novel_content.csv)")
+    parser.add_argument("output_path", help="Parquet 데이터셋 디렉토리")
+    parser.add_argument("--id-column", default=ID_COLUMN, help="파티션 기준 id 컬럼")
+    parser.add_argument("--bucket-size", type=int, default=DEFAULT_BUCKET_SIZE, help="파티션 하나에 담을 id 구간 크기")
+    args = parser.parse_args()
+
+    convert_csv_to_dataset(args.csv_path, args.output_path, id_column=args.id_column, bucket_size=args.bucket_size)
@@ -0,0 +1,67 @@
+import queue
+import threading
+
+from loguru import logger
+
+
+_DONE = object()
+
+DEFAULT_QUEUE_SIZE = 8
+
+
+class Stage:
+    """
+    파이프라인의 한 단계.
+    func(item)의 반환값이 다음 단계로 전달되며, None을 반환하면 그 항목은 다음 단계로 넘기지 않습니다.
+    :param workers: 이 단계를 동시에 처리할 스레드 수
+    :param queue_size: 이 단계 입력 큐의 최대 길이 (가득 차면 앞 단계가 대기)
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+
+
+def _run_stage(stage, in_queue, out_queue):
+    while True:
+        item = in_queue.get()
+        if item is _DONE:
+            return
+        try:
+            result = stage.func(item)
+        except Exception as e:
+            logger.exception(f"[{stage.name}] 처리 중 오류 발생, 항목을 건너뜁니다: {e}")
+            continue
+        if result is not None and out_queue is not None:
+            out_queue.put(result)
+
+
+def run_pipeline(items, stages):
+    """
+    items를 stages 순서대로 흘려보내는 스트리밍 파이프라인을 실행합니다.
+    단계 사이에는 크기가 제한된 큐가 있어, 앞 단계가 다음 항목을 처리하는 동안 뒷 단계가 이전 항목을 처리합니다.
+    한 항목에서 발생한 예외는 기록한 뒤 그 항목만 버립니다.
+    """
+    queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+    workers = []
+    for index, stage in enumerate(stages):
+        out_queue = queues[index + 1] if index + 1 < len(stages) else None
+        threads = [
+            threading.Thread(target=_run_stage, args=(stage, queues[index], out_queue), daemon=True)
+            for _ in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        workers.append(threads)
+
+    for item in items:
+        queues[0].put(item)
+
+    # 앞 단계의 워커가 모두 끝난 뒤에 다음 단계에 종료 신호를 보냄
+    for index, stage in enumerate(stages):
+        for _ in range(stage.workers):
+            queues[index].put(_DONE)
+        for thread in workers[index]:
+            thread.join()
@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+
+from loguru import logger
+
+
+# Clova Studio 요청 한도 기본값 (API 키/모델별로 configure_rate_limit으로 조정 가능)
+DEFAULT_RATE = 2.0  # 초당 허용 요청 수
+DEFAULT_BURST = 4  # 순간적으로 허용하는 최대 요청 수
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_LATENCY_TARGET = 30.0  # 이 시간(초)을 넘기는 응답은 과부하 신호로 간주
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지고, 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 사용할 수 있을 때까지 대기합니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 방식으로 동시 요청 수를 조절하는 컨트롤러.
+    성공 응답마다 한도를 조금씩 늘리고, 429 응답이나 지연 목표 초과 시 한도를 절반으로 줄입니다.
+    """
+
+    def __init__(self, initial=2, min_limit=1, max_limit=DEFAULT_MAX_CONCURRENCY, latency_target=None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency, throttled=False):
+        with self._cond:
+            self._in_flight -= 1
+            slow = self.latency_target is not None and latency > self.latency_target
+            if throttled or slow:
+                self.limit = max(self.min_limit, self.limit / 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    """토큰 버킷과 적응형 동시성 제어를 묶은 API 키/모델 단위 요청 제한기"""
+
+    def __init__(
+        self,
+        rate=DEFAULT_RATE,
+        burst=DEFAULT_BURST,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        latency_target=DEFAULT_LATENCY_TARGET,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_limit=max_concurrency, latency_target=latency_target)
+
+    def acquire(self):
+        """동시성 슬롯과 토큰을 확보하고 요청 시작 시각을 반환합니다."""
+        self.concurrency.acquire()
+        self.bucket.acquire()
+        return time.monotonic()
+
+    def release(self, started_at, throttled=False):
+        """요청이 끝난 뒤 슬롯을 반납하고, 관측된 지연시간/429 여부를 동시성 한도에 반영합니다."""
+        self.concurrency.release(time.monotonic() - started_at, throttled=throttled)
+        if throttled:
+            logger.warning(f"⚠️ 요청 한도 초과(429) 감지 → 동시 요청 한도 {int(self.concurrency.limit)}로 축소")
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key, model):
+    """프로세스 전체에서 공유하는 (API 키, 모델)별 RateLimiter를 반환합니다."""
+    key = (api_key, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter()
+        return _limiters[key]
+
+
+def configure_rate_limit(api_key, model, **kwargs):
+    """(API 키, 모델)의 요청 한도를 설정합니다. kwargs는 RateLimiter 인자와 동일합니다."""
+    with _limiters_lock:
+        _limiters[(api_key, model)] = RateLimiter(**kwargs)
+        return _limiters[(api_key, model)]
+
+
+def retry_delay(attempt, retry_after=None, base=1.0, cap=60.0):
+    """
+    재시도 전 대기 시간(초)을 계산합니다.
+    Retry-After 헤더가 있으면 그 값을 따르고, 없으면 full jitter 지수 백오프를 사용합니다.
+    :param attempt: 0부터 시작하는 재시도 횟수
+    :param retry_after: 응답의 Retry-After 헤더 값 (초 단위)
+    """
+    if retry_after is not None:
+        try:
+            return min(cap, float(retry_after)) + random.uniform(0, base)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "clova_studio", "responses.sqlite3")
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30일
+DEFAULT_MAX_ENTRIES = 100_000
+EVICTION_INTERVAL = 100  # set 호출 N번마다 LRU 정리
+
+
+def request_key(model, completion_request):
+    """모델명과 요청 본문을 정규화한 JSON의 SHA-256 해시를 캐시 키로 사용합니다."""
+    canonical = json.dumps(
+        {"model": model, "request": completion_request},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(completion_request):
+    """
+    seed가 고정된 요청인지 확인합니다.
+    Clova Studio는 seed가 0이거나 없으면 매번 무작위 샘플링하므로 캐시하지 않습니다.
+    """
+    seed = completion_request.get("seed")
+    return isinstance(seed, int) and not isinstance(seed, bool) and seed != 0
+
+
+class ResponseCache:
+    """요청 해시를 키로 LLM 응답을 저장하는 SQLite 기반 영구 캐시 (TTL + LRU 제거)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._sets = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """캐시된 응답을 반환합니다. 없거나 TTL이 지났으면 None을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._sets += 1
+            if self._sets % EVICTION_INTERVAL == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """TTL이 지난 항목과, max_entries를 넘는 가장 오래 사용되지 않은 항목을 삭제합니다."""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """캐시 적중/미스 횟수와 적중률을 반환합니다."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(f"📦 응답 캐시: hit {stats['hits']} / miss {stats['misses']} (적중률 {stats['hit_rate']:.1%})")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(path=DEFAULT_CACHE_PATH):
+    """경로별로 프로세스 전체에서 공유하는 ResponseCache를 반환합니다."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
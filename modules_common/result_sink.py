@@ -0,0 +1,272 @@
+import csv
+import json
+import os
+import threading
+
+from loguru import logger
+
+
+class _CsvBackend:
+    def __init__(self, path, fieldnames, encoding):
+        self.path = path
+        self.encoding = encoding
+        self.fieldnames = _read_csv_header(path, encoding) or fieldnames
+        self._file = None
+        self._writer = None
+
+    def write(self, rows):
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(rows[0].keys())
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", encoding=self.encoding, newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+            if write_header:
+                self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def flush(self, fsync):
+        if self._file is not None:
+            self._file.flush()
+            if fsync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class _JsonlBackend:
+    def __init__(self, path, fieldnames, encoding):
+        self.path = path
+        self._file = open(path, "a", encoding=encoding)
+
+    def write(self, rows):
+        self._file.writelines(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+
+    def flush(self, fsync):
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetBackend:
+    """
+    행 묶음을 임시 파일(.part)에 row group 단위로 기록하고, close 시점에 원자적으로 교체합니다.
+    기존 파일이 있으면 시작할 때 한 번만 복사해 이어서 기록합니다.
+    """
+
+    def __init__(self, path, fieldnames, encoding):
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        self.path = path
+        self.tmp_path = f"{path}.part"
+        self.fieldnames = fieldnames
+        self._writer = None
+        self._existing = pq.read_table(path) if os.path.exists(path) else None
+
+    def write(self, rows):
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(rows)
+        if self._writer is None:
+            schema = self._existing.schema if self._existing is not None else table.schema
+            self._writer = self._pq.ParquetWriter(self.tmp_path, schema)
+            if self._existing is not None:
+                self._writer.write_table(self._existing)
+        self._writer.write_table(table.select(self._writer.schema.names).cast(self._writer.schema))
+
+    def flush(self, fsync):
+        # Parquet는 close 시점에만 유효한 파일이 되므로 중간 flush는 하지 않음
+        pass
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.tmp_path, self.path)
+
+
+_BACKENDS = {"csv": _CsvBackend, "jsonl": _JsonlBackend, "parquet": _ParquetBackend}
+
+
+def _read_csv_header(path, encoding):
+    """기존 CSV 파일의 헤더만 읽습니다. 파일이 없거나 비어 있으면 None을 반환합니다."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "r", encoding=encoding, newline="") as file:
+        return next(csv.reader(file), None)
+
+
+def _truncate_partial_line(path):
+    """비정상 종료로 마지막 줄이 잘린 경우, 마지막 개행 이후의 불완전한 데이터를 제거합니다."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) == b"\n":
+            return
+        size = file.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            index = file.read(step).rfind(b"\n")
+            if index != -1:
+                file.truncate(position + index + 1)
+                break
+        else:
+            file.truncate(0)
+    logger.warning(f"⚠️ 불완전한 마지막 행을 제거했습니다: {path}")
+
+
+def _truncate_partial_csv_record(path, encoding):
+    """
+    비정상 종료로 마지막 레코드가 잘린 경우, 마지막으로 완결된 CSV 레코드 이후의 데이터를 제거합니다.
+    따옴표로 감싼 필드 안에 개행이 있을 수 있으므로 개행 위치가 아니라 CSV 파싱 결과로 레코드의 끝을 판단합니다.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+
+    size = os.path.getsize(path)
+    consumed = 0
+    exhausted = False
+
+    def lines():
+        nonlocal consumed, exhausted
+        with open(path, "rb") as file:
+            for line in file:
+                # 개행으로 끝나지 않는 마지막 줄은 기록 도중 잘린 것
+                if not line.endswith(b"\n"):
+                    break
+                consumed += len(line)
+                yield line.decode(encoding)
+        exhausted = True
+
+    complete = 0
+    try:
+        # csv.reader는 레코드 하나에 필요한 줄까지만 읽으므로, 레코드가 반환된 시점의 consumed가 그 레코드의 끝 위치
+        for _ in csv.reader(lines(), strict=True):
+            complete = consumed
+    except csv.Error:
+        # 파일 끝에서 따옴표가 닫히지 않은 경우만 잘린 레코드로 보고, 중간이 깨진 파일은 그대로 오류를 냄
+        if not exhausted:
+            raise
+
+    if complete == size:
+        return
+    with open(path, "rb+") as file:
+        file.truncate(complete)
+    logger.warning(f"⚠️ 불완전한 마지막 행을 제거했습니다: {path}")
+
+
+def keep_rows(path, keep_ids, id_field="id", encoding="utf-8"):
+    """
+    기존 결과 파일(csv, jsonl)에서 id가 keep_ids에 있는 행만 id별로 한 번씩 남깁니다.
+    이어서 실행할 때 작업 일지에 완료로 남지 않은 행(기록 직후 중단된 행 등)의 이전 출력을 지워 중복 기록을 막습니다.
+    :param keep_ids: 남길 id의 집합 (문자열로 비교)
+    :return: 지운 행 수
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+    with open(path, "r", encoding=encoding, newline="") as file:
+        if fmt == "csv":
+            reader = csv.DictReader(file)
+            fieldnames, rows = reader.fieldnames, list(reader)
+        else:
+            fieldnames, rows = None, [json.loads(line) for line in file if line.strip()]
+
+    kept = {}
+    for row in rows:
+        row_id = str(row[id_field])
+        if row_id in keep_ids and row_id not in kept:
+            kept[row_id] = row
+    removed = len(rows) - len(kept)
+
+    tmp_path = f"{path}.tmp"
+    open(tmp_path, "w").close()  # 남길 행이 없어도 빈 파일로 교체되도록 먼저 생성
+    backend = _BACKENDS[fmt](tmp_path, fieldnames, encoding)
+    if kept:
+        backend.write(list(kept.values()))
+    backend.close()
+    os.replace(tmp_path, path)
+    return removed
+
+
+class ResultSink:
+    """
+    결과를 한 행씩 추가 기록하는 append-only 저장기.
+    기존 파일을 다시 읽지 않고 버퍼에 모은 행을 flush_every개마다 이어 쓰며, fsync_every개마다 디스크에 동기화합니다.
+    지원 형식: csv, jsonl, parquet (확장자로 자동 판별)
+    """
+
+    def __init__(self, path, fieldnames=None, fmt=None, encoding="utf-8", flush_every=1, fsync_every=50):
+        self.path = path
+        self.fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+        if self.fmt not in _BACKENDS:
+            raise ValueError(f"지원하지 않는 형식입니다: {self.fmt}")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if self.fmt == "csv":
+            _truncate_partial_csv_record(path, encoding)
+        elif self.fmt == "jsonl":
+            _truncate_partial_line(path)
+
+        self.flush_every = flush_every
+        self.fsync_every = fsync_every
+        self.rows_written = 0
+        self._buffer = []
+        self._since_fsync = 0
+        self._lock = threading.Lock()
+        self._backend = _BACKENDS[self.fmt](path, fieldnames, encoding)
+
+    def write(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def write_many(self, rows):
+        with self._lock:
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self, fsync=True):
+        with self._lock:
+            self._flush(force_fsync=fsync)
+
+    def _flush(self, force_fsync=False):
+        if self._buffer:
+            self._backend.write(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._since_fsync += len(self._buffer)
+            self._buffer = []
+
+        fsync = force_fsync or self._since_fsync >= self.fsync_every
+        self._backend.flush(fsync)
+        if fsync:
+            self._since_fsync = 0
+
+    def close(self):
+        """남은 버퍼를 기록하고 파일을 동기화한 뒤 닫습니다."""
+        with self._lock:
+            self._flush(force_fsync=True)
+            self._backend.close()
+        logger.info(f"✅ {self.rows_written}개 행 저장 완료: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+
+def default_journal_path(output_path):
+    """출력 파일 옆에 두는 기본 작업 일지 경로를 반환합니다."""
+    return f"{output_path}.journal.jsonl"
+
+
+class RunJournal:
+    """
+    입력 행 id와 단계(stage)별로 완료된 작업 결과를 기록하는 append-only 작업 일지 (JSONL).
+    resume=True이면 기존 일지를 불러와 완료된 작업을 건너뛸 수 있고, False이면 새로 시작합니다.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume:
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.info(f"📒 이어서 실행할 작업 일지가 없어 새로 시작합니다: {self.path}")
+            return
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 비정상 종료로 마지막 줄이 잘린 경우 무시
+                    continue
+                self._entries[(entry["id"], entry["stage"])] = entry.get("result")
+
+        logger.info(f"📒 작업 일지에서 완료된 작업 {len(self._entries)}개를 불러왔습니다: {self.path}")
+
+    def is_done(self, row_id, stage):
+        return (str(row_id), stage) in self._entries
+
+    def get(self, row_id, stage, default=None):
+        return self._entries.get((str(row_id), stage), default)
+
+    def completed_ids(self, stage):
+        return {row_id for row_id, entry_stage in self._entries if entry_stage == stage}
+
+    def record(self, row_id, stage, result=None):
+        """row_id의 stage 작업이 완료되었음을 결과와 함께 기록합니다."""
+        entry = {"id": str(row_id), "stage": stage, "result": result, "ts": time.time()}
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._entries[(entry["id"], stage)] = result
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
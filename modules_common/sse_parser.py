@@ -0,0 +1,57 @@
+import json
+
+from loguru import logger
+
+
+def _iter_events(lines):
+    """SSE 라인을 (event 타입, data 문자열) 쌍으로 변환합니다. data 페이로드는 파싱하지 않습니다."""
+    event = None
+    for line in lines:
+        if not line:
+            # 빈 줄은 하나의 SSE 이벤트가 끝났음을 의미
+            event = None
+            continue
+
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+
+        if line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            yield event, line[len("data:") :]
+
+
+def _load_data(payload):
+    """data 페이로드를 JSON으로 파싱합니다. 파싱에 실패하면 None을 반환합니다."""
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_sse_stream(lines, on_token=None):
+    """
+    Clova Studio chat-completions SSE 스트림을 한 줄씩 읽어 result 이벤트의 최종 응답을 반환합니다.
+
+    token 이벤트는 on_token 콜백이 등록된 경우에만 JSON으로 파싱하며,
+    result 이벤트를 받는 즉시 나머지 스트림을 읽지 않고 반환합니다.
+    :param lines: SSE 응답 라인 iterable (bytes 또는 str, 예: Response.iter_lines())
+    :param on_token: token 이벤트의 content를 받을 콜백 (선택)
+    :return: result 이벤트의 content, result 이벤트가 없으면 None
+    """
+    for event, payload in _iter_events(lines):
+        if event == "result":
+            data = _load_data(payload)
+            if data is None:
+                logger.error(f"Invalid result event: {payload}")
+                return None
+            return data.get("message", {}).get("content")
+
+        if event == "token" and on_token is not None:
+            content = (_load_data(payload) or {}).get("message", {}).get("content")
+            if content:
+                on_token(content)
+        elif event == "error":
+            logger.error(f"Stream error event: {payload}")
+
+    return None
@@ -1,4 +1,4 @@
 from .execute_with_retries import execute_with_retries
-from .result_processor import process_result
+from .result_processor import parse_judge_outputs, process_result
 from .sentence_generate import run_sg
 from .sentence_generate_eval import run_sg_eval
@@ -1,11 +1,14 @@
 import time
 
 from loguru import logger
+from modules_common.rate_limiter import retry_delay
 
 
 def execute_with_retries(completion_executor, request_data, max_retries=100, wait_time=5):
     """
     모델 요청을 수행하며, 응답이 없을 경우 최대 max_retries까지 재시도하는 함수.
+    429/5xx 재시도는 CompletionExecutor가 처리하므로, 여기서는 빈 응답에 대해 wait_time을 기준으로 한
+    지터 지수 백오프만 적용합니다.
     """
     response_data = None
     retry_count = 0
@@ -19,7 +22,7 @@ def execute_with_retries(completion_executor, request_data, max_retries=100, wai
 
         retry_count += 1
         logger.warning(f"⚠️ 모델 응답 없음. {retry_count}번째 재시도 중...")
-        time.sleep(wait_time)
+        time.sleep(retry_delay(retry_count, base=wait_time))
 
     logger.error("❌ 최대 재시도 횟수를 초과하여 응답을 받지 못했습니다.")
     return None
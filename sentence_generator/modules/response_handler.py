@@ -4,6 +4,9 @@ import re
 from loguru import logger
 
 
+SCORE_LIST_PATTERN = re.compile(r"\[([0-9,\s]+)\]")
+
+
 def handle_response(content_result):
     """
     모델 응답 데이터를 처리하여 점수와 총점을 추출합니다.
@@ -17,7 +20,7 @@ def handle_response(content_result):
     scores = []
     total_score = 0
 
-    match = re.search(r"\[([0-9,\s]+)\]", content_result)
+    match = SCORE_LIST_PATTERN.search(content_result)
     if match:
         scores = list(map(int, match.group(1).split(",")))
         total_score = sum(scores)
@@ -1,6 +1,12 @@
 import re
 
 from loguru import logger
+import numpy as np
+import pandas as pd
+from sentence_generator.modules.response_handler import SCORE_LIST_PATTERN
+
+
+CRITERION_PATTERN = re.compile(r"- (\w+/)?(\w+)\s*:\s*(\d+)\s*- 확률분포\s*:\s*\{([^\}]+)\}")
 
 
 def calculate_weighted_score(probabilities):
@@ -21,9 +27,7 @@ def extract_probabilities_and_calculate_weighted_score(content):
     """
     scores_data = {}
 
-    pattern = r"- (\w+/)?(\w+)\s*:\s*(\d+)\s*- 확률분포\s*:\s*\{([^\}]+)\}"
-
-    matches = re.finditer(pattern, content)
+    matches = CRITERION_PATTERN.finditer(content)
 
     for match in matches:
         category = match.group(2)
@@ -49,6 +53,94 @@ def extract_probabilities_and_calculate_weighted_score(content):
     return scores_data
 
 
+def _extract_probability_items(texts):
+    """
+    모든 응답에서 (행, 기준, 점수, 확률) 항목을 한 번에 추출합니다.
+    :return: (정상 항목 DataFrame, 파싱에 실패한 기준 DataFrame)
+    """
+    matches = texts.str.extractall(CRITERION_PATTERN)
+    if matches.empty:
+        return (
+            pd.DataFrame(columns=["row", "match", "criterion", "score", "probability"]),
+            pd.DataFrame(columns=["row", "criterion", "reason"]),
+        )
+
+    matches.index = matches.index.set_names(["row", "match"])
+    matches = matches.rename(columns={1: "criterion", 3: "raw"}).reset_index()
+
+    items = matches.assign(item=matches["raw"].str.split(",")).explode("item", ignore_index=True)
+    parts = items["item"].str.split(":", expand=True).reindex(columns=range(3))
+    items["score"] = pd.to_numeric(parts[0].str.strip(), errors="coerce")
+    items["probability"] = pd.to_numeric(parts[1].str.strip(), errors="coerce")
+
+    # 기준 단위로 하나라도 잘못된 항목이 있으면 해당 기준 전체를 제외 (단건 파서와 동일한 동작)
+    bad_item = items["score"].isna() | (items["score"] % 1 != 0) | items["probability"].isna() | parts[2].notna()
+    bad_match = bad_item.groupby([items["row"], items["match"]]).transform("any").astype(bool)
+
+    malformed = items.loc[bad_match].drop_duplicates(["row", "match"])[["row", "criterion"]]
+    malformed = malformed.assign(reason="확률분포 파싱 실패")
+    valid = items.loc[~bad_match, ["row", "match", "criterion", "score", "probability"]]
+
+    # 한 응답에 같은 기준이 여러 번 나오면 마지막 항목만 사용 (단건 파서와 동일한 동작)
+    last_match = valid.groupby(["row", "criterion"])["match"].transform("max")
+    return valid[valid["match"] == last_match], malformed
+
+
+def parse_judge_outputs(contents):
+    """
+    여러 평가 응답을 한 번에 파싱하여 기준별 확률분포, 가중합 점수, 총점을 계산합니다.
+    :param contents: LLM 평가 응답 문자열의 리스트/Series
+    :return: (점수 DataFrame, 파싱 실패 DataFrame)
+        점수 DataFrame은 입력과 같은 인덱스를 가지며 기준별 가중합 점수 컬럼, `{기준}_p{점수}` 확률 컬럼,
+        total_proba_score, total_score 컬럼으로 구성됩니다.
+        파싱 실패 DataFrame은 row, criterion, reason 컬럼으로 구성됩니다.
+    """
+    contents = pd.Series(contents, dtype=object)
+    index = contents.index
+    texts = contents.where(contents.map(lambda content: isinstance(content, str)), "").reset_index(drop=True)
+    n_rows = len(texts)
+
+    # 점수 리스트 합계: "[8, 7, 9]" 형태
+    score_lists = texts.str.extract(SCORE_LIST_PATTERN)[0].str.split(",").explode()
+    total_score = (
+        pd.to_numeric(score_lists.str.strip(), errors="coerce").groupby(level=0).sum(min_count=1).reindex(range(n_rows))
+    )
+
+    valid, malformed = _extract_probability_items(texts)
+    criterion_codes, criteria = pd.factorize(valid["criterion"])
+    levels, level_codes = np.unique(valid["score"].to_numpy(dtype=int), return_inverse=True)
+
+    # (행, 기준, 점수) 3차원 확률 배열을 만든 뒤 점수 벡터와의 내적으로 가중합을 한 번에 계산
+    probabilities = np.zeros((n_rows, len(criteria), len(levels)))
+    present = np.zeros((n_rows, len(criteria)), dtype=bool)
+    rows = valid["row"].to_numpy(dtype=int)
+    probabilities[rows, criterion_codes, level_codes] = valid["probability"].to_numpy(dtype=float)
+    present[rows, criterion_codes] = True
+
+    weighted = np.where(present, np.round(probabilities @ levels, 2), np.nan)
+
+    columns = {criterion: weighted[:, i] for i, criterion in enumerate(criteria)}
+    for i, criterion in enumerate(criteria):
+        for j, level in enumerate(levels):
+            columns[f"{criterion}_p{level}"] = np.where(present[:, i], probabilities[:, i, j], np.nan)
+    columns["total_proba_score"] = np.nansum(weighted, axis=1) if len(criteria) else np.zeros(n_rows)
+    columns["total_score"] = total_score.fillna(0).to_numpy()
+    scores = pd.DataFrame(columns, index=index)
+
+    # 확률분포 파싱 실패로 이미 기록된 행은 "평가 기준 없음"으로 중복 기록하지 않음
+    missing = ~present.any(axis=1)
+    missing[malformed["row"].to_numpy(dtype=int)] = False
+    no_criteria = pd.DataFrame({"row": np.flatnonzero(missing), "criterion": None})
+    no_criteria["reason"] = np.where(texts.iloc[no_criteria["row"]].eq("").to_numpy(), "빈 응답", "평가 기준 없음")
+    malformed = pd.concat([malformed, no_criteria], ignore_index=True)
+    malformed["row"] = index[malformed["row"].to_numpy(dtype=int)]
+
+    if not malformed.empty:
+        logger.warning(f"⚠️ {malformed['row'].nunique()}/{n_rows}개 응답에서 파싱 실패 항목이 있습니다.")
+
+    return scores, malformed
+
+
 def process_result(result):
     """
     LLM 응답 데이터를 처리하고 점수 및 가중합 점수를 계산합니다.
@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from modules_common.completion_executor import CompletionExecutor
 from modules_common.load_config import load_config
+from modules_common.response_cache import get_response_cache
 from sentence_generator.modules.execute_with_retries import execute_with_retries
 
 
@@ -19,16 +20,18 @@ API_KEY = config_api["API"]["API_KEY"]
 REQUEST_ID = config_api["API"]["REQUEST_ID"]
 COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
 
+completion_executor = CompletionExecutor(
+    host=COMPLETION_HOST_URL,
+    api_key=API_KEY,
+    request_id=REQUEST_ID,
+    cache=get_response_cache(),
+)
+
 
 def run_sg(original_text, index):
     llm_config_key = f"sg_LLM{index % 3}"
 
     llm_config = config.get(llm_config_key, config["sg_LLM0"])
-    completion_executor = CompletionExecutor(
-        host=COMPLETION_HOST_URL,
-        api_key=API_KEY,
-        request_id=REQUEST_ID,
-    )
 
     preset_text = [
         {
@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from modules_common.completion_executor import CompletionExecutor
 from modules_common.load_config import load_config
+from modules_common.response_cache import get_response_cache
 from sentence_generator.modules.execute_with_retries import execute_with_retries
 from sentence_generator.modules.response_handler import handle_response
 from sentence_generator.modules.result_processor import process_result
@@ -19,13 +20,15 @@ API_KEY = config_api["API"]["API_KEY"]
 REQUEST_ID = config_api["API"]["REQUEST_ID"]
 COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
 
+completion_executor = CompletionExecutor(
+    host=COMPLETION_HOST_URL,
+    api_key=API_KEY,
+    request_id=REQUEST_ID,
+    cache=get_response_cache(),
+)
+
 
 def run_sg_eval(original_text, generated_text):
-    completion_executor = CompletionExecutor(
-        host=COMPLETION_HOST_URL,
-        api_key=API_KEY,
-        request_id=REQUEST_ID,
-    )
     preset_text = [
         {
             "role": config["sg_eval_LLM"]["preset_text"]["system"]["role"],
@@ -4,7 +4,6 @@ import sys
 import time
 
 from loguru import logger
-import pandas as pd
 from tqdm import tqdm
 
 
@@ -12,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from modules_common.completion_executor import CompletionExecutor
 from modules_common.load_config import load_config
+from modules_common.result_sink import ResultSink
 
 
 config_api = load_config("../config/config_api.yaml")
@@ -30,25 +30,15 @@ def process_requests(
 ):
     successful_requests = 0
 
-    with tqdm(total=max_requests, desc="Processing Requests") as pbar:
+    with ResultSink(output_file_path, fieldnames=["Execution", "Response"]) as sink, tqdm(
+        total=max_requests, desc="Processing Requests"
+    ) as pbar:
         while successful_requests < max_requests:
             response_data = completion_executor.execute(request_data)
 
             if response_data:
                 response_data = response_data.replace("\n", " ")
-                new_data = {
-                    "Execution": [successful_requests + 1],
-                    "Response": [response_data],
-                }
-
-                try:
-                    existing_df = pd.read_csv(output_file_path)
-                    new_df = pd.DataFrame(new_data)
-                    updated_df = pd.concat([existing_df, new_df], ignore_index=True)
-                except FileNotFoundError:
-                    updated_df = pd.DataFrame(new_data)
-
-                updated_df.to_csv(output_file_path, index=False)
+                sink.write({"Execution": successful_requests + 1, "Response": response_data})
                 successful_requests += 1
                 pbar.update(1)
             else:
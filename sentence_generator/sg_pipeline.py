@@ -1,26 +1,28 @@
 # -*- coding: utf-8 -*-
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import os
 import sys
 
-import pandas as pd
 from tqdm import tqdm
 
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from loguru import logger
+from modules_common.dataset import read_dataset
+from modules_common.response_cache import get_response_cache
+from modules_common.result_sink import ResultSink, keep_rows
+from modules_common.run_journal import RunJournal, default_journal_path
 from sentence_generator.modules.sentence_generate import run_sg
 from sentence_generator.modules.sentence_generate_eval import run_sg_eval
 
 
 def load_original_texts(file_path):
     """
-    novel_contents.csv 파일에서 tcontent,id 컬럼을 읽어와 리스트로 반환하는 함수.
+    novel_contents.csv 파일(또는 Parquet 데이터셋)에서 tcontent,id 컬럼만 읽어와 리스트로 반환하는 함수.
     """
     try:
-        df = pd.read_csv(file_path)
-        if "tcontent" not in df.columns or "id" not in df.columns:
-            raise ValueError("CSV 파일에 'tcontent' 또는 'id' 컬럼이 존재하지 않습니다.")
+        df = read_dataset(file_path, columns=["tcontent", "id"])
         return df["tcontent"].dropna().astype(str).tolist(), df["id"].tolist()
     except Exception as e:
         logger.error(f"Error loading original texts: {e}")
@@ -59,20 +61,68 @@ def generate_n_sentences(original_text, num_sentences, threshold_proba, threshol
     return generated_texts
 
 
-def save_generated_sentences(id, generated_texts, output_file_path):
+def _generate_and_evaluate(original_text, index):
+    """index에 해당하는 프리셋으로 문장을 하나 생성하고 평가 결과와 함께 반환하는 함수."""
+    generated_text = run_sg(original_text, index)
+    if generated_text is None:
+        return None, None
+    return generated_text, run_sg_eval(original_text, generated_text)
+
+
+def _passes_threshold(eval_result, threshold_proba, threshold_correctness):
+    if eval_result is None:
+        return False
+    sum_scores, proba_score, sum_proba_scores = eval_result
+    return (
+        sum_proba_scores is not None
+        and len(proba_score) > 0
+        and sum_proba_scores >= threshold_proba
+        and proba_score[0] >= threshold_correctness
+    )
+
+
+def generate_n_sentences_speculative(
+    original_text, num_sentences, threshold_proba, threshold_correctness, num_candidates=3
+):
     """
-    생성된 문장을 CSV 파일에 저장하는 함수.
+    sg_LLM0..2 프리셋으로 num_candidates개의 후보를 동시에 생성하고, 도착하는 대로 평가하는 함수.
+    후보가 탈락하면 새 후보를 바로 요청해 num_candidates개를 계속 진행 중으로 유지하며,
+    num_sentences개가 기준을 통과하면 시작 전인 후보는 취소하고, 이미 보낸 요청이 끝날 때까지 기다립니다.
+    이미 보낸 요청은 결과를 쓰지 않아도 비용이 청구되므로, 소설마다 추가 비용은 최대 num_candidates-1건입니다.
     """
-    new_df = pd.DataFrame([{"id": id, **{f"sentence{i + 1}": text for i, text in enumerate(generated_texts)}}])
+    generated_texts = []
+    index = 0
+    pending = set()
+    pool = ThreadPoolExecutor(max_workers=num_candidates)
 
     try:
-        existing_df = pd.read_csv(output_file_path)
-        updated_df = pd.concat([existing_df, new_df], ignore_index=True)
-    except FileNotFoundError:
-        updated_df = pd.DataFrame(new_df)
+        while len(generated_texts) < num_sentences:
+            while len(pending) < num_candidates:
+                pending.add(pool.submit(_generate_and_evaluate, original_text, index))
+                index += 1
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                generated_text, eval_result = future.result()
+                if len(generated_texts) < num_sentences and _passes_threshold(
+                    eval_result, threshold_proba, threshold_correctness
+                ):
+                    generated_texts.append(generated_text.replace("\n", " ").replace('"  "', " "))
+                else:
+                    logger.warning("Score below threshold. Retrying...")
+    finally:
+        # 시작 전인 후보는 취소하고, 이미 전송된 요청은 끝날 때까지 기다려 다음 소설의 요청과 겹쳐 쌓이지 않게 함
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return generated_texts
 
-    updated_df.to_csv(output_file_path, index=False)
-    logger.info(f"✅ Saved generated sentences to {output_file_path}")
+
+def save_generated_sentences(id, generated_texts, sink):
+    """
+    생성된 문장을 결과 저장기(ResultSink)에 한 행으로 추가하는 함수.
+    """
+    sink.write({"id": id, **{f"sentence{i + 1}": text for i, text in enumerate(generated_texts)}})
+    logger.info(f"✅ Saved generated sentences to {sink.path}")
 
 
 def main():
@@ -90,18 +140,55 @@ def main():
         default="novel_contents/novel_content_5.csv",
         help="Input CSV file path",
     )
+    parser.add_argument(
+        "-k",
+        "--speculative",
+        type=int,
+        default=0,
+        help="Number of candidates to generate and evaluate in parallel (0 = sequential)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip ids already completed in the run journal of the output file",
+    )
 
     args = parser.parse_args()
     original_texts, ids = load_original_texts(args.input)
-
-    for original_text, id_value in tqdm(
-        zip(original_texts, ids), desc="Generating sentences", total=len(original_texts)
-    ):
-        generated_texts = generate_n_sentences(
-            original_text, args.num_sentences, args.threshold_proba, args.threshold_correctness
-        )
-        print(generated_texts)
-        save_generated_sentences(id_value, generated_texts, args.output)
+    fieldnames = ["id"] + [f"sentence{i + 1}" for i in range(args.num_sentences)]
+
+    journal = RunJournal(default_journal_path(args.output), resume=args.resume)
+    if args.resume:
+        # 결과 행을 기록한 뒤 작업 일지에 남기기 전에 중단된 id는 다시 생성하므로, 그 id의 이전 출력은 지움
+        removed = keep_rows(args.output, journal.completed_ids("sentences"))
+        if removed:
+            logger.info(f"🧹 Removed {removed} rows not completed in the run journal from {args.output}")
+
+    with ResultSink(args.output, fieldnames=fieldnames) as sink, journal:
+        for original_text, id_value in tqdm(
+            zip(original_texts, ids), desc="Generating sentences", total=len(original_texts)
+        ):
+            if journal.is_done(id_value, "sentences"):
+                logger.info(f"⏩ Skipping id {id_value}: already completed")
+                continue
+
+            if args.speculative > 0:
+                generated_texts = generate_n_sentences_speculative(
+                    original_text,
+                    args.num_sentences,
+                    args.threshold_proba,
+                    args.threshold_correctness,
+                    num_candidates=args.speculative,
+                )
+            else:
+                generated_texts = generate_n_sentences(
+                    original_text, args.num_sentences, args.threshold_proba, args.threshold_correctness
+                )
+            print(generated_texts)
+            save_generated_sentences(id_value, generated_texts, sink)
+            journal.record(id_value, "sentences", generated_texts)
+
+    get_response_cache().log_stats()
 
 
 if __name__ == "__main__":
@@ -11,6 +11,7 @@ import csv
 
 from loguru import logger
 from modules_common.load_config import load_config
+from modules_common.result_sink import ResultSink
 import requests
 from sentence_generator.modules.sentence_generate import run_sg
 from sentence_generator.modules.sentence_generate_eval import run_sg_eval
@@ -58,17 +59,11 @@ def generate_n_sentences(original_text, num_sentences, threshold_proba, threshol
     return generated_texts
 
 
-def save_generated_sentences(id, generated_texts, output_file_path):
+def save_generated_sentences(id, generated_texts, sink):
     """
-    생성된 문장을 CSV 파일에 저장하는 함수.
+    생성된 문장을 결과 저장기(ResultSink)에 한 행으로 추가하는 함수.
     """
-    new_df = pd.DataFrame([{"id": id, **{f"sentence{i + 1}": text for i, text in enumerate(generated_texts)}}])
-    try:
-        existing_df = pd.read_csv(output_file_path)
-        updated_df = pd.concat([existing_df, new_df], ignore_index=True)
-    except FileNotFoundError:
-        updated_df = pd.DataFrame(new_df)
-    updated_df.to_csv(output_file_path, index=False)
+    sink.write({"id": id, **{f"sentence{i + 1}": text for i, text in enumerate(generated_texts)}})
     logger.info("✅ Saved generated sentences")
 
 
@@ -131,11 +126,12 @@ def upload_page():
     if st.button("🚀 Start Process"):
         st.success("🏃‍♂️‍➡️ Processing started!")
         output_file_path = "output_novel_content.csv"
-        for original_text, id_value in tqdm(
-            zip(original_texts, ids), desc="Generating sentences", total=len(original_texts)
-        ):
-            generated_texts = generate_n_sentences(original_text, 1, 20, 6.0)
-            save_generated_sentences(id_value, generated_texts, output_file_path)
+        with ResultSink(output_file_path, fieldnames=["id", "sentence1"]) as sink:
+            for original_text, id_value in tqdm(
+                zip(original_texts, ids), desc="Generating sentences", total=len(original_texts)
+            ):
+                generated_texts = generate_n_sentences(original_text, 1, 20, 6.0)
+                save_generated_sentences(id_value, generated_texts, sink)
 
         send_generated_sentences("output_novel_content.csv")
         st.success("🎉 Processing completed and results saved.🎉")
@@ -1,194 +1,193 @@
+"""
+T2M 연구 프로젝트의 전체 작업을 하나의 프로세스에서 실행합니다.
+각 단계는 메모리의 DataFrame을 주고받는 함수로 실행되며, MusicGen·CLAP 모델과 LLM 클라이언트는 한 번만 로드합니다.
+입력이 이전 실행과 같은 단계는 건너뛰므로(.t2m_workflow_state.json), 다시 실행해도 바뀐 부분만 처리합니다.
+"""
+
+import argparse
 import os
-import subprocess
 import sys
 import urllib.request
 
-import pandas as pd
-
-
-# 실행할 Python 파일 및 간략한 설명
-CHECK_INPUT_TEXT_QUALITY = "check_input_text_quality.py"
-FILTER_INPUT_TEXT_BY_ID = "filter_input_text_by_id.py"
-CLEAN_FILTERED_INPUT_TEXT = "clean_filtered_input_text.py"
-GENERATE_CONTRASTIVE_PROMPTS = "generate_contrastive_prompts.py"
-MUSICGEN_BASIC = "musicgen_basic.py"
-UPDATE_FAILED_MOOD_DATA = "update_failed_mood_data.py"
-
-print("🔍 T2M 연구 프로젝트 스크립트 실행을 시작합니다.\n")
-
-print("⚠️ 이 실행을 위해서는 requirements 설치 및 config_api.yaml에 API 정보 추가가 필요합니다.")
-user_input = input("계속 진행하시겠습니까? (y/n): ").strip().lower()
-
-# 🔍 사용자의 입력값 확인
-if user_input != "y":
-    print("❌ 실행이 취소되었습니다.")
-    sys.exit(0)
-
-
-# 1️⃣ Check Input Text Quality
-print("📝 [Step 1] 입력 텍스트 품질 검사")
-print("  check_input_text_quality.py  → 입력된 텍스트 데이터의 품질을 분석하고 평가하는 코드입니다.")
-print("입력 데이터 : 1480의 id, input_text 컬럼을 가지는 raw_data/input_text.csv")
-print("출력 데이터 : 없음")
-
-
-print("📝 필요 데이터 다운로드중..")
-
-# Google Drive에서 다운로드할 파일의 ID
-FILE_ID = "1NRhquhVtdlZxjZuYmOwfvw2VuKLqkgo_"
-OUTPUT_FILE = "raw_data/input_text.csv"  # 저장할 파일명
-# Google Drive 직접 다운로드 URL
-GDRIVE_URL = f"https://drive.google.com/uc?export=download&id={FILE_ID}"
-# 파일 다운로드
-urllib.request.urlretrieve(GDRIVE_URL, OUTPUT_FILE)
-
-print(f"✅ 필요 데이터 파일 다운로드 완료: {OUTPUT_FILE}")
-
-try:
-    subprocess.run(["python", CHECK_INPUT_TEXT_QUALITY], check=True)
-    print("✅ 실행 완료: check_input_text_quality.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {CHECK_INPUT_TEXT_QUALITY}\n  오류 메시지: {e}\n")
-
-
-# 2️⃣ Filter Input Text by ID
-print("🔍 [Step 2] ID 기반 입력 텍스트 필터링")
-print("    → 특정 ID를 기준으로 불필요한 텍스트를 제거합니다.")
-print("  filter_input_text_by_id.py  → 전체 input_text중 품질이 좋은 데이터만 선별하여 별도로 저장하는 역할입니다.")
-print(
-    "입력 데이터 : \
-      like기준으로 품질이 좋은 상위 100개의 데이터파일 novel_content_100_likes.csv"
-)
-print(
-    "입력 데이터 : \
-      likeperson기준으로 품질이 좋은 상위 100개의 데이터파일 novel_content_100_likespernumber.csv"
-)
-print(
-    "출력 데이터 : \
-      like기준으로 상위 100개의 id, input_text 컬럼을 가지는 raw_data/like_input_text.csv.csv"
-)
-print(
-    "출력 데이터 : \
-      likeperson 기준으로 상위 100개의 id, input_text 컬럼을 가지는 raw_data/likepernumber_input_text.csv"
-)
-
-print("📝 필요 데이터 다운로드 중..")
-
-# 🔹 입력 데이터 1: like 기준으로 품질이 좋은 상위 100개 데이터 파일
-FILE_ID_1 = "1NT_-7_CKn2IILtrwnhmNbYjDxLdRA1uL"
-OUTPUT_FILE_1 = "refined_data/novel_content_100_likes.csv"
-# Google Drive 직접 다운로드 URL
-GDRIVE_URL_1 = f"https://drive.google.com/uc?export=download&id={FILE_ID_1}"
-# 파일 다운로드
-urllib.request.urlretrieve(GDRIVE_URL_1, OUTPUT_FILE_1)
-print(f"✅ 필요 데이터 파일 다운로드 완료: {OUTPUT_FILE_1}")
-
-# 🔹 입력 데이터 2: likeperson 기준으로 품질이 좋은 상위 100개 데이터 파일
-FILE_ID_2 = "1muqZGG4Ju55Cf62M39mHRo6h6i8xzPc1"
-OUTPUT_FILE_2 = "refined_data/novel_content_100_likespernumber.csv"
-# Google Drive 직접 다운로드 URL
-GDRIVE_URL_2 = f"https://drive.google.com/uc?export=download&id={FILE_ID_2}"
-# 파일 다운로드
-urllib.request.urlretrieve(GDRIVE_URL_2, OUTPUT_FILE_2)
-print(f"✅ 필요 데이터 파일 다운로드 완료: {OUTPUT_FILE_2}")
-
-
-try:
-    subprocess.run(["python", FILTER_INPUT_TEXT_BY_ID], check=True)
-    print("✅ 실행 완료: filter_input_text_by_id.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {FILTER_INPUT_TEXT_BY_ID}\n  오류 메시지: {e}\n")
-
-# 3️⃣ Clean Filtered Input Text
-
-print("🧹 [Step 3] 필터링된 입력 텍스트 정리")
-print("  clean_filtered_input_text.py  → 정제된 데이터를 저장하고 불필요한 기호나 공백을 제거합니다.")
-print(
-    "입력 데이터 : \
-      like기준으로 상위 100개의 id, input_text 컬럼을 가지는 raw_data/like_input_text.csv.csv"
-)
-print(
-    "입력 데이터 : \
-      likeperson 기준으로 상위 100개의 id, input_text 컬럼을 가지는 raw_data/likepernumber_input_text.csv"
-)
-print(
-    "생성 데이터 : \
-      해당 데이터의 중복데이터를 정리한 cleaned_like_input_text.csv"
-)
-print(
-    "생성 데이터 : \
-      해당 데이터의 중복데이터를 정리한 cleaned_likepernumber_input_text.csv"
-)
-try:
-    subprocess.run(["python", CLEAN_FILTERED_INPUT_TEXT], check=True)
-    print("✅ 실행 완료: clean_filtered_input_text.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {CLEAN_FILTERED_INPUT_TEXT}\n  오류 메시지: {e}\n")
-
-# 4️⃣ Generate Contrastive Prompts (대조문장 생성)
-print("🔄 [Step 4] 대조 문장 생성")
-print("  generate_contrastive_prompts.py  → 원본 문장과 반대되는 의미의 문장을 생성하여 비교 분석합니다.")
-print(
-    "위의 데이터는 100개가 아니기 때문에 정확히 100개씩 작업된 데이터를 다시 불러옵니다. \
-      그리고 테스트편의성을 위해 상위 3개의 행만 테스트합니다."
-)
-print("생성 데이터 : 음악생성을 위한 contrasted_likepernumber_input_text.csv")
-
-FILE_ID_1 = "1epPvcJJtC67yMlEWsBfQYRibkdMOoV2-"
-OUTPUT_FILE_1 = "refined_data/novel_content_100_likes_input_text.csv"
-GDRIVE_URL_1 = f"https://drive.google.com/uc?export=download&id={FILE_ID_1}"
-FILE_ID_2 = "1r8O6fSPj2Ia-0xPypUUVJf6MZvgyPCxH"
-OUTPUT_FILE_2 = "refined_data/novel_content_100_likespernumber_input_text.csv"
-GDRIVE_URL_2 = f"https://drive.google.com/uc?export=download&id={FILE_ID_2}"
-urllib.request.urlretrieve(GDRIVE_URL_2, OUTPUT_FILE_2)
-print(f"✅ 필요 데이터 파일 다운로드 완료: {OUTPUT_FILE_2}\n")
-urllib.request.urlretrieve(GDRIVE_URL_1, OUTPUT_FILE_1)
-print(f"✅ 필요 데이터 파일 다운로드 완료: {OUTPUT_FILE_1}\n")
-# 📥 CSV 파일 불러오기
-df = pd.read_csv(OUTPUT_FILE_2)
-# 🔍 상위 3개 행만 유지
-df_top3 = df.head(3)
-# 💾 동일한 파일명으로 다시 저장 (기존 데이터 덮어쓰기)
-df_top3.to_csv(OUTPUT_FILE_2, index=False)
-
-try:
-    subprocess.run(["python", GENERATE_CONTRASTIVE_PROMPTS], check=True)
-    print("✅ 실행 완료: generate_contrastive_prompts.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {GENERATE_CONTRASTIVE_PROMPTS}\n  오류 메시지: {e}\n")
-
-# 5️⃣ MusicGen 기본 실행
-print("🎵 [Step 5] MusicGen 모델 실행")
-print(" musicgen_basic.py  → 텍스트를 기반으로 음악을 생성하는 핵심 T2M 모델 실행")
-try:
-    subprocess.run(["python", MUSICGEN_BASIC], check=True)
-    print("✅ 실행 완료: musicgen_basic.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {MUSICGEN_BASIC}\n  오류 메시지: {e}\n")
-
-# 6️⃣ Update Failed Mood Data
-print("🛠️ [Step 6] 실패한 감정 데이터 업데이트")
-print(
-    "  update_failed_mood_data.py  → CLAP 평가에서 낮은 점수를 얻어 생성되지 않은 wav 데이터를 찾고,\
-       해당 id의 positive mood와 negative mood를 재생성합니다."
-)
-print("확인을 위해 임시로 만들어진 wav파일을 하나 삭제 후 코드를 실행합니다. 그리고 다시 음악을 생성합니다")
-
-file_path = "generated_music/likepernumber/450006.wav"
-if os.path.exists(file_path):
-    os.remove(file_path)
-try:
-    subprocess.run(["python", UPDATE_FAILED_MOOD_DATA], check=True)
-    print("✅ 실행 완료: update_failed_mood_data.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {UPDATE_FAILED_MOOD_DATA}\n  오류 메시지: {e}\n")
-
-print(" musicgen_basic.py  → 텍스트를 기반으로 음악을 생성하는 핵심 T2M 모델 재 실행")
-try:
-    subprocess.run(["python", MUSICGEN_BASIC], check=True)
-    print("✅ 실행 완료: musicgen_basic.py\n")
-except subprocess.CalledProcessError as e:
-    print(f"❌ 실행 실패: {MUSICGEN_BASIC}\n  오류 메시지: {e}\n")
-
-
-print("\n✅ 모든 스크립트 실행이 완료되었습니다.")
+from loguru import logger
+import yaml
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from check_input_text_quality import check_input_text_quality
+from clean_filtered_input_text import clean_input_text
+from filter_input_text_by_id import filter_input_text_by_id
+from generate_contrastive_prompts import generate_moods
+from mood_extractor import DEFAULT_MAX_CONCURRENCY, FAILED_MOOD, MOOD_COLUMNS, create_mood_extractor
+from t2m_reconcile import output_fingerprint
+from t2m_workflow import DEFAULT_STATE_PATH, Workflow, WorkflowStage
+from update_failed_mood_data import regenerate_failed_moods
+
+
+# Google Drive에서 다운로드할 파일 (저장 경로: 파일 ID)
+DOWNLOADS = {
+    # 1480의 id, musicgen_input_text 컬럼을 가지는 전체 input text
+    "raw_data/input_text.csv": "1NRhquhVtdlZxjZuYmOwfvw2VuKLqkgo_",
+    # like 기준으로 품질이 좋은 상위 100개의 데이터
+    "refined_data/novel_content_100_likes.csv": "1NT_-7_CKn2IILtrwnhmNbYjDxLdRA1uL",
+    # likeperson 기준으로 품질이 좋은 상위 100개의 데이터
+    "refined_data/novel_content_100_likespernumber.csv": "1muqZGG4Ju55Cf62M39mHRo6h6i8xzPc1",
+    # 정확히 100개씩 작업된 input text
+    "refined_data/novel_content_100_likes_input_text.csv": "1epPvcJJtC67yMlEWsBfQYRibkdMOoV2-",
+    "refined_data/novel_content_100_likespernumber_input_text.csv": "1r8O6fSPj2Ia-0xPypUUVJf6MZvgyPCxH",
+}
+GDRIVE_URL = "https://drive.google.com/uc?export=download&id={file_id}"
+
+# 워크플로 단계가 주고받는 데이터와 저장 경로
+ARTIFACTS = {
+    "input_text": "raw_data/input_text.csv",
+    "likes": "refined_data/novel_content_100_likes.csv",
+    "likespernumber": "refined_data/novel_content_100_likespernumber.csv",
+    "like_input_text": "refined_data/like_input_text.csv",
+    "likepernumber_input_text": "refined_data/likepernumber_input_text.csv",
+    "cleaned_like_input_text": "refined_data/cleaned_like_input_text.csv",
+    "cleaned_likepernumber_input_text": "refined_data/cleaned_likepernumber_input_text.csv",
+    "contrastive_source": "refined_data/novel_content_100_likespernumber_input_text.csv",
+    "contrastive_input": "refined_data/novel_content_100_likespernumber_input_text_sample.csv",
+    "contrasted": "refined_data/contrasted_likepernumber_input_text.csv",
+}
+
+SAMPLE_ROWS = 3  # 테스트 편의성을 위해 대조 문장은 상위 3개 행만 생성
+DEMO_REMOVE_ID = 450006  # 실패 데이터 업데이트 확인을 위해 임시로 삭제할 wav id
+
+
+def download_inputs():
+    """필요 데이터를 Google Drive에서 다운로드합니다."""
+    print("📝 필요 데이터 다운로드중..")
+    for output_file, file_id in DOWNLOADS.items():
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        urllib.request.urlretrieve(GDRIVE_URL.format(file_id=file_id), output_file)
+        print(f"✅ 필요 데이터 파일 다운로드 완료: {output_file}")
+
+
+class T2MStages:
+    """T2M 워크플로의 단계 함수. LLM 클라이언트는 처음 필요할 때 한 번만 만듭니다."""
+
+    def __init__(self, output_dir, mode=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.output_dir = output_dir
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self._mood_extractor = None
+
+    @property
+    def mood_extractor(self):
+        if self._mood_extractor is None:
+            self._mood_extractor = create_mood_extractor(mode=self.mode)
+        return self._mood_extractor
+
+    def check_quality(self, input_text):
+        """1️⃣ 입력된 텍스트 데이터의 품질을 분석합니다. (출력 데이터 없음)"""
+        check_input_text_quality(input_text)
+
+    def filter_by_id(self, input_text, likes, likespernumber):
+        """2️⃣ 전체 input text 중 like/likeperson 기준 상위 100개 id의 데이터만 선별합니다."""
+        return filter_input_text_by_id(input_text, likes), filter_input_text_by_id(input_text, likespernumber)
+
+    def clean(self, like_input_text, likepernumber_input_text):
+        """3️⃣ 중복된 id와 비어있는 input text를 제거합니다."""
+        return (
+            clean_input_text(like_input_text, name="like_input_text"),
+            clean_input_text(likepernumber_input_text, name="likepernumber_input_text"),
+        )
+
+    def sample(self, contrastive_source):
+        return contrastive_source.head(SAMPLE_ROWS)
+
+    def generate_contrastive_prompts(self, contrastive_input):
+        """4️⃣ input text의 positive/negative mood를 생성합니다."""
+        return generate_moods(contrastive_input, self.mood_extractor, max_concurrency=self.max_concurrency)
+
+    def generate_music(self, contrasted):
+        """5️⃣ MusicGen으로 wav가 없거나 손상된 id의 음악을 생성합니다. (모델은 프로세스에서 한 번만 로드)"""
+        import musicgen_basic  # torch/audiocraft는 음악 생성이 필요할 때만 import
+
+        # CSV에서 다시 읽으면 "N/A" 분위기가 NaN이 되므로 문자열로 되돌림
+        rows = contrasted.fillna({column: FAILED_MOOD for column in MOOD_COLUMNS}).to_dict("records")
+        musicgen_basic.generate_music(rows, output_dir=self.output_dir)
+
+    def remove_demo_wav(self):
+        """확인을 위해 임시로 만들어진 wav 파일을 하나 삭제합니다."""
+        file_path = os.path.join(self.output_dir, f"{DEMO_REMOVE_ID}.wav")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def update_failed_moods(self, contrasted):
+        """6️⃣ 생성되지 않은 wav의 id를 찾아 positive/negative mood를 다시 생성합니다."""
+        df, _ = regenerate_failed_moods(
+            contrasted, self.mood_extractor, output_dir=self.output_dir, max_concurrency=self.max_concurrency
+        )
+        return df
+
+
+def build_workflow(output_dir, mode=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, demo=True, force=False):
+    t2m = T2MStages(output_dir, mode=mode, max_concurrency=max_concurrency)
+
+    def wav_fingerprint():
+        return output_fingerprint(output_dir)
+
+    stages = [
+        WorkflowStage("check_input_text_quality", t2m.check_quality, inputs=["input_text"]),
+        WorkflowStage(
+            "filter_input_text_by_id",
+            t2m.filter_by_id,
+            inputs=["input_text", "likes", "likespernumber"],
+            outputs=["like_input_text", "likepernumber_input_text"],
+        ),
+        WorkflowStage(
+            "clean_filtered_input_text",
+            t2m.clean,
+            inputs=["like_input_text", "likepernumber_input_text"],
+            outputs=["cleaned_like_input_text", "cleaned_likepernumber_input_text"],
+        ),
+        WorkflowStage("sample_contrastive_input", t2m.sample, ["contrastive_source"], ["contrastive_input"]),
+        WorkflowStage(
+            "generate_contrastive_prompts", t2m.generate_contrastive_prompts, ["contrastive_input"], ["contrasted"]
+        ),
+        WorkflowStage("musicgen_basic", t2m.generate_music, ["contrasted"], fingerprint=wav_fingerprint),
+    ]
+    if demo:
+        stages.append(WorkflowStage("remove_demo_wav", t2m.remove_demo_wav, cache=False))
+    stages += [
+        WorkflowStage(
+            "update_failed_mood_data", t2m.update_failed_moods, ["contrasted"], ["contrasted"], wav_fingerprint
+        ),
+        WorkflowStage("musicgen_basic_retry", t2m.generate_music, ["contrasted"], fingerprint=wav_fingerprint),
+    ]
+    return Workflow(ARTIFACTS, stages, state_path=DEFAULT_STATE_PATH, force=force)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="T2M 연구 프로젝트의 전체 작업을 하나의 프로세스에서 실행합니다.")
+    parser.add_argument("--offline", action="store_true", help="데이터를 다시 다운로드하지 않고 기존 파일 사용")
+    parser.add_argument("--force", action="store_true", help="이전 실행 기록을 무시하고 모든 단계를 실행")
+    parser.add_argument("--no-demo", action="store_true", help=f"확인용 wav({DEMO_REMOVE_ID}.wav) 삭제 단계를 생략")
+    parser.add_argument("--mode", choices=["combined", "separate"], default=None, help="분위기 추출 모드")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="동시에 보낼 최대 요청 수")
+    args = parser.parse_args()
+
+    print("🔍 T2M 연구 프로젝트 워크플로 실행을 시작합니다.\n")
+    print("⚠️ 이 실행을 위해서는 requirements 설치 및 config_api.yaml에 API 정보 추가가 필요합니다.")
+
+    with open("config.yaml", "r") as file:
+        output_dir = yaml.safe_load(file)["output_dir"]
+
+    if not args.offline:
+        download_inputs()
+
+    workflow = build_workflow(
+        output_dir, mode=args.mode, max_concurrency=args.max_concurrency, demo=not args.no_demo, force=args.force
+    )
+    executed = workflow.run()
+    logger.info(f"실행한 단계: {executed}")
+
+    print("\n✅ 모든 단계 실행이 완료되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
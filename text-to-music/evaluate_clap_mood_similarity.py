@@ -3,8 +3,9 @@ import os
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
+import torch
 import torchaudio
-from transformers import pipeline
+from transformers import ClapModel, ClapProcessor
 import yaml
 
 
@@ -17,22 +18,102 @@ output_dir = config["output_dir"]  # 예: "generated_music/like"
 input_csv = config["input_csv"]  # 예: "refined_data/contrasted_likepernumber_input_text.csv"
 
 
-# CLAP (LAION) 평가 함수
-def evaluate_audio_clap_laion(audio_path, candidate_labels):
-    """CLAP (LAION) 모델을 사용하여 오디오의 분위기 점수를 평가"""
-    # Load audio
+CLAP_MODEL_NAME = "laion/clap-htsat-fused"
+HYPOTHESIS_TEMPLATE = "This is a sound of {}."  # zero-shot-audio-classification pipeline 기본 템플릿
+
+
+class ClapScorer:
+    """
+    CLAP (LAION) 모델을 한 번만 로드해 두고 여러 오디오의 분위기 점수를 계산하는 클래스.
+    라벨별 텍스트 임베딩은 캐시하고, 오디오 임베딩은 batch_size개씩 한 번의 forward로 계산합니다.
+    """
+
+    def __init__(self, model_name=CLAP_MODEL_NAME, device="cpu", batch_size=8):
+        self.device = device
+        self.batch_size = batch_size
+        self.processor = ClapProcessor.from_pretrained(model_name)
+        self.model = ClapModel.from_pretrained(model_name).to(device).eval()
+        self.sampling_rate = self.processor.feature_extractor.sampling_rate
+        self._text_embeddings = {}
+
+    @torch.no_grad()
+    def embed_labels(self, labels):
+        """라벨 리스트의 정규화된 텍스트 임베딩을 반환합니다. 처음 보는 라벨만 모델에 통과시킵니다."""
+        missing = [label for label in dict.fromkeys(labels) if label not in self._text_embeddings]
+        if missing:
+            inputs = self.processor.tokenizer(
+                [HYPOTHESIS_TEMPLATE.format(label) for label in missing], return_tensors="pt", padding=True
+            ).to(self.device)
+            embeddings = torch.nn.functional.normalize(self.model.get_text_features(**inputs), dim=-1)
+            self._text_embeddings.update(zip(missing, embeddings))
+        return torch.stack([self._text_embeddings[label] for label in labels])
+
+    @torch.no_grad()
+    def embed_audios(self, waveforms):
+        """모노 오디오(1D numpy 배열) 리스트의 정규화된 오디오 임베딩을 배치 단위로 계산합니다."""
+        embeddings = []
+        for start in range(0, len(waveforms), self.batch_size):
+            inputs = self.processor.feature_extractor(
+                waveforms[start : start + self.batch_size], sampling_rate=self.sampling_rate, return_tensors="pt"
+            ).to(self.device)
+            embeddings.append(torch.nn.functional.normalize(self.model.get_audio_features(**inputs), dim=-1))
+        return torch.cat(embeddings)
+
+    @torch.no_grad()
+    def classify(self, waveforms, label_sets):
+        """
+        오디오마다 주어진 후보 라벨에 대한 zero-shot 분류 확률을 계산합니다.
+        :param waveforms: 모노 오디오(1D numpy 배열) 리스트
+        :param label_sets: 오디오별 후보 라벨 리스트
+        :return: 오디오별 {라벨: 확률} 딕셔너리 리스트
+        """
+        if not waveforms:
+            return []
+
+        audio_embeddings = self.embed_audios(waveforms)
+        logit_scale = self.model.logit_scale_a.exp()
+        results = []
+        for audio_embedding, labels in zip(audio_embeddings, label_sets):
+            probs = (logit_scale * self.embed_labels(labels) @ audio_embedding).softmax(dim=0)
+            results.append(dict(zip(labels, probs.tolist())))
+        return results
+
+    def score_moods(self, waveforms, positive_labels, negative_labels):
+        """(오디오, positive 라벨, negative 라벨) 묶음들의 분위기 점수를 한 번에 계산합니다."""
+        label_sets = [[positive, negative] for positive, negative in zip(positive_labels, negative_labels)]
+        return [
+            {"positive_score": scores[positive], "negative_score": scores[negative]}
+            for scores, (positive, negative) in zip(self.classify(waveforms, label_sets), label_sets)
+        ]
+
+
+_clap_scorer = None
+
+
+def get_clap_scorer():
+    """프로세스에서 공유하는 ClapScorer를 반환합니다. 처음 호출할 때 한 번만 모델을 로드합니다."""
+    global _clap_scorer
+    if _clap_scorer is None:
+        _clap_scorer = ClapScorer()
+    return _clap_scorer
+
+
+def load_mono_audio(audio_path):
+    """오디오 파일을 읽어 모노 numpy 배열로 반환합니다."""
     waveform, sample_rate = torchaudio.load(audio_path)
-    mono_audio = waveform.mean(dim=0).numpy()  # Mono 처리
+    return waveform.mean(dim=0).numpy()  # Mono 처리
 
-    # Initialize CLAP (LAION) classifier (fused version)
-    audio_classifier = pipeline(task="zero-shot-audio-classification", model="laion/clap-htsat-fused")
 
-    # Run classification
-    output = audio_classifier(mono_audio, candidate_labels=candidate_labels)
+# CLAP (LAION) 평가 함수
+def evaluate_audio_clap_laion(audio_path, candidate_labels):
+    """CLAP (LAION) 모델을 사용하여 오디오의 분위기 점수를 평가"""
+    mono_audio = load_mono_audio(audio_path)
+    scores = get_clap_scorer().classify([mono_audio], [list(candidate_labels)])[0]
 
     # Convert to DataFrame
-    scores = pd.DataFrame(output)
-    return scores
+    return pd.DataFrame(
+        sorted(({"score": score, "label": label} for label, score in scores.items()), key=lambda x: -x["score"])
+    )
 
 
 def evaluate_audio_mood_scores(audio_path, positive_label, negative_label):
@@ -48,25 +129,47 @@ def evaluate_audio_mood_scores(audio_path, positive_label, negative_label):
     Returns:
         dict: {"positive_score": float, "negative_score": float}
     """
-    # ✅ 폴더가 없으면 생성
-    os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+    return evaluate_audio_mood_scores_batch([audio_path], [positive_label], [negative_label])[0]
 
-    if not os.path.exists(audio_path):
-        print(f"⚠️ 파일 없음: {audio_path}, 건너뜁니다.")
-        return None
 
-    try:
-        scores = evaluate_audio_clap_laion(audio_path, [positive_label, negative_label])
+def evaluate_audio_mood_scores_batch(audio_paths, positive_labels, negative_labels):
+    """
+    여러 오디오 파일의 CLAP 분위기 점수를 배치로 계산하는 함수.
+    파일이 없거나 처리 중 오류가 발생한 항목은 None을 반환합니다.
+
+    Returns:
+        list: 입력 순서대로 {"positive_score": float, "negative_score": float} 또는 None
+    """
+    results = [None] * len(audio_paths)
+    batch = []
+    for i, audio_path in enumerate(audio_paths):
+        # ✅ 폴더가 없으면 생성
+        os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+
+        if not os.path.exists(audio_path):
+            print(f"⚠️ 파일 없음: {audio_path}, 건너뜁니다.")
+            continue
 
-        # 분위기 점수를 추출
-        positive_score = scores[scores["label"] == positive_label]["score"].values[0]
-        negative_score = scores[scores["label"] == negative_label]["score"].values[0]
+        try:
+            batch.append((i, load_mono_audio(audio_path)))
+        except Exception as e:
+            print(f"Error processing {audio_path}: {e}")
 
-        return {"positive_score": positive_score, "negative_score": negative_score}
+    if not batch:
+        return results
 
+    indices, waveforms = zip(*batch)
+    try:
+        scores = get_clap_scorer().score_moods(
+            list(waveforms), [positive_labels[i] for i in indices], [negative_labels[i] for i in indices]
+        )
     except Exception as e:
-        print(f"Error processing {audio_path}: {e}")
-        return None
+        print(f"Error processing CLAP batch: {e}")
+        return results
+
+    for i, mood_scores in zip(indices, scores):
+        results[i] = mood_scores
+    return results
 
 
 if __name__ == "__main__":
@@ -82,13 +185,13 @@ if __name__ == "__main__":
 
     threshold = 0.5  # ✅ 재생성 기준으로 활용할 수 있는 최소 Positive 점수
 
-    for idx, row in df_input.iterrows():
-        audio_id = row["id"]
-        audio_path = os.path.join(output_dir, f"{audio_id}.wav")
-
-        # CLAP 점수 평가
-        mood_scores = evaluate_audio_mood_scores(audio_path, row["positive_mood"], row["negative_mood"])
+    # CLAP 점수 평가 (모델은 한 번만 로드하고 배치로 평가)
+    audio_paths = [os.path.join(output_dir, f"{audio_id}.wav") for audio_id in df_input["id"]]
+    batch_scores = evaluate_audio_mood_scores_batch(
+        audio_paths, df_input["positive_mood"].tolist(), df_input["negative_mood"].tolist()
+    )
 
+    for audio_id, mood_scores in zip(df_input["id"], batch_scores):
         if mood_scores:
             # 결과 저장
             results.append(
@@ -1,25 +1,39 @@
 import os
+import sys
 
-import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules_common.dataset import read_dataset
 
 
 # 폴더 경로 설정
 raw_data_path = "raw_data/input_text.csv"
 refined_data_folder = "refined_data"
 
-# 파일 로드
-input_text_df = pd.read_csv(raw_data_path)  # input_text.csv (id, musicgen_input_text)
-like_df = pd.read_csv(os.path.join(refined_data_folder, "novel_content_100_likes.csv"))  # id만 있음
-likepernumber_df = pd.read_csv(os.path.join(refined_data_folder, "novel_content_100_likespernumber.csv"))  # id만 있음
-
-# 정제 과정: like.csv 기준 필터링
-like_filtered_df = input_text_df[input_text_df["id"].isin(like_df["id"])]
+like_path = os.path.join(refined_data_folder, "novel_content_100_likes.csv")
+likepernumber_path = os.path.join(refined_data_folder, "novel_content_100_likespernumber.csv")
 like_filtered_path = os.path.join(refined_data_folder, "like_input_text.csv")
-like_filtered_df.to_csv(like_filtered_path, index=False)
-print(f"✅ {like_filtered_path} 저장 완료. {len(like_filtered_df)}개 데이터")
-
-# 정제 과정: likepernumber.csv 기준 필터링
-likepernumber_filtered_df = input_text_df[input_text_df["id"].isin(likepernumber_df["id"])]
 likepernumber_filtered_path = os.path.join(refined_data_folder, "likepernumber_input_text.csv")
-likepernumber_filtered_df.to_csv(likepernumber_filtered_path, index=False)
-print(f"✅ {likepernumber_filtered_path} 저장 완료. {len(likepernumber_filtered_df)}개 데이터")
+
+
+def filter_input_text_by_id(input_text_df, id_df):
+    """input_text_df에서 id_df에 있는 id의 행만 남깁니다."""
+    return input_text_df[input_text_df["id"].isin(id_df["id"])]
+
+
+if __name__ == "__main__":
+    # 파일 로드
+    input_text_df = read_dataset(raw_data_path)  # input_text.csv (id, musicgen_input_text)
+    like_df = read_dataset(like_path, columns=["id"])  # id만 사용
+    likepernumber_df = read_dataset(likepernumber_path, columns=["id"])  # id만 사용
+
+    # 정제 과정: like.csv 기준 필터링
+    like_filtered_df = filter_input_text_by_id(input_text_df, like_df)
+    like_filtered_df.to_csv(like_filtered_path, index=False)
+    print(f"✅ {like_filtered_path} 저장 완료. {len(like_filtered_df)}개 데이터")
+
+    # 정제 과정: likepernumber.csv 기준 필터링
+    likepernumber_filtered_df = filter_input_text_by_id(input_text_df, likepernumber_df)
+    likepernumber_filtered_df.to_csv(likepernumber_filtered_path, index=False)
+    print(f"✅ {likepernumber_filtered_path} 저장 완료. {len(likepernumber_filtered_df)}개 데이터")
@@ -5,9 +5,9 @@ input text의 positive mood와 negative mood를 생성한 후 원본 csv에 컬
 """
 
 # -*- coding: utf-8 -*-
+import argparse
 import os
 import sys
-import time  # ✅ 시간 지연을 위한 모듈 추가
 
 from loguru import logger
 import pandas as pd
@@ -15,18 +15,17 @@ import pandas as pd
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from modules_common.completion_executor import CompletionExecutor
-from modules_common.load_config import load_config
+from modules_common.response_cache import get_response_cache
+from modules_common.run_journal import RunJournal, default_journal_path
+from mood_extractor import (
+    DEFAULT_MAX_CONCURRENCY,
+    FAILED_MOOD,
+    MOOD_COLUMNS,
+    MOOD_TYPES,
+    create_mood_extractor,
+)
 
 
-# ✅ API 설정 로드
-config_api = load_config("../config/config_api.yaml")
-config = load_config("../config/config_contrastive.yaml")
-
-API_KEY = config_api["API"]["API_KEY"]
-REQUEST_ID = config_api["API"]["REQUEST_ID"]
-COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
-
 # ✅ 파일 경로 설정
 REFINED_DATA_FOLDER = "refined_data"
 
@@ -39,100 +38,75 @@ OUTPUT_FILES = [
 ]
 
 
-# ✅ LLM 프롬프트 요청 함수 (지수적 백오프 적용)
-def request_mood(original_text, mood_type, retry_count=5, delay=2):
-    """LLM을 사용해 주어진 텍스트의 분위기(positive/negative)를 생성"""
-    if retry_count == 0:
-        logger.error(f"🚨 재생성 한도를 초과하여 기본값 반환 ({mood_type})")
-        return "N/A"  # 기본값 반환
-
-    completion_executor = CompletionExecutor(
-        host=COMPLETION_HOST_URL,
-        api_key=API_KEY,
-        request_id=REQUEST_ID,
+def generate_moods(df, mood_extractor, journal=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    df의 musicgen_input_text마다 positive/negative mood를 생성해 컬럼으로 추가한 새 DataFrame을 반환합니다.
+    :param journal: 작업 일지 (선택). 두 분위기가 모두 기록된 행은 다시 요청하지 않고, 새로 생성한 결과를 기록합니다.
+    """
+    df = df.copy()
+    row_ids = df["id"].astype(str)
+
+    # ✅ 작업 일지에 완료된 결과가 있으면 재사용 (두 분위기가 모두 기록된 행만 건너뜀)
+    for mood_type, column in zip(MOOD_TYPES, MOOD_COLUMNS):
+        if journal is None:
+            df[column] = None
+        else:
+            df[column] = row_ids.map(lambda row_id, mood_type=mood_type: journal.get(row_id, mood_type))
+    pending = df[MOOD_COLUMNS].isna().any(axis=1)
+    logger.info(f"📒 작업 일지 재사용 {int((~pending).sum())}개, 새로 요청 {int(pending.sum())}개")
+
+    def record_moods(idx, moods):
+        for mood_type, mood in moods.items():
+            if mood != FAILED_MOOD:  # 실패한 결과는 기록하지 않아 다음 실행에서 다시 요청
+                journal.record(row_ids[idx], mood_type, mood)
+
+    # ✅ 분위기 및 반대 분위기 생성 후 한 번에 컬럼에 반영
+    moods = mood_extractor.extract_many(
+        df.loc[pending, "musicgen_input_text"],
+        max_concurrency=max_concurrency,
+        on_result=record_moods if journal is not None else None,
     )
+    df.loc[pending, MOOD_COLUMNS] = moods[MOOD_COLUMNS]
+    return df
+
+
+def main():
+    # ✅ 실행 옵션
+    parser = argparse.ArgumentParser(description="Input text의 positive/negative mood를 생성합니다.")
+    parser.add_argument("--resume", action="store_true", help="작업 일지에 기록된 완료 행은 다시 요청하지 않음")
+    parser.add_argument(
+        "--mode",
+        choices=["combined", "separate"],
+        default=None,
+        help="combined: JSON 한 번의 요청으로 두 분위기 생성, separate: 분위기별 요청을 동시에 실행 "
+        "(기본: 설정에 user_combined 프롬프트가 있으면 combined)",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="동시에 보낼 최대 요청 수")
+    args = parser.parse_args()
+
+    mood_extractor = create_mood_extractor(mode=args.mode)
+    logger.info(f"🎛️ 분위기 추출 모드: {mood_extractor.mode}, 최대 동시 요청 수: {args.max_concurrency}")
+
+    # ✅ CSV 처리
+    for input_file, output_file in zip(INPUT_FILES, OUTPUT_FILES):
+        input_path = os.path.join(REFINED_DATA_FOLDER, input_file)
+        output_path = os.path.join(REFINED_DATA_FOLDER, output_file)
+
+        if not os.path.exists(input_path):
+            logger.warning(f"⚠️ 파일 없음: {input_path}, 건너뜁니다.")
+            continue
+
+        logger.info(f"📂 {input_path} 처리 중...")
+
+        with RunJournal(default_journal_path(output_path), resume=args.resume) as journal:
+            df = generate_moods(pd.read_csv(input_path), mood_extractor, journal, args.max_concurrency)
+
+        # ✅ CSV 저장
+        df.to_csv(output_path, index=False)
+        logger.info(f"✅ {output_path} 저장 완료! 총 {len(df)}개 행 처리 완료.")
+
+    get_response_cache().log_stats()
+
 
-    user_prompt_key = "user_positive" if mood_type == "positive" else "user_negative"
-
-    preset_text = [
-        {
-            "role": config["contrastive_LLM"]["preset_text"]["system"]["role"],
-            "content": config["contrastive_LLM"]["preset_text"]["system"]["content"],
-        },
-        {
-            "role": config["contrastive_LLM"]["preset_text"][user_prompt_key]["role"],
-            "content": config["contrastive_LLM"]["preset_text"][user_prompt_key]["content"].replace(
-                "{original_text}", original_text
-            ),
-        },
-    ]
-
-    request_data = {
-        "messages": preset_text,
-        "topP": config["contrastive_LLM"]["request_params"]["topP"],
-        "topK": config["contrastive_LLM"]["request_params"]["topK"],
-        "maxTokens": config["contrastive_LLM"]["request_params"]["maxTokens"],
-        "temperature": config["contrastive_LLM"]["request_params"]["temperature"],
-        "stopBefore": config["contrastive_LLM"]["request_params"]["stopBefore"],
-        "includeAiFilters": config["contrastive_LLM"]["request_params"]["includeAiFilters"],
-        "seed": config["contrastive_LLM"]["request_params"]["seed"],
-    }
-
-    response_data = completion_executor.execute(request_data)
-
-    # ✅ 디버깅용 API 응답 확인
-    logger.debug(f"🛠️ LLM 응답 ({mood_type}): {response_data}")
-
-    if response_data is None:
-        logger.warning(f"⚠️ API 응답 없음 → 재시도 남은 횟수: {retry_count - 1} ({mood_type})")
-        new_delay = min(delay * 2, 60)  # ✅ 대기 시간을 2배 증가 (최대 60초 제한)
-        logger.info(f"⏳ {new_delay}초 대기 후 재시도...")
-        time.sleep(new_delay)
-        return request_mood(original_text, mood_type, retry_count - 1, new_delay)
-
-    response_cleaned = response_data.strip()
-
-    # ✅ 응답이 비었거나, 너무 짧은 경우 재생성 요청
-    if response_cleaned == "" or len(response_cleaned) < 3:
-        logger.warning(f"⚠️ 응답이 너무 짧음 → 재생성 요청 ({mood_type})")
-        new_delay = min(delay * 2, 60)  # ✅ 대기 시간을 2배 증가 (최대 60초 제한)
-        logger.info(f"⏳ {new_delay}초 대기 후 재시도...")
-        time.sleep(new_delay)
-        return request_mood(original_text, mood_type, retry_count - 1, new_delay)
-
-    return response_cleaned
-
-
-# ✅ CSV 처리
-for input_file, output_file in zip(INPUT_FILES, OUTPUT_FILES):
-    input_path = os.path.join(REFINED_DATA_FOLDER, input_file)
-    output_path = os.path.join(REFINED_DATA_FOLDER, output_file)
-
-    if not os.path.exists(input_path):
-        logger.warning(f"⚠️ 파일 없음: {input_path}, 건너뜁니다.")
-        continue
-
-    logger.info(f"📂 {input_path} 처리 중...")
-
-    df = pd.read_csv(input_path)
-
-    # ✅ 새 컬럼 추가
-    df["positive_mood"] = ""
-    df["negative_mood"] = ""
-
-    for idx, row in df.iterrows():
-        original_text = row["musicgen_input_text"]
-
-        # ✅ 분위기 및 반대 분위기 생성
-        positive_mood = request_mood(original_text, "positive")
-        negative_mood = request_mood(original_text, "negative")
-
-        df.at[idx, "positive_mood"] = positive_mood
-        df.at[idx, "negative_mood"] = negative_mood
-
-        if (idx + 1) % 10 == 0:  # 진행 로그 (10개 단위)
-            logger.info(f"🔄 {idx + 1}/{len(df)} 행 처리 완료...")
-
-    # ✅ CSV 저장
-    df.to_csv(output_path, index=False)
-    logger.info(f"✅ {output_path} 저장 완료! 총 {len(df)}개 행 처리 완료.")
+if __name__ == "__main__":
+    main()
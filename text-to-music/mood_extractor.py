@@ -0,0 +1,204 @@
+"""
+Input text에서 positive/negative mood를 추출하는 엔진입니다.
+두 분위기를 JSON 한 번의 요청으로 받거나(combined), 두 프롬프트를 동시에 요청(separate)하며,
+여러 행을 제한된 동시성으로 처리합니다. generate_contrastive_prompts.py와 update_failed_mood_data.py가 공유합니다.
+(modules_common을 import하므로, 사용하는 스크립트에서 저장소 루트를 sys.path에 추가한 뒤 import합니다.)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+import threading
+import time
+
+from loguru import logger
+from modules_common.completion_executor import CompletionExecutor
+from modules_common.load_config import load_config
+from modules_common.rate_limiter import retry_delay
+from modules_common.response_cache import get_response_cache
+import pandas as pd
+
+
+MOOD_TYPES = ("positive", "negative")
+MOOD_COLUMNS = [f"{mood_type}_mood" for mood_type in MOOD_TYPES]
+FAILED_MOOD = "N/A"
+MIN_MOOD_LENGTH = 3
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_DELAY = 2
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_COMBINED_MAX_TOKENS = 40
+
+CONFIG_API_PATH = "../config/config_api.yaml"
+CONFIG_CONTRASTIVE_PATH = "../config/config_contrastive.yaml"
+
+JSON_OBJECT_PATTERN = re.compile(r"\{.*?\}", re.DOTALL)
+
+
+def _clean_mood(mood):
+    """응답이 비었거나 너무 짧으면 None을 반환합니다."""
+    if not isinstance(mood, str):
+        return None
+    mood = mood.strip()
+    return mood if len(mood) >= MIN_MOOD_LENGTH else None
+
+
+def parse_combined_moods(response):
+    """
+    {"positive": "...", "negative": "..."} 형식의 응답에서 두 분위기를 추출합니다.
+    코드 블록이나 앞뒤 설명이 붙어 있어도 첫 JSON 객체만 읽으며, 형식이 맞지 않으면 None을 반환합니다.
+    """
+    match = JSON_OBJECT_PATTERN.search(response or "")
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    moods = {mood_type: _clean_mood(data.get(mood_type)) for mood_type in MOOD_TYPES}
+    return moods if all(moods.values()) else None
+
+
+class MoodExtractor:
+    """
+    LLM으로 positive/negative mood를 추출합니다.
+    :param mode: "combined"이면 JSON 한 번의 요청으로 두 분위기를 받고(실패 시 separate로 대체),
+                 "separate"이면 분위기별 프롬프트를 동시에 요청합니다.
+                 None이면 설정에 user_combined 프롬프트가 있을 때 combined를 사용합니다.
+    """
+
+    def __init__(self, completion_executor, config, mode=None, max_retries=DEFAULT_MAX_RETRIES, delay=DEFAULT_DELAY):
+        self.completion_executor = completion_executor
+        self.llm_config = config["contrastive_LLM"]
+        if mode is None:
+            mode = "combined" if "user_combined" in self.llm_config["preset_text"] else "separate"
+        if mode not in ("combined", "separate"):
+            raise ValueError(f"지원하지 않는 mode입니다: {mode}")
+        self.mode = mode
+        self.max_retries = max_retries
+        self.delay = delay
+
+    def _request_data(self, user_prompt_key, original_text, max_tokens=None):
+        preset_text = self.llm_config["preset_text"]
+        request_params = self.llm_config["request_params"]
+        return {
+            "messages": [
+                {"role": preset_text["system"]["role"], "content": preset_text["system"]["content"]},
+                {
+                    "role": preset_text[user_prompt_key]["role"],
+                    "content": preset_text[user_prompt_key]["content"].replace("{original_text}", original_text),
+                },
+            ],
+            "topP": request_params["topP"],
+            "topK": request_params["topK"],
+            "maxTokens": max_tokens or request_params["maxTokens"],
+            "temperature": request_params["temperature"],
+            "stopBefore": request_params["stopBefore"],
+            "includeAiFilters": request_params["includeAiFilters"],
+            "seed": request_params["seed"],
+        }
+
+    def _request(self, request_data, parse, label):
+        """
+        parse(응답)이 None이 아닌 값을 돌려줄 때까지 최대 max_retries번 요청합니다.
+        재시도 요청은 캐시를 우회해, 캐시된 잘못된 응답이 반복되지 않도록 합니다.
+        """
+        for attempt in range(self.max_retries):
+            response = self.completion_executor.execute(request_data, use_cache=attempt == 0)
+            logger.debug(f"🛠️ LLM 응답 ({label}): {response}")
+
+            result = parse(response) if response is not None else None
+            if result is not None:
+                return result
+
+            reason = "API 응답 없음" if response is None else "응답 형식 오류 또는 너무 짧음"
+            logger.warning(f"⚠️ {reason} → 재시도 남은 횟수: {self.max_retries - attempt - 1} ({label})")
+            if attempt < self.max_retries - 1:
+                new_delay = retry_delay(attempt, base=self.delay)  # 지터 지수 백오프 (최대 60초 제한)
+                logger.info(f"⏳ {new_delay:.1f}초 대기 후 재시도...")
+                time.sleep(new_delay)
+
+        logger.error(f"🚨 재생성 한도를 초과하여 기본값 반환 ({label})")
+        return None
+
+    def request_mood(self, original_text, mood_type):
+        """분위기별 프롬프트로 하나의 분위기를 생성합니다. 실패하면 "N/A"를 반환합니다."""
+        request_data = self._request_data(f"user_{mood_type}", original_text)
+        return self._request(request_data, _clean_mood, mood_type) or FAILED_MOOD
+
+    def request_combined(self, original_text):
+        """JSON 한 번의 요청으로 두 분위기를 생성합니다. 실패하면 None을 반환합니다."""
+        max_tokens = self.llm_config["request_params"].get("combined_maxTokens", DEFAULT_COMBINED_MAX_TOKENS)
+        request_data = self._request_data("user_combined", original_text, max_tokens=max_tokens)
+        return self._request(request_data, parse_combined_moods, "combined")
+
+    def extract_many(self, texts, max_concurrency=DEFAULT_MAX_CONCURRENCY, on_result=None):
+        """
+        여러 텍스트의 분위기를 최대 max_concurrency개의 요청을 동시에 보내며 추출합니다.
+        :param texts: 인덱스가 있는 텍스트 Series (또는 리스트)
+        :param on_result: 행 하나가 끝날 때마다 (인덱스, {"positive": ..., "negative": ...})로 호출 (선택)
+        :return: texts와 같은 인덱스를 가진 positive_mood, negative_mood 컬럼의 DataFrame
+        """
+        texts = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        results = {}
+        lock = threading.Lock()
+
+        def finish(index, moods):
+            with lock:
+                results[index] = moods
+                done = len(results)
+            if on_result is not None:
+                on_result(index, moods)
+            if done % 10 == 0:  # 진행 로그 (10개 단위)
+                logger.info(f"🔄 {done}/{len(texts)} 행 처리 완료...")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            if self.mode == "combined":
+
+                def extract_row(index, text):
+                    moods = self.request_combined(text)
+                    if moods is None:
+                        logger.warning("⚠️ JSON 응답을 받지 못해 분위기별 요청으로 대체합니다.")
+                        moods = {mood_type: self.request_mood(text, mood_type) for mood_type in MOOD_TYPES}
+                    finish(index, moods)
+
+                futures = [pool.submit(extract_row, index, text) for index, text in texts.items()]
+            else:
+                # 분위기별 요청을 독립된 작업으로 제출해 한 행의 두 요청도 동시에 진행
+                partial = {}
+
+                def extract_one(index, text, mood_type):
+                    mood = self.request_mood(text, mood_type)
+                    with lock:
+                        row = partial.setdefault(index, {})
+                        row[mood_type] = mood
+                        complete = len(row) == len(MOOD_TYPES)
+                    if complete:
+                        finish(index, row)
+
+                futures = [
+                    pool.submit(extract_one, index, text, mood_type)
+                    for index, text in texts.items()
+                    for mood_type in MOOD_TYPES
+                ]
+
+            for future in futures:
+                future.result()
+
+        return pd.DataFrame.from_dict(
+            {index: results[index] for index in texts.index}, orient="index", columns=list(MOOD_TYPES)
+        ).rename(columns=dict(zip(MOOD_TYPES, MOOD_COLUMNS)))
+
+
+def create_mood_extractor(mode=None, config_api_path=CONFIG_API_PATH, config_path=CONFIG_CONTRASTIVE_PATH, **kwargs):
+    """API 설정과 프롬프트 설정을 읽어 응답 캐시를 사용하는 MoodExtractor를 만듭니다."""
+    config_api = load_config(config_api_path)
+    completion_executor = CompletionExecutor(
+        host=config_api["API"]["HOST_URL"],
+        api_key=config_api["API"]["API_KEY"],
+        request_id=config_api["API"]["REQUEST_ID"],
+        cache=get_response_cache(),
+    )
+    return MoodExtractor(completion_executor, load_config(config_path), mode=mode, **kwargs)
@@ -1,11 +1,10 @@
 import csv
+import math
 import os
-import time  # ✅ 재생성 시 과부하 방지용
 
 from audiocraft.models import musicgen
-from evaluate_clap_mood_similarity import (
-    evaluate_audio_mood_scores,
-)  # ✅ CLAP 평가 함수 임포트
+from evaluate_clap_mood_similarity import get_clap_scorer  # ✅ 공유 CLAP 평가기
+from t2m_reconcile import reconcile_ids
 import torch
 import torchaudio
 from tqdm import tqdm
@@ -21,77 +20,138 @@ input_csv = config["input_csv"]
 output_dir = config["output_dir"]
 duration_sec = config["duration_sec"]
 model_size = config["model_size"]
+num_samples_per_prompt = config.get("num_samples_per_prompt", 1)  # ✅ 한 번의 generate에서 프롬프트당 생성할 후보 수
+prompts_per_batch = config.get("prompts_per_batch", 1)  # ✅ 한 번의 generate에 함께 넣을 프롬프트 수
 positive_threshold = 0.6  # ✅ positive_mood 점수가 0.6 이상이어야 함
-max_retries = 30  # ✅ 최대 재생성 횟수
+max_retries = 30  # ✅ 최대 재생성 횟수 (프롬프트당 생성하는 후보 수 기준)
+sample_rate = 32000
 
 # ✅ GPU device 번호를 코드 내에서 직접 설정 (예: 0번 GPU 사용)
 gpu_device_index = 0  # 원하는 GPU 번호를 여기에 지정 (예: 0 또는 1)
-torch.cuda.set_device(gpu_device_index)
 device_for_model = "cuda"  # autocast 등 내부 모듈은 "cuda"만 허용합니다.
 
-# ✅ 출력 디렉토리 생성
-os.makedirs(output_dir, exist_ok=True)
 
-# ✅ 모델 로드 (지정한 GPU 사용)
-print(f"🔄 Loading model: {model_size} on GPU device {gpu_device_index}")
-model = musicgen.MusicGen.get_pretrained(model_size, device=device_for_model)
-
-# ✅ CSV 파일에서 프롬프트 데이터 읽기
-with open(input_csv, newline="", encoding="utf-8") as csvfile:
-    reader = list(csv.DictReader(csvfile))
-    for row in tqdm(reader, desc="🎼 Generating music"):
-        file_id = row["id"]
-        prompt_text = row["musicgen_input_text"]
-        positive_mood = row["positive_mood"]
-        negative_mood = row["negative_mood"]
-
-        # ✅ 파일명은 id.wav 로 저장
-        output_file = os.path.join(output_dir, f"{file_id}.wav")
-
-        # ✅ 이미 파일이 존재하면 스킵
-        if os.path.exists(output_file):
-            print(f"⏩ Skipping: {output_file} already exists.")
-            continue
+def generate_candidates(model, prompt_texts, num_samples):
+    """
+    여러 프롬프트 × num_samples개의 후보를 한 번의 generate 호출로 생성합니다.
+    :return: 프롬프트별 [C, T] 오디오 텐서 리스트의 리스트
+    """
+    descriptions = [prompt_text for prompt_text in prompt_texts for _ in range(num_samples)]
+    res = model.generate(descriptions, progress=True)
+
+    candidates = []
+    for i in range(len(prompt_texts)):
+        audios = res[i * num_samples : (i + 1) * num_samples]
+        # ✅ 1D 텐서라면 채널 차원 추가
+        candidates.append([audio.unsqueeze(0) if audio.dim() == 1 else audio for audio in audios])
+    return candidates
+
+
+def score_candidates(audios, positive_mood, negative_mood):
+    """생성된 후보들을 디스크에 쓰지 않고 메모리에서 바로 CLAP 점수로 평가합니다."""
+    waveforms = [audio.mean(dim=0).float().cpu().numpy() for audio in audios]  # Mono 처리
+    return get_clap_scorer().score_moods(waveforms, [positive_mood] * len(audios), [negative_mood] * len(audios))
+
+
+def generate_best_of_n(model, rows):
+    """
+    여러 행의 후보를 배치로 생성하고, 행별로 positive 점수가 가장 높은 후보만 남깁니다.
+    기준을 넘지 못한 행만 다시 생성하며, 최대 max_retries개의 후보를 만든 뒤에는 가장 좋았던 후보를 사용합니다.
+    :return: {id: (오디오 텐서, CLAP 점수)} 딕셔너리
+    """
+    best = {}
+    max_rounds = max(1, math.ceil(max_retries / num_samples_per_prompt))
+    pending = list(rows)
+
+    for round_index in range(max_rounds):
+        if not pending:
+            break
+        print(
+            f"🎵 Generating {num_samples_per_prompt} candidates for {[row['id'] for row in pending]} "
+            f"(Round {round_index + 1}/{max_rounds})"
+        )
+        candidates = generate_candidates(model, [row["musicgen_input_text"] for row in pending], num_samples_per_prompt)
+
+        still_pending = []
+        for row, audios in zip(pending, candidates):
+            scores = score_candidates(audios, row["positive_mood"], row["negative_mood"])
+            best_index = max(range(len(audios)), key=lambda i: scores[i]["positive_score"])
+            if row["id"] not in best or scores[best_index]["positive_score"] > best[row["id"]][1]["positive_score"]:
+                best[row["id"]] = (audios[best_index], scores[best_index])
+
+            best_score = best[row["id"]][1]
+            print(
+                f"🔍 [{row['id']}] Best CLAP Scores - Positive: {best_score['positive_score']:.4f},"
+                f" Negative: {best_score['negative_score']:.4f}"
+            )
+            if best_score["positive_score"] < positive_threshold:
+                print(f"⚠️ Positive mood score ({best_score['positive_score']:.4f}) is too low. Regenerating...")
+                still_pending.append(row)
+        pending = still_pending
+
+    for row in pending:
+        print(f"🚨 Maximum retries reached. Keeping best generated sample for {row['id']} with low positive score.")
+    return best
+
+
+_model = None
+
+
+def get_musicgen_model():
+    """프로세스에서 공유하는 MusicGen 모델을 반환합니다. 처음 호출할 때 한 번만 로드합니다."""
+    global _model
+    if _model is None:
+        torch.cuda.set_device(gpu_device_index)
+
+        # ✅ 모델 로드 (지정한 GPU 사용)
+        print(f"🔄 Loading model: {model_size} on GPU device {gpu_device_index}")
+        _model = musicgen.MusicGen.get_pretrained(model_size, device=device_for_model)
 
         # ✅ 생성 파라미터 설정
-        model.set_generation_params(duration=duration_sec)
+        _model.set_generation_params(duration=duration_sec)
+    return _model
+
+
+def generate_music(rows, output_dir=output_dir):
+    """
+    wav가 없거나 손상된 행만 음악을 생성해 output_dir/{id}.wav로 저장합니다.
+    생성할 행이 없으면 모델을 로드하지 않습니다.
+    :param rows: id, musicgen_input_text, positive_mood, negative_mood 키를 가진 딕셔너리 리스트
+    :return: 새로 저장한 wav 파일 수
+    """
+    # ✅ 출력 디렉토리 생성
+    os.makedirs(output_dir, exist_ok=True)
+
+    # ✅ 정상적인 wav가 이미 있으면 스킵 (없거나 손상된 파일만 다시 생성)
+    reconciliation = reconcile_ids([row["id"] for row in rows], output_dir)
+    reconciliation.log_summary()
+    needs_regeneration = reconciliation.needs_regeneration([row["id"] for row in rows])
+    pending_rows = [row for row, regenerate in zip(rows, needs_regeneration) if regenerate]
+    print(f"⏩ Skipping {len(rows) - len(pending_rows)} rows whose wav already exists.")
+    if not pending_rows:
+        return 0
+
+    model = get_musicgen_model()
+    saved = 0
+    for start in tqdm(range(0, len(pending_rows), prompts_per_batch), desc="🎼 Generating music"):
+        best = generate_best_of_n(model, pending_rows[start : start + prompts_per_batch])
+
+        # ✅ 최종 선택된 후보만 id.wav 로 저장
+        for file_id, (audio_data, _) in best.items():
+            output_file = os.path.join(output_dir, f"{file_id}.wav")
+            torchaudio.save(output_file, audio_data.cpu(), sample_rate=sample_rate)
+            print(f"✅ Music saved: {output_file}")
+            saved += 1
+    return saved
 
-        retry_count = 0
-        while retry_count <= max_retries:
-            print(f"🎵 Generating music for: {file_id} (Try {retry_count + 1}/{max_retries})")
 
-            # ✅ 텍스트 프롬프트를 기반으로 음악 생성
-            res = model.generate([prompt_text], progress=True)
+def main():
+    # ✅ CSV 파일에서 프롬프트 데이터 읽기
+    with open(input_csv, newline="", encoding="utf-8") as csvfile:
+        rows = list(csv.DictReader(csvfile))
 
-            # ✅ 생성된 오디오 데이터를 저장 (1D 텐서라면 배치 차원 추가)
-            audio_data = res[0]
-            if audio_data.dim() == 1:
-                audio_data = audio_data.unsqueeze(0)
+    generate_music(rows)
 
-            torchaudio.save(output_file, audio_data.cpu(), sample_rate=32000)
-            print(f"✅ Music saved: {output_file}")
 
-            # ✅ 생성된 음악의 CLAP 점수 평가
-            mood_scores = evaluate_audio_mood_scores(output_file, positive_mood, negative_mood)
-
-            if mood_scores:
-                print(
-                    f"🔍 CLAP Scores - Positive: {mood_scores['positive_score']:.4f},\
-                          Negative: {mood_scores['negative_score']:.4f}"
-                )
-
-                if mood_scores["positive_score"] >= positive_threshold:
-                    print(
-                        f"✅ Positive mood score ({mood_scores['positive_score']:.4f})\
-                              is above threshold. Keeping the file."
-                    )
-                    break  # ✅ 만족하면 루프 종료
-                else:
-                    print(f"⚠️ Positive mood score ({mood_scores['positive_score']:.4f})\
-                           is too low. Regenerating...")
-                    retry_count += 1
-                    os.remove(output_file)  # ❌ 점수가 낮으면 파일 삭제
-                    time.sleep(1)  # ✅ 과부하 방지
-
-        if retry_count > max_retries:
-            print(f"🚨 Maximum retries reached. Keeping last generated file ({output_file}) with low positive score.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+T2M 스크립트가 공유하는 id 대조(reconciliation) 유틸리티입니다.
+입력 CSV의 id와 생성된 wav 파일을 인덱스 연산으로 비교해 미생성(missing), 불필요(extra),
+재생성 필요(stale: 손상되었거나 기준 시각보다 오래된 wav) id를 구하고,
+재생성한 값을 id 인덱스 기준의 한 번의 병합으로 원본 DataFrame에 반영합니다.
+"""
+
+import os
+import struct
+import threading
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+
+WAV_EXTENSION = ".wav"
+ID_COLUMN = "id"
+SCAN_COLUMNS = ["path", "size", "mtime", "valid"]
+
+# (경로, 크기, 수정 시각)이 같으면 이전 헤더 검사 결과를 재사용
+_validity_cache = {}
+_validity_lock = threading.Lock()
+
+
+def is_valid_wav(path, size=None):
+    """
+    wav 헤더를 읽어 재생 가능한 파일인지 검사합니다. (본문 전체는 읽지 않음)
+    RIFF/WAVE 시그니처, fmt 청크(채널 수·샘플레이트), 비어 있지 않은 data 청크가 있어야 하며,
+    data 청크가 파일 크기를 넘으면(쓰다가 중단된 파일) 손상된 것으로 봅니다.
+    """
+    try:
+        if size is None:
+            size = os.path.getsize(path)
+        with open(path, "rb") as file:
+            header = file.read(12)
+            if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                return False
+
+            has_format = False
+            offset = 12
+            while offset + 8 <= size:
+                file.seek(offset)
+                chunk_id, chunk_size = struct.unpack("<4sI", file.read(8))
+                if chunk_id == b"fmt ":
+                    fmt = file.read(16)
+                    if len(fmt) < 16:
+                        return False
+                    _, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                    has_format = channels > 0 and sample_rate > 0
+                elif chunk_id == b"data":
+                    data_size = size - offset - 8
+                    # 스트리밍으로 쓴 파일은 data 크기가 0xFFFFFFFF로 남아 있을 수 있음
+                    if chunk_size != 0xFFFFFFFF and chunk_size > data_size:
+                        return False
+                    return has_format and data_size > 0 and chunk_size > 0
+                offset += 8 + chunk_size + (chunk_size & 1)  # 청크는 2바이트 단위로 정렬됨
+    except (OSError, struct.error):
+        return False
+    return False
+
+
+def _cached_is_valid_wav(path, size, mtime_ns):
+    key = (path, size, mtime_ns)
+    with _validity_lock:
+        valid = _validity_cache.get(key)
+    if valid is None:
+        valid = is_valid_wav(path, size)
+        with _validity_lock:
+            _validity_cache[key] = valid
+    return valid
+
+
+def _id_index(ids):
+    """id 목록을 Index로 만듭니다. 모두 정수로 바꿀 수 있으면 int64, 아니면 문자열로 통일합니다."""
+    if not isinstance(ids, (pd.Index, pd.Series, np.ndarray)):
+        ids = np.asarray(ids)  # 파이썬 리스트를 바로 Index로 만드는 것보다 빠름
+    index = pd.Index(ids)
+    if index.dtype.kind in "iu":
+        return index.astype("int64")
+    if index.dtype.kind == "f":
+        return index.astype("int64") if (index == index.round()).all() else index.astype(str)
+    try:
+        return index.astype("int64")
+    except (TypeError, ValueError, OverflowError):
+        return index.astype(str)
+
+
+def _align_ids(left, right):
+    """두 id Index의 타입이 다르면(정수/문자열) 둘 다 문자열로 맞춥니다. 비어 있는 쪽은 다른 쪽 타입을 따릅니다."""
+    if left.dtype == right.dtype:
+        return left, right
+    if not len(right):
+        return left, right.astype(left.dtype)
+    if not len(left):
+        return left.astype(right.dtype), right
+    return left.astype(str), right.astype(str)
+
+
+def scan_outputs(output_dir, extension=WAV_EXTENSION, validate=True):
+    """
+    출력 디렉토리를 한 번만 훑어(os.scandir) 파일 이름(확장자 제외)을 id 인덱스로 하는 DataFrame을 만듭니다.
+    파일 이름이 모두 숫자이면 id는 정수, 아니면 문자열입니다.
+    :param validate: True이면 wav 헤더를 검사해 valid 컬럼에 기록 (False이면 크기가 0보다 크면 유효)
+    :return: id 인덱스, path, size, mtime, valid 컬럼의 DataFrame
+    """
+    records = []
+    if os.path.isdir(output_dir):
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(extension) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                valid = _cached_is_valid_wav(entry.path, stat.st_size, stat.st_mtime_ns) if validate else None
+                records.append((entry.name[: -len(extension)], entry.path, stat.st_size, stat.st_mtime, valid))
+    else:
+        logger.warning(f"⚠️ 출력 디렉토리가 없습니다: {output_dir}")
+
+    scan = pd.DataFrame.from_records(records, columns=[ID_COLUMN, *SCAN_COLUMNS])
+    scan.index = _id_index(scan.pop(ID_COLUMN)).rename(ID_COLUMN)
+    if not validate:
+        scan["valid"] = scan["size"] > 0
+    return scan
+
+
+class Reconciliation:
+    """
+    입력 id와 출력 파일의 대조 결과. 각 속성은 id의 pandas Index입니다.
+    :param missing: 입력에는 있지만 출력 파일이 없는 id
+    :param extra: 출력 파일은 있지만 입력에 없는 id
+    :param stale: 출력 파일이 있지만 손상되었거나 기준 시각보다 오래되어 다시 생성해야 하는 id
+    """
+
+    def __init__(self, expected, scan, missing, extra, stale):
+        self.expected = expected
+        self.scan = scan
+        self.missing = missing
+        self.extra = extra
+        self.stale = stale
+        self.to_regenerate = missing.append(stale)  # 다시 생성해야 하는 id (missing ∪ stale)
+
+    def needs_regeneration(self, ids):
+        """ids 각각이 다시 생성해야 하는 id인지 나타내는 불리언 배열을 반환합니다."""
+        keys, to_regenerate = _align_ids(_id_index(ids), self.to_regenerate)
+        return keys.isin(to_regenerate)
+
+    def select(self, df, id_column=ID_COLUMN):
+        """df에서 다시 생성해야 하는 행만 골라 반환합니다."""
+        return df[self.needs_regeneration(df[id_column])]
+
+    def log_summary(self):
+        logger.info(
+            f"🔍 id 대조: 입력 {len(self.expected)}개, 미생성 {len(self.missing)}개, "
+            f"손상·오래됨 {len(self.stale)}개, 입력에 없는 파일 {len(self.extra)}개"
+        )
+
+
+def reconcile_ids(expected_ids, output_dir, extension=WAV_EXTENSION, validate=True, min_mtime=None, scan=None):
+    """
+    입력 id 목록과 출력 디렉토리의 파일을 집합(인덱스) 연산으로 대조합니다.
+    :param expected_ids: 입력 id 목록 (Series, 리스트 등)
+    :param min_mtime: 이 시각(UNIX time)보다 먼저 수정된 파일은 stale로 분류 (선택)
+    :param scan: 이미 구한 scan_outputs 결과 (없으면 새로 스캔)
+    :return: Reconciliation
+    """
+    if scan is None:
+        scan = scan_outputs(output_dir, extension=extension, validate=validate)
+
+    expected, present = _align_ids(_id_index(expected_ids).unique(), scan.index)
+    in_expected = present.isin(expected)
+    stale_mask = in_expected & ~scan["valid"].to_numpy(dtype=bool)
+    if min_mtime is not None:
+        stale_mask |= in_expected & (scan["mtime"].to_numpy() < min_mtime)
+
+    return Reconciliation(
+        expected=expected,
+        scan=scan,
+        missing=expected[~expected.isin(present)],
+        extra=present[~in_expected],
+        stale=present[stale_mask],
+    )
+
+
+def merge_updates(df, updates, columns, id_column=ID_COLUMN):
+    """
+    updates의 columns 값을 id 인덱스 기준으로 df에 한 번에 덮어씁니다. (행 순서와 나머지 컬럼은 유지)
+    id 타입이 달라도(int/str) 맞춰서 병합하며, 같은 id가 여러 번 있으면 마지막 값을 사용합니다.
+    :return: 갱신된 새 DataFrame
+    """
+    columns = list(columns)
+    keys, update_ids = _align_ids(_id_index(df[id_column]), _id_index(updates[id_column]))
+    last = ~update_ids.duplicated(keep="last")
+    update_ids = update_ids[last]
+
+    positions = update_ids.get_indexer(keys)
+    matched = positions >= 0
+    merged = df.copy()
+    for column in columns:
+        values = updates[column].to_numpy()[last][positions[matched]]
+        current = merged[column] if column in merged.columns else pd.Series(pd.NA, index=merged.index, dtype=object)
+        current = current.astype(object) if current.dtype != values.dtype else current.copy()
+        current.iloc[matched.nonzero()[0]] = values
+        merged[column] = current
+    return merged
+
+
+def output_fingerprint(output_dir, extension=WAV_EXTENSION):
+    """
+    출력 디렉토리의 파일 목록·크기·수정 시각을 요약한 값을 반환합니다. (헤더 검사 없이 stat만 사용)
+    파일이 추가·삭제·수정되면 값이 바뀌므로 워크플로 단계의 캐시 키로 사용합니다.
+    """
+    scan = scan_outputs(output_dir, extension=extension, validate=False)
+    # 순서와 무관하게 같은 값이 나오도록 행 해시의 합을 사용
+    return int(pd.util.hash_pandas_object(scan[["size", "mtime"]]).sum() % (1 << 63))
@@ -0,0 +1,153 @@
+"""
+T2M 작업을 하나의 프로세스에서 실행하는 워크플로 러너입니다.
+각 단계는 공유 메모리의 DataFrame을 입력받아 DataFrame을 반환하는 함수이며,
+한 번 로드한 모델은 단계 사이에서 재사용됩니다.
+단계의 입력 파일 내용과 추가 상태(fingerprint)의 해시가 이전 실행과 같고 출력 파일이 남아 있으면 그 단계를 건너뜁니다.
+"""
+
+import hashlib
+import json
+import os
+
+from loguru import logger
+import pandas as pd
+
+
+DEFAULT_STATE_PATH = ".t2m_workflow_state.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    """파일 내용의 SHA-256 해시를 반환합니다. 파일이 없으면 None을 반환합니다."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WorkflowStage:
+    """
+    워크플로의 한 단계.
+    func는 inputs 순서대로 DataFrame을 인자로 받아, outputs가 하나면 DataFrame을, 여러 개면 튜플을 반환합니다.
+    :param fingerprint: 입력 파일 외에 결과에 영향을 주는 상태를 반환하는 함수 (예: 출력 디렉토리 상태, 선택)
+    :param cache: False이면 입력이 같아도 항상 실행
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), fingerprint=None, cache=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.fingerprint = fingerprint
+        self.cache = cache
+
+
+class Workflow:
+    """
+    단계들을 순서대로 실행하는 워크플로.
+    :param artifacts: {데이터 이름: CSV 경로}. 단계의 입출력은 메모리에서 전달되며, 이 경로에도 저장되어
+                      다음 실행에서 건너뛴 단계의 출력을 다시 읽거나 개별 스크립트에서 사용할 수 있습니다.
+    :param force: True이면 이전 실행 기록을 무시하고 모든 단계를 실행
+    """
+
+    def __init__(self, artifacts, stages, state_path=DEFAULT_STATE_PATH, force=False):
+        self.artifacts = dict(artifacts)
+        self.stages = list(stages)
+        self.state_path = state_path
+        self.force = force
+        self.data = {}
+        self._hashes = {}
+        self._validate()
+
+    def _validate(self):
+        """모든 단계의 입출력 데이터에 경로가 지정되어 있는지 확인합니다."""
+        for stage in self.stages:
+            for name in stage.inputs + stage.outputs:
+                if name not in self.artifacts:
+                    raise ValueError(f"[{stage.name}] 경로가 지정되지 않은 데이터입니다: {name}")
+
+    def _load_state(self):
+        if self.force or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def get(self, name):
+        """데이터를 반환합니다. 아직 메모리에 없으면 파일에서 한 번만 읽습니다."""
+        if name not in self.data:
+            self.data[name] = pd.read_csv(self.artifacts[name])
+        return self.data[name]
+
+    def put(self, name, df):
+        """데이터를 메모리에 두고 파일로도 저장합니다."""
+        path = self.artifacts[name]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        df.to_csv(path, index=False)
+        self.data[name] = df
+        self._hashes.pop(name, None)
+
+    def artifact_hash(self, name):
+        if name not in self._hashes:
+            self._hashes[name] = file_hash(self.artifacts[name])
+        return self._hashes[name]
+
+    def stage_key(self, stage):
+        """단계의 입력 파일 해시와 fingerprint로 실행 키를 만듭니다."""
+        digest = hashlib.sha256(stage.name.encode("utf-8"))
+        for name in stage.inputs:
+            input_hash = self.artifact_hash(name)
+            if input_hash is None:
+                raise FileNotFoundError(f"[{stage.name}] 입력 데이터 파일이 없습니다: {self.artifacts[name]}")
+            digest.update(f"\0{name}\0{input_hash}".encode("utf-8"))
+        if stage.fingerprint is not None:
+            digest.update(json.dumps(stage.fingerprint(), sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _is_up_to_date(self, stage, key, state):
+        return (
+            stage.cache
+            and state.get(stage.name) == key
+            and all(os.path.exists(self.artifacts[name]) for name in stage.outputs)
+        )
+
+    def run_stage(self, stage, state):
+        key = self.stage_key(stage)
+        if self._is_up_to_date(stage, key, state):
+            logger.info(f"⏩ [{stage.name}] 입력이 이전 실행과 같아 건너뜁니다.")
+            return False
+
+        logger.info(f"▶️ [{stage.name}] 실행 중...")
+        result = stage.func(*(self.get(name) for name in stage.inputs))
+        results = (result,) if len(stage.outputs) == 1 else tuple(result or ())
+        for name, df in zip(stage.outputs, results):
+            self.put(name, df)
+
+        if stage.cache:
+            # 단계가 자신의 입력 파일이나 fingerprint 상태(출력 디렉토리 등)를 바꿀 수 있으므로
+            # 실행 후의 키를 기록해, 이후 바뀐 것이 없으면 다음 실행에서 건너뜀
+            state[stage.name] = self.stage_key(stage)
+            self._save_state(state)
+        logger.info(f"✅ [{stage.name}] 완료")
+        return True
+
+    def run(self):
+        """
+        모든 단계를 순서대로 실행합니다.
+        :return: 실제로 실행한 단계 이름 리스트
+        """
+        state = self._load_state()
+        executed = []
+        for stage in self.stages:
+            if self.run_stage(stage, state):
+                executed.append(stage.name)
+        logger.info(f"🏁 워크플로 완료: {len(executed)}/{len(self.stages)}개 단계 실행")
+        return executed
@@ -1,6 +1,6 @@
+import argparse
 import os
 import sys
-import time
 
 from loguru import logger
 import pandas as pd
@@ -9,133 +9,67 @@ import pandas as pd
 # ✅ 스크립트의 위치를 기준으로 상위 디렉토리 추가
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from modules_common.completion_executor import CompletionExecutor
-from modules_common.load_config import load_config
+from mood_extractor import DEFAULT_MAX_CONCURRENCY, MOOD_COLUMNS, create_mood_extractor
+from t2m_reconcile import merge_updates, reconcile_ids
 
 
-# ✅ API 및 설정 로드
-config_api = load_config("../config/config_api.yaml")
-config = load_config("../config/config_contrastive.yaml")
-
-API_KEY = config_api["API"]["API_KEY"]
-REQUEST_ID = config_api["API"]["REQUEST_ID"]
-COMPLETION_HOST_URL = config_api["API"]["HOST_URL"]
-
 # ✅ 파일 경로 설정
 GENERATED_MUSIC_FOLDER = "generated_music/likepernumber"
 REFINED_DATA_FOLDER = "refined_data"
 INPUT_CSV = "contrasted_likepernumber_input_text.csv"
 
 
-# ✅ LLM을 통해 분위기 생성하는 함수
-def request_mood(original_text, mood_type, retry_count=5, delay=2):
-    """LLM을 사용해 주어진 텍스트의 분위기(positive/negative)를 생성"""
-    if retry_count == 0:
-        logger.error(f"🚨 재생성 한도를 초과하여 기본값 반환 ({mood_type})")
-        return "N/A"
-
-    completion_executor = CompletionExecutor(
-        host=COMPLETION_HOST_URL,
-        api_key=API_KEY,
-        request_id=REQUEST_ID,
-    )
-
-    user_prompt_key = "user_positive" if mood_type == "positive" else "user_negative"
-
-    preset_text = [
-        {
-            "role": config["contrastive_LLM"]["preset_text"]["system"]["role"],
-            "content": config["contrastive_LLM"]["preset_text"]["system"]["content"],
-        },
-        {
-            "role": config["contrastive_LLM"]["preset_text"][user_prompt_key]["role"],
-            "content": config["contrastive_LLM"]["preset_text"][user_prompt_key]["content"].replace(
-                "{original_text}", original_text
-            ),
-        },
-    ]
-
-    request_data = {
-        "messages": preset_text,
-        "topP": config["contrastive_LLM"]["request_params"]["topP"],
-        "topK": config["contrastive_LLM"]["request_params"]["topK"],
-        "maxTokens": config["contrastive_LLM"]["request_params"]["maxTokens"],
-        "temperature": config["contrastive_LLM"]["request_params"]["temperature"],
-        "stopBefore": config["contrastive_LLM"]["request_params"]["stopBefore"],
-        "includeAiFilters": config["contrastive_LLM"]["request_params"]["includeAiFilters"],
-        "seed": config["contrastive_LLM"]["request_params"]["seed"],
-    }
-
-    response_data = completion_executor.execute(request_data)
-
-    logger.debug(f"🛠️ LLM 응답 ({mood_type}): {response_data}")
-
-    if response_data is None or response_data.strip() == "":
-        logger.warning(f"⚠️ API 응답 없음 → 재시도 남은 횟수: {retry_count - 1} ({mood_type})")
-        new_delay = min(delay * 2, 60)
-        logger.info(f"⏳ {new_delay}초 대기 후 재시도...")
-        time.sleep(new_delay)
-        return request_mood(original_text, mood_type, retry_count - 1, new_delay)
-
-    return response_data.strip()
-
-
-# ✅ 생성되지 않은 ID 찾기
-def find_unprocessed_ids():
-    """생성이 실패한 ID 목록 반환"""
-    generated_files = {f.split(".")[0] for f in os.listdir(GENERATED_MUSIC_FOLDER) if f.endswith(".wav")}
-
-    input_csv_path = os.path.join(REFINED_DATA_FOLDER, INPUT_CSV)
-    if not os.path.exists(input_csv_path):
-        logger.error(f"🚨 CSV 파일을 찾을 수 없음: {input_csv_path}")
-        return []
-
-    df = pd.read_csv(input_csv_path)
-    csv_ids = set(df["id"].astype(str))
-
-    unprocessed_ids = csv_ids - generated_files
-    logger.info(f"🔍 {len(unprocessed_ids)}개의 미생성 ID 발견!")
-
-    return df[df["id"].astype(str).isin(unprocessed_ids)]
-
-
-# ✅ 분위기 값 업데이트 및 CSV 저장
-def update_mood_data():
-    """생성이 실패한 데이터의 분위기 값을 다시 생성하고 CSV 업데이트"""
-    df_unprocessed = find_unprocessed_ids()
+# ✅ 분위기 값 다시 생성
+def regenerate_failed_moods(
+    df, mood_extractor, output_dir=GENERATED_MUSIC_FOLDER, max_concurrency=DEFAULT_MAX_CONCURRENCY
+):
+    """
+    wav 생성에 실패한(없거나 손상된) 행의 분위기 값을 다시 생성해 반영한 새 DataFrame을 반환합니다.
+    :return: (갱신된 DataFrame, 다시 생성한 행 수)
+    """
+    reconciliation = reconcile_ids(df["id"], output_dir)
+    reconciliation.log_summary()
+    df_unprocessed = reconciliation.select(df)
 
     if df_unprocessed.empty:
         logger.info("✅ 모든 데이터가 생성되었으며, 업데이트가 필요하지 않습니다.")
-        return
-
-    for idx, row in df_unprocessed.iterrows():
-        original_text = row["musicgen_input_text"]
+        return df, 0
 
-        # ✅ LLM을 통해 분위기 다시 생성
-        new_positive_mood = request_mood(original_text, "positive")
-        new_negative_mood = request_mood(original_text, "negative")
+    # ✅ LLM을 통해 분위기 다시 생성 (행 단위 요청을 동시에 실행)
+    moods = mood_extractor.extract_many(df_unprocessed["musicgen_input_text"], max_concurrency=max_concurrency)
 
-        df_unprocessed.at[idx, "positive_mood"] = new_positive_mood
-        df_unprocessed.at[idx, "negative_mood"] = new_negative_mood
+    # ✅ id 인덱스 기준으로 한 번에 병합
+    return merge_updates(df, moods.assign(id=df_unprocessed["id"]), MOOD_COLUMNS), len(df_unprocessed)
 
-        if (idx + 1) % 10 == 0:
-            logger.info(f"🔄 {idx + 1}/{len(df_unprocessed)} 행 업데이트 완료...")
 
-    # ✅ 원본 CSV 업데이트
+# ✅ 분위기 값 업데이트 및 CSV 저장
+def update_mood_data(mode=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    생성이 실패한 데이터의 분위기 값을 다시 생성하고 CSV 업데이트
+    :param mode: 분위기 추출 모드 ("combined" 또는 "separate", None이면 설정에 따라 결정)
+    :param max_concurrency: 동시에 보낼 최대 요청 수
+    """
     input_csv_path = os.path.join(REFINED_DATA_FOLDER, INPUT_CSV)
-    df_original = pd.read_csv(input_csv_path)
+    if not os.path.exists(input_csv_path):
+        logger.error(f"🚨 CSV 파일을 찾을 수 없음: {input_csv_path}")
+        return
 
-    for idx, row in df_unprocessed.iterrows():
-        df_original.loc[df_original["id"] == row["id"], ["positive_mood", "negative_mood"]] = (
-            row["positive_mood"],
-            row["negative_mood"],
-        )
+    df_original, updated = regenerate_failed_moods(
+        pd.read_csv(input_csv_path), create_mood_extractor(mode=mode), max_concurrency=max_concurrency
+    )
+    if not updated:
+        return
 
     # ✅ CSV 저장
     df_original.to_csv(input_csv_path, index=False)
-    logger.info(f"✅ 업데이트 완료! {len(df_unprocessed)}개의 분위기 값이 새로 생성됨.")
+    logger.info(f"✅ 업데이트 완료! {updated}개의 분위기 값이 새로 생성됨.")
 
 
 # ✅ 실행
 if __name__ == "__main__":
-    update_mood_data()
+    parser = argparse.ArgumentParser(description="음악 생성에 실패한 데이터의 mood를 다시 생성합니다.")
+    parser.add_argument("--mode", choices=["combined", "separate"], default=None, help="분위기 추출 모드")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="동시에 보낼 최대 요청 수")
+    args = parser.parse_args()
+
+    update_mood_data(mode=args.mode, max_concurrency=args.max_concurrency)